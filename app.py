@@ -1,4 +1,4 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for, send_from_directory
+from flask import Flask, render_template, jsonify, request, redirect, url_for, send_from_directory, has_request_context, copy_current_request_context, Response
 import os
 import json
 import requests
@@ -7,14 +7,24 @@ import re
 from bs4 import BeautifulSoup
 from datetime import datetime
 import atexit
+import hashlib
+import http.client
 import logging
+import socket
+import bisect
+import gzip
+import random
+import sys
+from array import array
 from logging.handlers import RotatingFileHandler
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from urllib.parse import quote, urlencode, urlparse
 
 SETTINGS_FILE = os.path.join('/app/data', 'settings.json')
 LOG_FILE = os.path.join('/app/data', 'mamrenewarr.log')
 HISTORY_FILE = os.path.join('/app/data', 'run_history.json')
+CHECKPOINT_FILE = os.path.join('/app/data', 'fix_all_checkpoint.json')
 
 # Ensure data directory exists
 os.makedirs('/app/data', exist_ok=True)
@@ -46,6 +56,10 @@ logger.addHandler(file_handler)
 # Configure root logger level only (handlers are already on our logger)
 logging.getLogger().setLevel(logging.INFO)
 
+# Serialises read-modify-write of settings.json between worker threads: every
+# load_settings -> modify -> save_settings sequence runs under this lock
+settings_lock = __import__('threading').RLock()
+
 def load_settings():
     # Ensure data directory exists
     os.makedirs('/app/data', exist_ok=True)
@@ -55,8 +69,12 @@ def load_settings():
     return {}
 
 def save_settings(data):
-    with open(SETTINGS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    # Write a temp file and swap it in, so readers never see a half-written file
+    with settings_lock:
+        temp_file = SETTINGS_FILE + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_file, SETTINGS_FILE)
     # Update log level when settings are saved
     update_log_level()
 
@@ -107,23 +125,24 @@ def log_error(message):
     logger.error(message)
 
 def load_history():
-    """Load run history from dedicated history file"""
+    """Load run history, last run time and step timings from dedicated history file"""
     try:
         if os.path.exists(HISTORY_FILE):
             with open(HISTORY_FILE, 'r') as f:
                 data = json.load(f)
-                return data.get('history', []), data.get('last_run')
-        return [], None
+                return data.get('history', []), data.get('last_run'), data.get('step_timings', [])
+        return [], None, []
     except Exception as e:
         log_error(f"Error loading history file: {e}")
-        return [], None
+        return [], None, []
 
-def save_history(history, last_run):
+def save_history(history, last_run, step_timings=None):
     """Save run history to dedicated history file"""
     try:
         data = {
             'history': history,
-            'last_run': last_run
+            'last_run': last_run,
+            'step_timings': step_timings or []
         }
         with open(HISTORY_FILE, 'w') as f:
             json.dump(data, f, indent=2)
@@ -166,13 +185,16 @@ timer_state = {
     'active': False,
     'next_run': None,
     'last_run': None,
-    'history': []  # List of last 10 runs
+    'history': [],  # List of last 10 runs
+    'step_timings': []  # Step timings of the last STEP_TIMINGS_KEEP runs
 }
 timer_thread = None
 timer_lock = __import__('threading').Lock()
 
 # Thread-local storage to track execution context (Timer vs Manual)
+import functools
 import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait as wait_futures, FIRST_COMPLETED
 execution_context = threading.local()
 
 def load_timer_state():
@@ -181,7 +203,8 @@ def load_timer_state():
         settings = load_settings()
         
         # Load history from dedicated file
-        history, last_run = load_history()
+        history, last_run, step_timings = load_history()
+        timer_state['step_timings'] = step_timings
         if history:
             timer_state['history'] = history
             log_info(f"Loaded {len(history)} timer history entries from file")
@@ -228,10 +251,11 @@ def load_timer_state():
 def save_timer_state():
     """Save current timer state to settings"""
     try:
-        settings = load_settings()
-        settings['timer_next_run'] = timer_state.get('next_run')
-        settings['timer_active_on_shutdown'] = timer_state.get('active', False)
-        save_settings(settings)
+        with settings_lock:
+            settings = load_settings()
+            settings['timer_next_run'] = timer_state.get('next_run')
+            settings['timer_active_on_shutdown'] = timer_state.get('active', False)
+            save_settings(settings)
         log_debug(f"Timer state saved - active: {timer_state.get('active')}, next_run: {timer_state.get('next_run')}")
     except Exception as e:
         log_error(f"Error saving timer state: {e}")
@@ -248,60 +272,250 @@ load_timer_state()
 
 # Global browser instance for session management
 global_driver = None
+global_driver_lock = threading.RLock()
+global_driver_stats = {
+    'created_at': None,
+    'last_used': None,
+    'navigations': 0
+}
+browser_supervisor_thread = None
 
-def cleanup_global_driver():
-    """Cleanup global browser instance on app shutdown"""
-    global global_driver
-    if global_driver:
+# Work using the global browser holds a lease (see uses_global_driver) for its whole
+# duration: the browser is not closed or recycled under it by the supervisor, by other
+# work or by Logout MAM.
+global_driver_leases = {}  # thread ident -> nesting depth
+global_driver_released = threading.Condition(global_driver_lock)
+
+def _other_global_driver_leases():
+    """Leases held by threads other than the calling one (call with global_driver_lock held)"""
+    ident = threading.get_ident()
+    return sum(depth for holder, depth in global_driver_leases.items() if holder != ident)
+
+def uses_global_driver(func):
+    """Decorator holding a lease on the global browser while func runs"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        ident = threading.get_ident()
+        with global_driver_lock:
+            global_driver_leases[ident] = global_driver_leases.get(ident, 0) + 1
         try:
-            global_driver.quit()
-            log_info("Global browser instance closed")
-        except Exception as e:
-            log_error(f"Error closing global browser: {e}")
+            return func(*args, **kwargs)
         finally:
-            global_driver = None
+            with global_driver_lock:
+                global_driver_leases[ident] -= 1
+                if not global_driver_leases[ident]:
+                    del global_driver_leases[ident]
+                if global_driver:
+                    # Idle time counts from the end of the work, not its last navigation
+                    global_driver_stats['last_used'] = time.time()
+                global_driver_released.notify_all()
+    return wrapper
+
+def _reset_global_driver_stats():
+    """Reset browser lifetime statistics after the browser is closed"""
+    global_driver_stats['created_at'] = None
+    global_driver_stats['last_used'] = None
+    global_driver_stats['navigations'] = 0
+
+def cleanup_global_driver(reason='shutdown'):
+    """Cleanup global browser instance on app shutdown, idle timeout or recycle"""
+    global global_driver
+    with global_driver_lock:
+        if global_driver:
+            try:
+                global_driver.quit()
+                log_info(f"Global browser instance closed ({reason})")
+            except Exception as e:
+                log_error(f"Error closing global browser: {e}")
+            finally:
+                global_driver = None
+                _reset_global_driver_stats()
 
 # Register cleanup function
 atexit.register(cleanup_global_driver)
 
+def _process_tree_rss_bytes(root_pid):
+    """Sum resident memory of a process and all of its descendants using /proc"""
+    if not os.path.isdir('/proc'):
+        return None
+
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                stat = f.read()
+            # Field 4 (ppid) follows the parenthesised command name
+            ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+            children.setdefault(ppid, []).append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+
+    total_kb = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb * 1024
+
+def get_global_driver_memory_mb():
+    """Resident memory of the chromedriver/Chrome process tree in MB, or None if unknown"""
+    driver = global_driver
+    if not driver:
+        return None
+    try:
+        rss_bytes = _process_tree_rss_bytes(driver.service.process.pid)
+    except Exception as e:
+        log_debug(f"Could not read browser process tree memory: {e}")
+        return None
+    return round(rss_bytes / (1024 * 1024), 1) if rss_bytes is not None else None
+
+def get_global_driver_status():
+    """Browser uptime, idle time, navigation count and memory for health reporting"""
+    now = time.time()
+    with global_driver_lock:
+        active = global_driver is not None
+        created_at = global_driver_stats['created_at']
+        last_used = global_driver_stats['last_used']
+        return {
+            'active': active,
+            'uptime_seconds': int(now - created_at) if active and created_at else 0,
+            'idle_seconds': int(now - last_used) if active and last_used else 0,
+            'navigations': global_driver_stats['navigations'],
+            'memory_mb': get_global_driver_memory_mb() if active else None
+        }
+
+def _numeric_setting(settings, key, default):
+    """A number from settings; the Config page saves raw strings and '' for a cleared field"""
+    try:
+        return float(settings.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+def _global_driver_needs_recycle(settings):
+    """Check navigation count and memory limits for the global browser"""
+    max_navigations = int(_numeric_setting(settings, 'browser_max_navigations', 100))
+    max_rss_mb = _numeric_setting(settings, 'browser_max_rss_mb', 1024)
+
+    if max_navigations > 0 and global_driver_stats['navigations'] >= max_navigations:
+        return f"{global_driver_stats['navigations']} navigations (limit {max_navigations})"
+    if max_rss_mb > 0:
+        memory_mb = get_global_driver_memory_mb()
+        if memory_mb is not None and memory_mb > max_rss_mb:
+            return f"{memory_mb} MB resident (limit {max_rss_mb:g} MB)"
+    return None
+
+def browser_supervisor_worker():
+    """Background thread that closes an idle global browser and recycles a bloated one"""
+    log_info("Browser supervisor thread started")
+
+    while True:
+        time.sleep(30)
+        try:
+            with global_driver_lock:
+                if not global_driver or global_driver_leases:
+                    continue
+
+                settings = load_settings()
+                idle_timeout = _numeric_setting(settings, 'browser_idle_timeout_minutes', 10) * 60
+                idle_seconds = time.time() - (global_driver_stats['last_used'] or time.time())
+
+                if idle_timeout > 0 and idle_seconds >= idle_timeout:
+                    log_info(f"Global browser idle for {int(idle_seconds)} seconds - shutting down")
+                    cleanup_global_driver(reason='idle timeout')
+                    continue
+
+                # Only recycle well after the last operation, in case the next one follows
+                if idle_seconds >= 60:
+                    recycle_reason = _global_driver_needs_recycle(settings)
+                    if recycle_reason:
+                        log_info(f"Recycling global browser: {recycle_reason}")
+                        cleanup_global_driver(reason='recycle')
+        except Exception as e:
+            log_error(f"Browser supervisor error: {e}")
+
+def _start_browser_supervisor():
+    """Start the browser supervisor thread if it is not already running"""
+    global browser_supervisor_thread
+    if browser_supervisor_thread is None or not browser_supervisor_thread.is_alive():
+        browser_supervisor_thread = threading.Thread(target=browser_supervisor_worker, daemon=True, name="BrowserSupervisor")
+        browser_supervisor_thread.start()
+
+def _track_driver_navigations(driver):
+    """Wrap driver.get so every navigation is counted and marks the browser as in use"""
+    original_get = driver.get
+
+    def tracked_get(url):
+        global_driver_stats['navigations'] += 1
+        global_driver_stats['last_used'] = time.time()
+        return original_get(url)
+
+    driver.get = tracked_get
+
 def get_or_create_global_driver():
     """Get existing global driver or create a new one"""
     global global_driver
-    
-    # Check if driver exists and is still alive
-    if global_driver:
+
+    with global_driver_lock:
+        # Check if driver exists and is still alive
+        if global_driver:
+            try:
+                # Test if driver is still alive by getting current URL
+                _ = global_driver.current_url
+                alive = True
+            except Exception as e:
+                log_info(f"Global driver is dead, creating new one. Error: {e}")
+                # quit() still ends the chromedriver process behind a crashed Chrome
+                cleanup_global_driver(reason='dead')
+                alive = False
+
+            if alive:
+                # Never recycle the browser out from under other work using it
+                recycle_reason = None if _other_global_driver_leases() else _global_driver_needs_recycle(load_settings())
+                if not recycle_reason:
+                    log_debug("Reusing existing global browser instance")
+                    global_driver_stats['last_used'] = time.time()
+                    return global_driver
+                log_info(f"Recycling global browser before use: {recycle_reason}")
+                cleanup_global_driver(reason='recycle')
+
+        # Create new driver
         try:
-            # Test if driver is still alive by getting current URL
-            _ = global_driver.current_url
-            log_debug("Reusing existing global browser instance")
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+            from selenium.webdriver.chrome.service import Service
+            from webdriver_manager.chrome import ChromeDriverManager
+
+            chrome_options = Options()
+            chrome_options.add_argument('--headless')
+            chrome_options.add_argument('--no-sandbox')
+            chrome_options.add_argument('--disable-dev-shm-usage')
+            chrome_options.add_argument('--disable-gpu')
+            chrome_options.add_argument('--disable-extensions')
+            chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+            service = Service(ChromeDriverManager().install())
+            global_driver = webdriver.Chrome(service=service, options=chrome_options)
+            _track_driver_navigations(global_driver)
+            global_driver_stats['created_at'] = time.time()
+            global_driver_stats['last_used'] = time.time()
+            global_driver_stats['navigations'] = 0
+            _start_browser_supervisor()
+            log_info("Created new global browser instance")
             return global_driver
+
         except Exception as e:
-            log_info(f"Global driver is dead, creating new one. Error: {e}")
-            global_driver = None
-    
-    # Create new driver
-    try:
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.chrome.service import Service
-        from webdriver_manager.chrome import ChromeDriverManager
-        
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        service = Service(ChromeDriverManager().install())
-        global_driver = webdriver.Chrome(service=service, options=chrome_options)
-        log_info("Created new global browser instance")
-        return global_driver
-            
-    except Exception as e:
-        log_error(f"Error creating global driver: {e}")
-        return None
+            log_error(f"Error creating global driver: {e}")
+            return None
 
 def ensure_mam_login(driver, settings):
     """Ensure the driver is logged into MAM"""
@@ -399,6 +613,283 @@ def get_mam_session():
         mam_session.mount("https://", adapter)
     return mam_session
 
+# HTTP-only MAM engine
+#
+# Every function returns a dict with 'success' and 'message'. 'needs_browser' is set
+# when the page relies on JavaScript (no plain HTML form to submit), in which case the
+# caller falls back to the Selenium path.
+
+MAM_JS_REQUIRED_MARKERS = ['enable javascript', 'javascript is required', 'javascript must be enabled']
+
+def mam_engine_enabled(settings):
+    """Check whether the HTTP engine should be tried before the Selenium path"""
+    return settings.get('mam_engine', 'auto') != 'selenium'
+
+def _mam_page_needs_javascript(html):
+    """Detect pages that only work with JavaScript enabled"""
+    lowered = html.lower()
+    return any(marker in lowered for marker in MAM_JS_REQUIRED_MARKERS)
+
+def _collect_form_fields(form):
+    """Collect the default values a browser would submit for a form"""
+    data = {}
+    for field in form.find_all(['input', 'textarea', 'select']):
+        name = field.get('name')
+        if not name:
+            continue
+        field_type = (field.get('type') or 'text').lower()
+        if field_type in ['submit', 'button', 'image', 'reset', 'file']:
+            continue
+        if field_type in ['radio', 'checkbox']:
+            if field.has_attr('checked'):
+                data[name] = field.get('value', 'on')
+        elif field.name == 'select':
+            option = field.find('option', selected=True) or field.find('option')
+            if option:
+                data[name] = option.get('value', option.text)
+        elif field.name == 'textarea':
+            data[name] = field.text
+        else:
+            data[name] = field.get('value', '')
+    return data
+
+def mam_http_login(settings):
+    """Login to MAM with the shared requests session"""
+    from urllib.parse import urljoin
+
+    mam_url = settings.get('mam_url', 'https://www.myanonamouse.net/')
+    username = settings.get('mam_username', '')
+    password = settings.get('mam_password', '')
+
+    if not username or not password:
+        return {'success': False, 'needs_browser': False, 'message': 'MAM credentials not configured'}
+
+    session = get_mam_session()
+    login_url = mam_url.rstrip('/') + '/login.php'
+    response = session.get(login_url, timeout=15)
+
+    # Existing cookies are still valid - MAM redirects away from the login page
+    if 'login.php' not in response.url:
+        return {'success': True, 'needs_browser': False, 'message': 'Already logged in'}
+
+    soup = BeautifulSoup(response.text, 'html.parser')
+    email_field = soup.find('input', attrs={'name': 'email'})
+    form = email_field.find_parent('form') if email_field else None
+    if not form:
+        return {'success': False, 'needs_browser': True, 'message': 'Login form not found in page HTML'}
+
+    data = _collect_form_fields(form)
+    data['email'] = username
+    data['password'] = password
+    if soup.find('input', attrs={'name': 'rememberMe'}):
+        data['rememberMe'] = 'yes'
+
+    action_url = urljoin(response.url, form.get('action') or response.url)
+    log_debug(f"HTTP engine: submitting MAM login form to {action_url}")
+    response = session.post(action_url, data=data, timeout=15)
+
+    if 'login.php' not in response.url:
+        log_info("HTTP engine: MAM login successful")
+        return {'success': True, 'needs_browser': False, 'message': 'Logged in via HTTP'}
+
+    # Still on the login page: JS-computed fields are the usual culprit
+    return {
+        'success': False,
+        'needs_browser': True,
+        'message': 'HTTP login rejected - still on login page'
+    }
+
+def mam_http_fetch_security_page(settings):
+    """Fetch the MAM security page, logging in first if required"""
+    security_page_url = settings.get('security_page', 'https://www.myanonamouse.net/preferences/index.php?view=security')
+    session = get_mam_session()
+
+    response = session.get(security_page_url, timeout=15)
+    if 'login.php' in response.url:
+        login_result = mam_http_login(settings)
+        if not login_result['success']:
+            return login_result
+        response = session.get(security_page_url, timeout=15)
+
+    if 'login.php' in response.url:
+        return {'success': False, 'needs_browser': True, 'message': 'Redirected to login page after HTTP login'}
+
+    soup = BeautifulSoup(response.text, 'html.parser')
+    if not soup.find('table', class_='sessions'):
+        return {
+            'success': False,
+            'needs_browser': True,
+            'message': 'Sessions table not found in page HTML' + (' (page requires JavaScript)' if _mam_page_needs_javascript(response.text) else '')
+        }
+
+    return {'success': True, 'needs_browser': False, 'message': 'Security page loaded', 'url': response.url, 'html': response.text, 'soup': soup}
+
+IPV4_PATTERN = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
+
+def _map_session_columns(header_row):
+    """Map session attributes to column indexes using the table header names"""
+    columns = {}
+    if not header_row:
+        return columns
+    for index, cell in enumerate(header_row.find_all(['th', 'td'])):
+        name = cell.get_text(' ', strip=True).lower()
+        if 'label' in name:
+            columns.setdefault('label', index)
+        elif 'ip' in name.split() or name.startswith('ip'):
+            columns.setdefault('ip', index)
+        elif 'asn' in name:
+            columns.setdefault('asn', index)
+    return columns
+
+def parse_mam_sessions(soup):
+    """Parse session rows from the security page sessions table"""
+    table = soup.find('table', class_='sessions')
+    sessions = []
+    if not table:
+        return sessions
+
+    rows = table.find_all('tr')
+    columns = _map_session_columns(rows[0] if rows else None)
+    for i, row in enumerate(rows[1:]):  # Skip header
+        cells = row.find_all('td')
+        if len(cells) < 6:
+            continue
+        created_date_text = cells[0].get_text(strip=True)
+        try:
+            created_date = datetime.strptime(created_date_text, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+        remove_button = cells[-1].select_one('input[data-secact="rs"], input[value="Remove Session"], *[data-secact="rs"]')
+        cell_texts = [cell.get_text(' ', strip=True) for cell in cells]
+
+        # Prefer the header-mapped column, fall back to scanning the row
+        ip_source = cell_texts[columns['ip']] if 'ip' in columns and columns['ip'] < len(cell_texts) else ' '.join(cell_texts[1:])
+        ip_match = IPV4_PATTERN.search(ip_source)
+        if 'asn' in columns and columns['asn'] < len(cell_texts):
+            asn_text = cell_texts[columns['asn']].lower()
+            asn_locked = bool(asn_text) and asn_text not in ('no', 'n', '-', 'ip')
+        else:
+            asn_locked = any(re.search(r'\bASN\b', text) for text in cell_texts[1:-1])
+        label = cell_texts[columns['label']] if 'label' in columns and columns['label'] < len(cell_texts) else ''
+
+        sessions.append({
+            'row_index': i,
+            'created_date': created_date,
+            'created_date_text': created_date_text,
+            'ip_address': ip_match.group(0) if ip_match else None,
+            'asn_locked': asn_locked,
+            'label': label,
+            'label_known': 'label' in columns,
+            'cells': cell_texts,
+            'remove_button': remove_button
+        })
+    return sessions
+
+def mam_http_list_sessions(settings):
+    """List MAM sessions over HTTP"""
+    page = mam_http_fetch_security_page(settings)
+    if not page['success']:
+        return page
+    sessions = parse_mam_sessions(page['soup'])
+    return {'success': True, 'needs_browser': False, 'message': f'Found {len(sessions)} sessions', 'sessions': sessions, 'page': page}
+
+def mam_http_remove_session(settings, page, session):
+    """Remove a MAM session by submitting its Remove Session form
+
+    Success is only reported once a fresh session list no longer has the row; that
+    listing is returned as 'listing' so further removals use its page.
+    """
+    from urllib.parse import urljoin
+
+    button = session['remove_button']
+    form = button.find_parent('form') if button else None
+    if not form or not form.get('action'):
+        # Removal is wired up by page JavaScript (data-secact handler)
+        return {'success': False, 'needs_browser': True, 'message': 'Remove Session is handled by page JavaScript'}
+
+    data = _collect_form_fields(form)
+    if button.get('name'):
+        data[button['name']] = button.get('value', '')
+
+    response = get_mam_session().post(urljoin(page['url'], form['action']), data=data, timeout=15)
+    if response.status_code != 200:
+        return {'success': False, 'needs_browser': False, 'message': f'Remove Session returned HTTP {response.status_code}'}
+
+    listing = mam_http_list_sessions(settings)
+    if not listing['success']:
+        return {'success': False, 'needs_browser': False, 'message': f"Could not verify session removal: {listing['message']}"}
+    if any(_session_key(row) == _session_key(session) for row in listing['sessions']):
+        # The form post had no effect - removing again in the browser is safe
+        return {'success': False, 'needs_browser': True, 'message': f"Session from {session['created_date_text']} still listed after HTTP removal"}
+    return {'success': True, 'needs_browser': False, 'message': f"Removed session from {session['created_date_text']}", 'listing': listing}
+
+def mam_http_create_session(settings, ip_address, use_asn, allow_dynamic_seedbox, label):
+    """Submit the MAM Create session form over HTTP and return the new mam_id"""
+    from urllib.parse import urljoin
+
+    page = mam_http_fetch_security_page(settings)
+    if not page['success']:
+        return page
+
+    soup = page['soup']
+    ip_field = soup.find('input', id='iip')
+    form = ip_field.find_parent('form') if ip_field else None
+    if not form:
+        return {'success': False, 'needs_browser': True, 'message': 'Create session form not found in page HTML'}
+
+    data = _collect_form_fields(form)
+    data[ip_field.get('name', 'iip')] = ip_address
+    data['asn'] = 'yes' if use_asn else 'no'
+    data['dynSeed'] = 'yes' if allow_dynamic_seedbox else 'no'
+    label_field = form.find('input', id='sLabel')
+    data[label_field.get('name', 'sLabel') if label_field else 'sLabel'] = label
+    submit_button = form.find('input', attrs={'type': 'submit', 'value': 'Submit changes!'})
+    if submit_button and submit_button.get('name'):
+        data[submit_button['name']] = submit_button.get('value', '')
+
+    action_url = urljoin(page['url'], form.get('action') or page['url'])
+    existing = {_session_key(session) for session in parse_mam_sessions(soup)}
+    log_debug(f"HTTP engine: submitting Create session form to {action_url}")
+    # Once the form is posted MAM may have created the session, so nothing after this
+    # point falls back to the browser (that would create a second session)
+    try:
+        response = get_mam_session().post(action_url, data=data, timeout=20)
+    except requests.exceptions.RequestException as e:
+        return mam_http_create_failed(settings, label, existing, f'Create session request failed: {e}')
+
+    result_soup = BeautifulSoup(response.text, 'html.parser')
+    cookie_textarea = result_soup.find('textarea', attrs={'cols': '100', 'rows': '10'})
+    cookie_value = cookie_textarea.get_text(strip=True) if cookie_textarea else ''
+    if not cookie_value or len(cookie_value) < 50:
+        return mam_http_create_failed(settings, label, existing, f'Cookie textarea not found in HTTP response (HTTP {response.status_code})')
+
+    return {'success': True, 'needs_browser': False, 'message': 'Session created via HTTP', 'cookie': cookie_value}
+
+def mam_http_create_failed(settings, label, existing, message):
+    """Failure of a posted Create session form, cleaning up a session MAM created anyway
+
+    existing holds the _session_key of every session listed before the form was posted.
+    MAM only shows a session's cookie once, so a session created without its cookie
+    being read is useless and is removed straight away rather than left behind.
+    """
+    try:
+        listing = mam_http_list_sessions(settings)
+        new_sessions = [session for session in listing.get('sessions', [])
+                        if session['label'] == label and _session_key(session) not in existing]
+        for session in new_sessions:
+            removal = mam_http_remove_session(settings, listing['page'], session)
+            if not removal['success']:
+                message += f" - MAM created session '{label}' but its cookie could not be read and removing it failed ({removal['message']})"
+                return {'success': False, 'needs_browser': False, 'message': message}
+            listing = removal['listing']
+        if new_sessions:
+            message += " - removed the session MAM created without a readable cookie"
+        elif not listing['success']:
+            message += f" - could not check whether MAM created the session ({listing['message']})"
+    except requests.exceptions.RequestException as e:
+        message += f" - could not check whether MAM created the session ({e})"
+    return {'success': False, 'needs_browser': False, 'message': message}
+
 @app.route('/')
 def index():
     return redirect(url_for('basic'))
@@ -426,32 +917,20 @@ def api_get_settings():
 
 @app.route('/api/settings', methods=['POST'])
 def api_save_settings():
-    # Load existing settings first to preserve fields not in the form
-    existing_settings = load_settings()
-    
-    # Merge new data into existing settings (new data takes precedence)
     data = request.json
-    existing_settings.update(data)
-    
-    # Save the merged settings
-    save_settings(existing_settings)
+    with settings_lock:
+        # Load existing settings first to preserve fields not in the form
+        existing_settings = load_settings()
+        
+        # Merge new data into existing settings (new data takes precedence)
+        existing_settings.update(data)
+        
+        # Save the merged settings
+        save_settings(existing_settings)
     return jsonify({'status': 'ok'})
 
-@app.route('/api/get_ips', methods=['GET'])
-def api_get_ips():
-    settings = load_settings()
-    debug_info = []
-    
-    # 1. Get external IP
-    try:
-        ext_ip = requests.get('https://api.ipify.org', timeout=10).text.strip()
-        debug_info.append(f"External IP: {ext_ip}")
-    except Exception as e:
-        print(f"Error getting external IP: {e}")
-        ext_ip = "Error"
-        debug_info.append(f"External IP Error: {e}")
-    
-    # 2. Get VPN IP - Enhanced debugging
+def detect_vpn_ip(settings, debug_info):
+    """Detect the qBittorrent VPN IP from the mounted qBittorrent log (API fallback if no log)"""
     vpn_ip = "Not Found"
     debug_info.append("=== VPN IP Detection Debug ===")
     
@@ -547,17 +1026,125 @@ def api_get_ips():
                     debug_info.append(f"API returned: {vpn_ip}")
         except Exception as e:
             debug_info.append(f"API fallback error: {e}")
+
+    return vpn_ip
+
+# VPN readiness gate
+#
+# binhex-qbittorrentvpn logs "Detected external IP" once the tunnel is up. After a
+# restart we only trust entries appended past the log size recorded at restart time.
+
+VPN_DETECTED_IP_PATTERN = re.compile(r'Detected external IP\. IP:\s*"?([0-9]{1,3}(?:\.[0-9]{1,3}){3})"?')
+
+def get_vpn_log_size(settings):
+    """Current size of the qBittorrent log, used as the 'fresh entries start here' marker"""
+    logpath = settings.get('qbittorrentvpn_logpath', '/app/shared/qbittorrent-logs/qbittorrent.log')
+    try:
+        return os.path.getsize(logpath)
+    except OSError:
+        return 0
+
+def _read_fresh_vpn_ip(logpath, log_offset):
+    """Most recent 'Detected external IP' written after log_offset (the whole file if it was rotated)"""
+    try:
+        if os.path.getsize(logpath) < log_offset:
+            log_offset = 0  # Log was truncated or rotated by the restart
+        with open(logpath, 'r', encoding='utf-8', errors='ignore') as f:
+            f.seek(log_offset)
+            fresh_lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(fresh_lines):
+        m = VPN_DETECTED_IP_PATTERN.search(line)
+        if m:
+            return m.group(1)
+    return None
+
+def probe_vpn_ip_in_container(container_name):
+    """Ask the container itself for its public IP (goes through the VPN tunnel)"""
+    try:
+        result = docker_exec(container_name, ['curl', '-s', '--max-time', '5', 'https://api.ipify.org'], timeout=15)
+    except DockerAPIError as e:
+        log_debug(f"In-container IP probe failed: {e}")
+        return None
+    ip = result['stdout'].strip()
+    return ip if result['exit_code'] == 0 and re.fullmatch(r'[0-9]{1,3}(?:\.[0-9]{1,3}){3}', ip) else None
+
+def wait_for_vpn_ip(settings, log_offset, debug_info):
+    """Wait until a post-restart VPN IP appears in the qBittorrent log
+
+    Returns as soon as a fresh "Detected external IP" entry exists (optionally confirmed by
+    an in-container probe when vpn_ready_probe is set) and fails once vpn_ready_timeout
+    seconds pass without one.
+    """
+    logpath = settings.get('qbittorrentvpn_logpath', '/app/shared/qbittorrent-logs/qbittorrent.log')
+    container_name = settings.get('qbittorrentvpn_container', 'binhex-qbittorrentvpn')
+    max_wait = int(settings.get('vpn_ready_timeout', 120))
+    use_probe = settings.get('vpn_ready_probe', False)
+    start_time = time.time()
+
+    if not os.path.exists(logpath):
+        debug_info.append(f"VPN gate: log {logpath} not found - cannot watch for VPN IP")
+        return {'ready': False, 'vpn_ip': None, 'elapsed': 0, 'message': f'qBittorrent log not found at {logpath}'}
+
+    debug_info.append(f"VPN gate: watching {logpath} from offset {log_offset} for up to {max_wait}s")
+    while time.time() - start_time < max_wait:
+        vpn_ip = _read_fresh_vpn_ip(logpath, log_offset)
+        if vpn_ip:
+            if not use_probe:
+                elapsed = time.time() - start_time
+                return {'ready': True, 'vpn_ip': vpn_ip, 'elapsed': elapsed, 'message': f'VPN up with IP {vpn_ip} after {elapsed:.1f}s'}
+            probed_ip = probe_vpn_ip_in_container(container_name)
+            if probed_ip == vpn_ip:
+                elapsed = time.time() - start_time
+                return {'ready': True, 'vpn_ip': vpn_ip, 'elapsed': elapsed, 'message': f'VPN up with IP {vpn_ip} after {elapsed:.1f}s (confirmed in container)'}
+            debug_info.append(f"VPN gate: log IP {vpn_ip} not confirmed by container probe ({probed_ip})")
+        time.sleep(1)
+
+    return {'ready': False, 'vpn_ip': None, 'elapsed': time.time() - start_time,
+            'message': f'No fresh VPN IP in qBittorrent log within {max_wait} seconds'}
+
+def get_external_ip(debug_info):
+    """This host's public IP (what Prowlarr's session is locked to), or 'Error'"""
+    try:
+        ext_ip = requests.get('https://api.ipify.org', timeout=10).text.strip()
+        debug_info.append(f"External IP: {ext_ip}")
+    except Exception as e:
+        print(f"Error getting external IP: {e}")
+        ext_ip = "Error"
+        debug_info.append(f"External IP Error: {e}")
+    return ext_ip
+
+@app.route('/api/get_ips', methods=['GET'])
+def api_get_ips():
+    settings = load_settings()
+    debug_info = []
+    
+    # 1. Get external IP
+    ext_ip = get_external_ip(debug_info)
+    
+    # 2. Get VPN IP - Enhanced debugging
+    vpn_ip = detect_vpn_ip(settings, debug_info)
     
     # Print debug info to container logs
     print("\n".join(debug_info))
     
-    return jsonify({
+    response = {
         'external_ip': ext_ip, 
         'vpn_ip': vpn_ip,
         'debug_info': debug_info[-10:]  # Include last 10 debug messages in response
-    })
+    }
+    # Every additional qBittorrent target has its own log and VPN exit IP
+    targets = get_qbittorrent_targets(settings)
+    if len(targets) > 1:
+        response['targets'] = [
+            {'name': t['name'], 'vpn_ip': vpn_ip if t['primary'] else detect_vpn_ip(target_settings(settings, t), [])}
+            for t in targets
+        ]
+    return jsonify(response)
 
 @app.route('/api/login_mam', methods=['POST'])
+@uses_global_driver
 def api_login_mam():
     """Login to MyAnonamouse using global Selenium driver"""
     log_info("MAM login attempt started")
@@ -633,6 +1220,7 @@ def api_login_mam():
         })
 
 @app.route('/api/view_mam_page', methods=['GET'])
+@uses_global_driver
 def api_view_mam_page():
     """Return current state of global Selenium driver (for popup window)"""
     settings = load_settings()
@@ -687,6 +1275,7 @@ def api_view_mam_page():
         })
 
 @app.route('/api/view_sessions', methods=['POST'])
+@uses_global_driver
 def api_view_sessions():
     """Navigate global browser to MAM security/sessions page"""
     log_info("View Sessions request started")
@@ -773,15 +1362,275 @@ def api_view_sessions():
             'debug_info': debug_info
         })
 
+CONFIRMATION_MODAL_SELECTORS = [
+    ".modal", "[role=dialog]", ".dialog", ".popup",
+    "#confirm-dialog", ".confirm-popup", ".swal2-container"
+]
+
+# Finds the first visible modal with an OK/Confirm/Yes button and clicks it
+MODAL_CONFIRM_SCRIPT = """
+var selectors = arguments[0];
+var keywords = ['OK', 'CONFIRM', 'YES'];
+for (var i = 0; i < selectors.length; i++) {
+    var modals = document.querySelectorAll(selectors[i]);
+    for (var j = 0; j < modals.length; j++) {
+        var modal = modals[j];
+        if (!(modal.offsetWidth || modal.offsetHeight || modal.getClientRects().length)) { continue; }
+        var buttons = modal.querySelectorAll("button, input[type='button'], input[type='submit']");
+        for (var k = 0; k < buttons.length; k++) {
+            var text = (buttons[k].innerText || '').toUpperCase();
+            var value = (buttons[k].value || '').toUpperCase();
+            for (var m = 0; m < keywords.length; m++) {
+                if (text.indexOf(keywords[m]) !== -1 || value.indexOf(keywords[m]) !== -1) {
+                    buttons[k].click();
+                    return {selector: selectors[i], text: buttons[k].innerText || buttons[k].value || ''};
+                }
+            }
+        }
+    }
+}
+return null;
+"""
+
+def handle_confirmation(driver, timeout=2.5):
+    """Accept a browser alert, or click OK in a modal dialog if no alert appears
+
+    Returns a dict with 'handled', 'path' ('alert', 'modal' or None), 'text' and 'elapsed' seconds.
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+
+    start_time = time.time()
+
+    try:
+        alert = WebDriverWait(driver, timeout).until(EC.alert_is_present())
+        alert_text = alert.text
+        alert.accept()
+        return {'handled': True, 'path': 'alert', 'text': alert_text, 'elapsed': time.time() - start_time}
+    except TimeoutException:
+        pass
+
+    # No alert - resolve a modal OK button with a single in-page probe
+    try:
+        clicked = driver.execute_script(MODAL_CONFIRM_SCRIPT, CONFIRMATION_MODAL_SELECTORS)
+    except Exception as e:
+        log_debug(f"Modal confirmation probe failed: {e}")
+        clicked = None
+
+    if clicked:
+        return {'handled': True, 'path': 'modal', 'text': f"{clicked['text']} ({clicked['selector']})", 'elapsed': time.time() - start_time}
+    return {'handled': False, 'path': None, 'text': '', 'elapsed': time.time() - start_time}
+
+# Collects every session row with its created date and whether it has a Remove button
+SESSION_INVENTORY_SCRIPT = """
+var table = document.querySelector('table.sessions');
+if (!table) { return null; }
+var rows = table.querySelectorAll('tr');
+var sessions = [];
+for (var i = 1; i < rows.length; i++) {
+    var cells = rows[i].querySelectorAll('td');
+    if (cells.length < 6) { continue; }
+    var button = cells[cells.length - 1].querySelector(
+        'input[data-secact="rs"], input[value="Remove Session"], *[data-secact="rs"]');
+    sessions.push({row: i, created: cells[0].textContent.trim(), removable: button !== null});
+}
+return sessions;
+"""
+
+# Auto-accepts confirmations, tracks in-flight XHR/fetch requests and clicks
+# the Remove button of every requested row in a single round trip
+BULK_REMOVE_SESSIONS_SCRIPT = """
+var rowIndexes = arguments[0];
+window.confirm = function() { return true; };
+window.alert = function() {};
+if (window.__mamPending === undefined) {
+    window.__mamPending = 0;
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        window.__mamPending++;
+        this.addEventListener('loadend', function() { window.__mamPending--; });
+        return originalSend.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function() {
+            window.__mamPending++;
+            return originalFetch.apply(this, arguments).finally(function() { window.__mamPending--; });
+        };
+    }
+}
+var rows = document.querySelector('table.sessions').querySelectorAll('tr');
+var clicked = 0;
+for (var i = 0; i < rowIndexes.length; i++) {
+    var cells = rows[rowIndexes[i]].querySelectorAll('td');
+    var button = cells[cells.length - 1].querySelector(
+        'input[data-secact="rs"], input[value="Remove Session"], *[data-secact="rs"]');
+    if (button) {
+        button.click();
+        clicked++;
+    }
+}
+return clicked;
+"""
+
+def count_mam_sessions(driver):
+    """Count session rows in the sessions table of the currently loaded security page"""
+    from selenium.webdriver.common.by import By
+
+    table = driver.find_element(By.CLASS_NAME, "sessions")
+    return len(table.find_elements(By.TAG_NAME, "tr")) - 1  # Subtract header
+
+def remove_session_rows(driver, row_indexes, debug_info):
+    """Click the Remove button of the given table rows in one script execution and wait for the requests"""
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    clicked = driver.execute_script(BULK_REMOVE_SESSIONS_SCRIPT, row_indexes)
+    debug_info.append(f"Bulk: Clicked {clicked} Remove Session buttons in one script execution")
+
+    # Wait for the page's own removal requests to finish before verifying
+    try:
+        WebDriverWait(driver, 20, poll_frequency=0.5).until(
+            lambda d: d.execute_script("return window.__mamPending === 0;")
+        )
+        debug_info.append("Bulk: All removal requests completed")
+    except TimeoutException:
+        debug_info.append("Bulk: Timed out waiting for removal requests - verifying anyway")
+    return clicked
+
+def delete_old_sessions_bulk(driver, security_page_url, debug_info):
+    """Remove every old MAM session except the newest from a single loaded security page"""
+    start_time = time.time()
+    debug_info.append("Bulk: Loading security page")
+    driver.get(security_page_url)
+    time.sleep(3)
+
+    sessions = driver.execute_script(SESSION_INVENTORY_SCRIPT)
+    if sessions is None:
+        debug_info.append("Bulk: Sessions table not found")
+        return {'success': True, 'deleted_count': 0, 'remaining': 0, 'elapsed': time.time() - start_time}
+
+    parsed_sessions = []
+    for session in sessions:
+        try:
+            session['created_date'] = datetime.strptime(session['created'], "%Y-%m-%d %H:%M:%S")
+            parsed_sessions.append(session)
+        except ValueError as e:
+            debug_info.append(f"Bulk: Could not parse date '{session['created']}': {e}")
+
+    initial_session_count = len(sessions)
+    debug_info.append(f"Bulk: Found {initial_session_count} sessions ({len(parsed_sessions)} with valid dates)")
+
+    if len(parsed_sessions) <= 1:
+        debug_info.append("Bulk: Only one valid session found - nothing to remove")
+        return {'success': True, 'deleted_count': 0, 'remaining': initial_session_count, 'elapsed': time.time() - start_time}
+
+    parsed_sessions.sort(key=lambda x: x['created_date'])
+    newest_session = parsed_sessions[-1]
+    to_remove = [s for s in parsed_sessions[:-1] if s['removable']]
+    debug_info.append(f"Bulk: Keeping newest session {newest_session['created']}, removing {len(to_remove)} sessions")
+    log_info(f"Bulk removing {len(to_remove)} old MAM sessions (keeping {newest_session['created']})")
+
+    if not to_remove:
+        return {'success': True, 'deleted_count': 0, 'remaining': initial_session_count, 'elapsed': time.time() - start_time}
+
+    remove_session_rows(driver, [s['row'] for s in to_remove], debug_info)
+
+    # Verify once with a single reload
+    driver.get(security_page_url)
+    time.sleep(2)
+    final_session_count = count_mam_sessions(driver)
+    deleted_count = max(initial_session_count - final_session_count, 0)
+    expected_remaining = initial_session_count - len(to_remove)
+    elapsed = time.time() - start_time
+
+    debug_info.append(f"Bulk: Session count {initial_session_count} -> {final_session_count} in {elapsed:.1f}s")
+    log_info(f"Bulk removal: session count {initial_session_count} -> {final_session_count} in {elapsed:.1f}s")
+
+    return {
+        'success': final_session_count <= expected_remaining,
+        'deleted_count': deleted_count,
+        'remaining': final_session_count,
+        'elapsed': elapsed
+    }
+
+def delete_old_sessions_http(settings, debug_info):
+    """Remove every old MAM session except the newest using the HTTP engine"""
+    listing = mam_http_list_sessions(settings)
+    if not listing['success']:
+        return {'success': False, 'needs_browser': listing.get('needs_browser', False), 'message': listing['message'], 'deleted_count': 0}
+
+    sessions = listing['sessions']
+    debug_info.append(f"HTTP: Found {len(sessions)} sessions")
+    if len(sessions) <= 1:
+        return {'success': True, 'needs_browser': False, 'message': 'Only one session found', 'deleted_count': 0}
+
+    sessions.sort(key=lambda x: x['created_date'])
+    deleted_count = 0
+    page = listing['page']
+    for session in sessions[:-1]:  # All except newest
+        if not session['remove_button']:
+            continue
+        result = mam_http_remove_session(settings, page, session)
+        if not result['success']:
+            debug_info.append(f"HTTP: {result['message']}")
+            return {'success': False, 'needs_browser': result['needs_browser'], 'message': result['message'], 'deleted_count': deleted_count}
+        deleted_count += 1
+        page = result['listing']['page']
+        debug_info.append(f"HTTP: {result['message']}")
+
+    # Verify once
+    verify = mam_http_list_sessions(settings)
+    if verify['success'] and len(verify['sessions']) > len(sessions) - deleted_count:
+        return {'success': False, 'needs_browser': True, 'message': 'Sessions still present after HTTP removal', 'deleted_count': deleted_count}
+
+    return {'success': True, 'needs_browser': False, 'message': f'Removed {deleted_count} sessions via HTTP', 'deleted_count': deleted_count}
+
 @app.route('/api/delete_old_sessions', methods=['POST'])
 def api_delete_old_sessions():
+    """Delete all old MAM sessions except the newest one (queued as a background job)"""
+    return start_job('Delete Old Sessions', _delete_old_sessions_internal)
+
+@uses_global_driver
+def _delete_old_sessions_internal():
     """Delete all old MAM sessions except the newest one"""
     log_info("Delete Old Sessions request started")
     settings = load_settings()
     security_page_url = settings.get('security_page', 'https://www.myanonamouse.net/preferences/index.php?view=security')
     log_debug(f"Security page URL: {security_page_url}")
     debug_info = []
-    
+
+    # Try the HTTP engine first; only start the browser when the page needs JavaScript
+    if mam_engine_enabled(settings):
+        start_time = time.time()
+        try:
+            http_result = delete_old_sessions_http(settings, debug_info)
+            if http_result['success']:
+                elapsed = time.time() - start_time
+                final_message = f"Successfully removed {http_result['deleted_count']} old sessions"
+                log_info(f"Delete Old Sessions completed (HTTP engine): {final_message} in {elapsed:.1f}s")
+                return jsonify({
+                    'success': True,
+                    'message': final_message,
+                    'deleted_count': http_result['deleted_count'],
+                    'iterations': 1,
+                    'mode': 'http',
+                    'elapsed_seconds': round(elapsed, 2),
+                    'debug_info': debug_info
+                })
+            if not http_result['needs_browser']:
+                return jsonify({
+                    'success': False,
+                    'message': f"Delete sessions error: {http_result['message']}",
+                    'debug_info': debug_info
+                })
+            debug_info.append(f"HTTP engine needs browser ({http_result['message']}) - falling back to Selenium")
+            log_info(f"HTTP engine fallback to Selenium: {http_result['message']}")
+        except requests.exceptions.RequestException as e:
+            debug_info.append(f"HTTP engine request error: {e} - falling back to Selenium")
+            log_warning(f"HTTP engine request error, falling back to Selenium: {e}")
+
     try:
         driver = get_or_create_global_driver()
         if not driver:
@@ -807,13 +1656,47 @@ def api_delete_old_sessions():
         
         from selenium.webdriver.common.by import By
         from selenium.common.exceptions import NoSuchElementException
-        
+
         deleted_count = 0
         total_iterations = 0
         max_iterations = 20  # Safety limit
-        
-        while total_iterations < max_iterations:
-            # Navigate to security page
+        start_time = time.time()
+
+        # Bulk mode removes everything in one page visit; the iterative loop below
+        # only runs if bulk mode is disabled or left sessions behind
+        request_data = request.get_json(silent=True) if has_request_context() else None
+        delete_mode = (request_data or {}).get('delete_mode') or settings.get('delete_sessions_mode', 'bulk')
+        debug_info.append(f"Delete mode: {delete_mode}")
+
+        if delete_mode == 'bulk':
+            report_job_progress('Removing old sessions (bulk)')
+            try:
+                bulk_result = delete_old_sessions_bulk(driver, security_page_url, debug_info)
+                deleted_count = bulk_result['deleted_count']
+
+                if bulk_result['success']:
+                    elapsed = time.time() - start_time
+                    final_message = f'Successfully removed {deleted_count} old sessions'
+                    log_info(f"Delete Old Sessions completed (bulk): {final_message} in {elapsed:.1f}s")
+
+                    return jsonify({
+                        'success': True,
+                        'message': final_message,
+                        'deleted_count': deleted_count,
+                        'iterations': 1,
+                        'mode': 'bulk',
+                        'elapsed_seconds': round(elapsed, 2),
+                        'debug_info': debug_info
+                    })
+
+                debug_info.append(f"Bulk removal left {bulk_result['remaining']} sessions - falling back to iterative removal")
+                log_warning(f"Bulk session removal incomplete ({bulk_result['remaining']} sessions remain), falling back to iterative removal")
+            except Exception as e:
+                debug_info.append(f"Bulk removal error: {e} - falling back to iterative removal")
+                log_warning(f"Bulk session removal error, falling back to iterative removal: {e}")
+
+        while total_iterations < max_iterations:
+            # Navigate to security page
             debug_info.append(f"Iteration {total_iterations + 1}: Loading security page")
             driver.get(security_page_url)
             time.sleep(3)
@@ -825,6 +1708,7 @@ def api_delete_old_sessions():
                 initial_session_count = len(initial_rows) - 1  # Subtract header
                 debug_info.append(f"Iteration {total_iterations + 1}: Found {initial_session_count} sessions at start")
                 log_debug(f"Iteration {total_iterations + 1}: Starting with {initial_session_count} sessions")
+                report_job_progress(f"Iteration {total_iterations + 1}: {initial_session_count} sessions, {deleted_count} removed so far", total_iterations, max_iterations)
             except Exception as e:
                 debug_info.append(f"Could not count initial sessions: {e}")
                 initial_session_count = 0
@@ -965,82 +1849,17 @@ def api_delete_old_sessions():
                                 log_info(f"All click methods failed for session {session['created_date_text']}")
                                 continue
                             
-                            # Wait and check for different types of popups/dialogs
-                            confirmation_handled = False
-                            max_wait_attempts = 5
-                            
-                            for wait_attempt in range(max_wait_attempts):
-                                time.sleep(0.5)
-                                
-                                # Method 1: Check for browser alert
-                                try:
-                                    alert = driver.switch_to.alert
-                                    alert_text = alert.text
-                                    debug_info.append(f"Browser alert detected on attempt {wait_attempt + 1}: '{alert_text}'")
-                                    log_info(f"Browser alert for session removal: '{alert_text}'")
-                                    
-                                    # Click "OK" to confirm removal
-                                    alert.accept()
-                                    debug_info.append("Clicked OK on browser alert")
-                                    log_info("Confirmed session removal by clicking OK on alert")
-                                    confirmation_handled = True
-                                    time.sleep(3)
-                                    break
-                                except:
-                                    pass  # No browser alert
-                                
-                                # Method 2: Check for modal dialogs or confirmation elements
-                                try:
-                                    # Look for common modal/dialog selectors
-                                    modal_selectors = [
-                                        ".modal", "[role=dialog]", ".dialog", ".popup", 
-                                        "#confirm-dialog", ".confirm-popup", ".swal2-container"
-                                    ]
-                                    
-                                    for selector in modal_selectors:
-                                        modals = driver.find_elements(By.CSS_SELECTOR, selector)
-                                        for modal in modals:
-                                            if modal.is_displayed():
-                                                debug_info.append(f"Modal dialog detected with selector '{selector}': {modal.get_attribute('outerHTML')[:150]}...")
-                                                
-                                                # Look for OK/Confirm button in modal
-                                                ok_buttons = modal.find_elements(By.CSS_SELECTOR, 
-                                                    "button, input[type='button'], input[type='submit']")
-                                                
-                                                # Filter buttons by text content
-                                                confirm_buttons = []
-                                                for btn in ok_buttons:
-                                                    btn_text = btn.text.upper() if btn.text else ''
-                                                    btn_value = (btn.get_attribute('value') or '').upper()
-                                                    if any(keyword in btn_text or keyword in btn_value for keyword in ['OK', 'CONFIRM', 'YES']):
-                                                        confirm_buttons.append(btn)
-                                                
-                                                ok_buttons = confirm_buttons
-                                                
-                                                if ok_buttons:
-                                                    ok_buttons[0].click()
-                                                    debug_info.append("Clicked OK button in modal dialog")
-                                                    confirmation_handled = True
-                                                    time.sleep(3)
-                                                    break
-                                        
-                                        if confirmation_handled:
-                                            break
-                                            
-                                except Exception as modal_error:
-                                    debug_info.append(f"Modal check error: {modal_error}")
-                                
-                                if confirmation_handled:
-                                    break
-                                    
-                                # Check if page changed (might indicate successful click without popup)
-                                current_page_url = driver.current_url
-                                debug_info.append(f"Attempt {wait_attempt + 1}: Current URL: {current_page_url}")
-                                
-                                if wait_attempt == max_wait_attempts - 1:
-                                    debug_info.append(f"No confirmation dialog found after {max_wait_attempts} attempts")
-                                    log_info(f"No confirmation dialog appeared after {max_wait_attempts} attempts")
-                            
+                            # Wait for the confirmation alert or modal dialog
+                            confirmation = handle_confirmation(driver)
+                            confirmation_handled = confirmation['handled']
+                            if confirmation_handled:
+                                debug_info.append(f"Confirmation handled via {confirmation['path']} in {confirmation['elapsed']:.2f}s: '{confirmation['text']}'")
+                                log_info(f"Confirmed session removal via {confirmation['path']} ({confirmation['elapsed']:.2f}s)")
+                                time.sleep(3)
+                            else:
+                                debug_info.append(f"No confirmation dialog found after {confirmation['elapsed']:.2f}s")
+                                log_info("No confirmation dialog appeared for session removal")
+
                             # Check if URL changed or page reloaded
                             post_click_url = driver.current_url
                             debug_info.append(f"Post-click URL: {post_click_url}")
@@ -1122,14 +1941,17 @@ def api_delete_old_sessions():
         if total_iterations >= max_iterations:
             debug_info.append(f"Reached maximum iterations ({max_iterations})")
         
+        elapsed = time.time() - start_time
         final_message = f'Successfully removed {deleted_count} old sessions'
-        log_info(f"Delete Old Sessions completed: {final_message} in {total_iterations} iterations")
-        
+        log_info(f"Delete Old Sessions completed: {final_message} in {total_iterations} iterations ({elapsed:.1f}s)")
+
         return jsonify({
             'success': True,
             'message': final_message,
             'deleted_count': deleted_count,
             'iterations': total_iterations,
+            'mode': 'iterative',
+            'elapsed_seconds': round(elapsed, 2),
             'debug_info': debug_info
         })
             
@@ -1147,12 +1969,265 @@ def api_delete_old_sessions():
             'debug_info': debug_info
         })
 
+# Reads the mam_id shown in the cookie textarea after a session is created
+COOKIE_TEXTAREA_SCRIPT = """
+var textarea = document.querySelector("textarea[cols='100'][rows='10']");
+return textarea ? textarea.value : null;
+"""
+
+# Fills, validates and submits the Create session form in one round trip. The submit
+# click is deferred so the confirmation alert cannot block the script's return.
+CREATE_SESSION_FORM_SCRIPT = """
+var ip = arguments[0], useAsn = arguments[1], dynSeed = arguments[2], label = arguments[3];
+var createRow = null;
+var cells = document.querySelectorAll('td.row2');
+for (var i = 0; i < cells.length; i++) {
+    if (cells[i].textContent.trim() === 'Create session') { createRow = cells[i]; break; }
+}
+if (!createRow) { return {ok: false, error: 'Create session form not found'}; }
+var form = createRow.closest('table');
+var ipField = form.querySelector('#iip');
+var asnRadio = form.querySelector("input[name='asn'][value='" + (useAsn ? 'yes' : 'no') + "']");
+var dynRadio = form.querySelector("input[name='dynSeed'][value='" + (dynSeed ? 'yes' : 'no') + "']");
+var labelField = form.querySelector('#sLabel');
+var submitButton = form.querySelector("input[type='submit'][value='Submit changes!']");
+if (!ipField) { return {ok: false, error: 'IP input field not found'}; }
+if (!asnRadio) { return {ok: false, error: 'ASN/IP radio buttons not found'}; }
+if (!dynRadio) { return {ok: false, error: 'Dynamic Seedbox radio buttons not found'}; }
+if (!labelField) { return {ok: false, error: 'Label field not found'}; }
+if (!submitButton) { return {ok: false, error: 'Submit button not found'}; }
+ipField.value = ip;
+ipField.dispatchEvent(new Event('input', {bubbles: true}));
+ipField.dispatchEvent(new Event('change', {bubbles: true}));
+asnRadio.click();
+dynRadio.click();
+labelField.value = label;
+labelField.dispatchEvent(new Event('input', {bubbles: true}));
+labelField.dispatchEvent(new Event('change', {bubbles: true}));
+if (ipField.value !== ip || labelField.value !== label || !asnRadio.checked || !dynRadio.checked) {
+    return {ok: false, error: 'Form validation failed after filling'};
+}
+var textarea = document.querySelector("textarea[cols='100'][rows='10']");
+var previousCookie = textarea ? textarea.value : '';
+setTimeout(function() { submitButton.click(); }, 0);
+return {ok: true, previous_cookie: previousCookie};
+"""
+
+def _fill_create_session_form_stepwise(driver, ip_address, use_asn, allow_dynamic_seedbox, label, debug_info):
+    """Fill and submit the Create session form one element at a time
+
+    Returns None once the form is submitted, or an error message.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import NoSuchElementException
+
+    # Find the "Create session" form at the bottom
+    debug_info.append("Looking for Create session form")
+    try:
+        # Find the row with "Create session" text
+        create_session_row = driver.find_element(By.XPATH, "//td[contains(@class, 'row2') and text()='Create session']")
+        debug_info.append("Found Create session row")
+        
+        # Get the form container (should be in same table)
+        form_table = create_session_row.find_element(By.XPATH, "./ancestor::table[1]")
+        debug_info.append("Found form table")
+        
+    except NoSuchElementException:
+        debug_info.append("Could not find Create session form")
+        return 'Create session form not found'
+    
+    # Fill in the IP address
+    try:
+        ip_field = form_table.find_element(By.ID, "iip")
+        ip_field.clear()
+        ip_field.send_keys(ip_address)
+        debug_info.append(f"Entered IP address: {ip_address}")
+    except NoSuchElementException:
+        debug_info.append("Could not find IP input field")
+        return 'IP input field not found'
+    
+    # Select ASN or IP radio button
+    try:
+        if use_asn:
+            # Select ASN radio button
+            asn_radio = form_table.find_element(By.CSS_SELECTOR, "input[name='asn'][value='yes']")
+            asn_radio.click()
+            debug_info.append("Selected ASN radio button")
+        else:
+            # Select IP radio button
+            ip_radio = form_table.find_element(By.CSS_SELECTOR, "input[name='asn'][value='no']")
+            ip_radio.click()
+            debug_info.append("Selected IP radio button")
+    except NoSuchElementException:
+        debug_info.append("Could not find ASN/IP radio buttons")
+        return 'ASN/IP radio buttons not found'
+    
+    # Select Dynamic Seedbox radio button
+    try:
+        if allow_dynamic_seedbox:
+            # Select Yes for dynamic seedbox
+            dyn_yes_radio = form_table.find_element(By.CSS_SELECTOR, "input[name='dynSeed'][value='yes']")
+            dyn_yes_radio.click()
+            debug_info.append("Selected Yes for Dynamic Seedbox")
+        else:
+            # Select No for dynamic seedbox
+            dyn_no_radio = form_table.find_element(By.CSS_SELECTOR, "input[name='dynSeed'][value='no']")
+            dyn_no_radio.click()
+            debug_info.append("Selected No for Dynamic Seedbox")
+    except NoSuchElementException:
+        debug_info.append("Could not find Dynamic Seedbox radio buttons")
+        return 'Dynamic Seedbox radio buttons not found'
+    
+    # Fill in the label
+    try:
+        label_field = form_table.find_element(By.ID, "sLabel")
+        label_field.clear()
+        label_field.send_keys(label)
+        debug_info.append(f"Entered label: {label}")
+    except NoSuchElementException:
+        debug_info.append("Could not find label field")
+        return 'Label field not found'
+    
+    # Click submit button
+    try:
+        submit_button = form_table.find_element(By.CSS_SELECTOR, "input[type='submit'][value='Submit changes!']")
+        submit_button.click()
+        debug_info.append("Clicked submit button")
+    except NoSuchElementException:
+        debug_info.append("Could not find submit button")
+        return 'Submit button not found'
+
+    return None
+
+def _read_new_session_cookie(driver, previous_cookie):
+    """Return the cookie textarea value once it holds a new mam_id, otherwise False"""
+    try:
+        cookie_value = driver.execute_script(COOKIE_TEXTAREA_SCRIPT)
+    except Exception:
+        return False
+    if cookie_value and len(cookie_value) >= 50 and cookie_value != previous_cookie:
+        return cookie_value
+    return False
+
+def submit_create_session_form(driver, settings, ip_address, use_asn, allow_dynamic_seedbox, label, debug_info):
+    """Fill and submit the Create session form on the loaded security page and return the new mam_id
+
+    The fast path fills, validates and submits the form with one script execution; the
+    step-by-step path is used when it is disabled or cannot find/validate the form.
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    submitted = False
+    previous_cookie = ''
+
+    if settings.get('mam_fast_form', True):
+        try:
+            fast_result = driver.execute_script(CREATE_SESSION_FORM_SCRIPT, ip_address, bool(use_asn), bool(allow_dynamic_seedbox), label)
+            if fast_result and fast_result.get('ok'):
+                submitted = True
+                previous_cookie = fast_result.get('previous_cookie') or ''
+                debug_info.append(f"Filled and submitted Create session form in one script (IP: {ip_address}, label: {label})")
+            else:
+                error = fast_result.get('error') if fast_result else 'no result'
+                debug_info.append(f"Fast form path failed ({error}) - using step-by-step form filling")
+                log_debug(f"Fast Create session form path failed: {error}")
+        except Exception as e:
+            debug_info.append(f"Fast form path error ({e}) - using step-by-step form filling")
+            log_debug(f"Fast Create session form path error: {e}")
+
+    if not submitted:
+        try:
+            previous_cookie = driver.execute_script(COOKIE_TEXTAREA_SCRIPT) or ''
+        except Exception:
+            previous_cookie = ''
+        error = _fill_create_session_form_stepwise(driver, ip_address, use_asn, allow_dynamic_seedbox, label, debug_info)
+        if error:
+            return {'success': False, 'message': error}
+
+    # Wait and handle confirmation dialog
+    confirmation = handle_confirmation(driver)
+    if confirmation['handled']:
+        debug_info.append(f"Confirmed session creation via {confirmation['path']} in {confirmation['elapsed']:.2f}s: '{confirmation['text']}'")
+        log_info(f"Confirmed session creation via {confirmation['path']} ({confirmation['elapsed']:.2f}s)")
+    else:
+        debug_info.append("WARNING: No confirmation dialog was handled")
+        log_info("WARNING: No confirmation dialog found for session creation")
+
+    # Wait for the result page to show the new cookie
+    try:
+        cookie_value = WebDriverWait(driver, 15, poll_frequency=0.5).until(
+            lambda d: _read_new_session_cookie(d, previous_cookie)
+        )
+    except TimeoutException:
+        debug_info.append("Cookie textarea with a new cookie did not appear")
+        return {'success': False, 'message': 'Cookie extraction failed - cookie textarea not found or empty'}
+
+    debug_info.append(f"Extracted cookie (length: {len(cookie_value)})")
+    return {'success': True, 'message': 'Session created', 'cookie': cookie_value}
+
+SESSION_SETTINGS_PREFIXES = {'qBittorrent': 'qbittorrent', 'Prowlarr': 'prowlarr'}
+
+def _session_spec_summary(ip_address, use_asn, allow_dynamic_seedbox, label):
+    """The parts of a session spec that decide whether an existing session can be reused"""
+    return {
+        'ip_address': ip_address,
+        'use_asn': bool(use_asn),
+        'allow_dynamic_seedbox': bool(allow_dynamic_seedbox),
+        'label': label
+    }
+
+def store_session_cookie(cookie_type, cookie_value, spec=None):
+    """Store a freshly created session cookie in settings with timestamp and the spec it was created with"""
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Additional qBittorrent targets carry their own settings prefix in the spec
+    prefix = (spec or {}).get('settings_prefix') or SESSION_SETTINGS_PREFIXES.get(cookie_type)
+    with settings_lock:
+        settings = load_settings()
+        if prefix:
+            settings[f'{prefix}_session_cookie'] = cookie_value
+            settings[f'{prefix}_cookie_obtained_time'] = current_time
+            if spec:
+                settings[f'{prefix}_session_spec'] = _session_spec_summary(
+                    spec['ip_address'], spec['use_asn'], spec['allow_dynamic_seedbox'], spec['label'])
+        save_settings(settings)
+    return current_time
+
+@uses_global_driver
 def create_session_cookie(cookie_type, ip_address, use_asn, allow_dynamic_seedbox, label):
     """Helper function to create a session cookie"""
     settings = load_settings()
     security_page_url = settings.get('security_page', 'https://www.myanonamouse.net/preferences/index.php?view=security')
     debug_info = []
-    
+
+    # Try the HTTP engine first - a few requests instead of a browser process
+    if mam_engine_enabled(settings):
+        try:
+            http_result = mam_http_create_session(settings, ip_address, use_asn, allow_dynamic_seedbox, label)
+            if http_result['success']:
+                cookie_value = http_result['cookie']
+                current_time = store_session_cookie(cookie_type, cookie_value, _session_spec_summary(ip_address, use_asn, allow_dynamic_seedbox, label))
+                debug_info.append(f"Created {cookie_type} session via HTTP engine (cookie length: {len(cookie_value)})")
+                debug_info.append(f"Saved {cookie_type} cookie and timestamp ({current_time}) to settings")
+                log_info(f"✓ Successfully created {cookie_type} session cookie (HTTP engine)")
+                return {
+                    'success': True,
+                    'message': f'Successfully created {cookie_type} session cookie',
+                    'cookie': cookie_value[:50] + '...' if len(cookie_value) > 50 else cookie_value,
+                    'engine': 'http',
+                    'debug_info': debug_info
+                }
+            if not http_result.get('needs_browser'):
+                debug_info.append(f"HTTP engine failed: {http_result['message']}")
+                return {'success': False, 'message': http_result['message'], 'debug_info': debug_info}
+            # Only reported before the form was posted, so the browser cannot create a second session
+            debug_info.append(f"HTTP engine needs browser ({http_result['message']}) - falling back to Selenium")
+            log_info(f"HTTP engine fallback to Selenium: {http_result['message']}")
+        except requests.exceptions.RequestException as e:
+            debug_info.append(f"HTTP engine request error: {e} - falling back to Selenium")
+            log_warning(f"HTTP engine request error, falling back to Selenium: {e}")
+
     try:
         driver = get_or_create_global_driver()
         if not driver:
@@ -1168,211 +2243,373 @@ def create_session_cookie(cookie_type, ip_address, use_asn, allow_dynamic_seedbo
             debug_info.append(f"Login failed: {str(e)}")
             return {'success': False, 'message': f'Login failed: {str(e)}', 'debug_info': debug_info}
         
-        from selenium.webdriver.common.by import By
-        from selenium.common.exceptions import NoSuchElementException
-        
         # Navigate to security page
         debug_info.append("Navigating to security page")
         driver.get(security_page_url)
         time.sleep(3)
+
+        result = submit_create_session_form(driver, settings, ip_address, use_asn, allow_dynamic_seedbox, label, debug_info)
+        if not result['success']:
+            return {'success': False, 'message': result['message'], 'debug_info': debug_info}
+        cookie_value = result['cookie']
+
+        # Store cookie in settings with timestamp
+        current_time = store_session_cookie(cookie_type, cookie_value, _session_spec_summary(ip_address, use_asn, allow_dynamic_seedbox, label))
+        debug_info.append(f"Saved {cookie_type} cookie and timestamp ({current_time}) to settings")
         
-        # Find the "Create session" form at the bottom
-        debug_info.append("Looking for Create session form")
-        try:
-            # Find the row with "Create session" text
-            create_session_row = driver.find_element(By.XPATH, "//td[contains(@class, 'row2') and text()='Create session']")
-            debug_info.append("Found Create session row")
-            
-            # Get the form container (should be in same table)
-            form_table = create_session_row.find_element(By.XPATH, "./ancestor::table[1]")
-            debug_info.append("Found form table")
-            
-        except NoSuchElementException:
-            debug_info.append("Could not find Create session form")
-            return {'success': False, 'message': 'Create session form not found', 'debug_info': debug_info}
+        # Refresh the page to show the new session
+        debug_info.append("Refreshing page to show new session")
+        driver.get(security_page_url)
+        time.sleep(2)
         
-        # Fill in the IP address
-        try:
-            ip_field = form_table.find_element(By.ID, "iip")
-            ip_field.clear()
-            ip_field.send_keys(ip_address)
-            debug_info.append(f"Entered IP address: {ip_address}")
-        except NoSuchElementException:
-            debug_info.append("Could not find IP input field")
-            return {'success': False, 'message': 'IP input field not found', 'debug_info': debug_info}
+        log_info(f"✓ Successfully created {cookie_type} session cookie")
         
-        # Select ASN or IP radio button
-        try:
-            if use_asn:
-                # Select ASN radio button
-                asn_radio = form_table.find_element(By.CSS_SELECTOR, "input[name='asn'][value='yes']")
-                asn_radio.click()
-                debug_info.append("Selected ASN radio button")
-            else:
-                # Select IP radio button
-                ip_radio = form_table.find_element(By.CSS_SELECTOR, "input[name='asn'][value='no']")
-                ip_radio.click()
-                debug_info.append("Selected IP radio button")
-        except NoSuchElementException:
-            debug_info.append("Could not find ASN/IP radio buttons")
-            return {'success': False, 'message': 'ASN/IP radio buttons not found', 'debug_info': debug_info}
+        return {
+            'success': True, 
+            'message': f'Successfully created {cookie_type} session cookie',
+            'cookie': cookie_value[:50] + '...' if len(cookie_value) > 50 else cookie_value,  # Truncated for display
+            'debug_info': debug_info
+        }
         
-        # Select Dynamic Seedbox radio button
-        try:
-            if allow_dynamic_seedbox:
-                # Select Yes for dynamic seedbox
-                dyn_yes_radio = form_table.find_element(By.CSS_SELECTOR, "input[name='dynSeed'][value='yes']")
-                dyn_yes_radio.click()
-                debug_info.append("Selected Yes for Dynamic Seedbox")
+    except ImportError:
+        return {'success': False, 'message': 'Selenium not available.', 'debug_info': debug_info}
+    except Exception as e:
+        debug_info.append(f"Error: {str(e)}")
+        return {'success': False, 'message': f'Session creation error: {str(e)}', 'debug_info': debug_info}
+
+def qbittorrent_session_spec(vpn_ip, target=None):
+    """Session spec for qBittorrent: VPN IP, ASN-locked, dynamic seedbox allowed"""
+    spec = {
+        'cookie_type': 'qBittorrent',
+        'ip_address': vpn_ip,
+        'use_asn': True,  # Select ASN radio button
+        'allow_dynamic_seedbox': True,  # Select Yes for dynamic seedbox
+        'label': 'qBittorrent'
+    }
+    if target and not target['primary']:
+        spec['label'] = target['label']
+        spec['settings_prefix'] = target['settings_prefix']
+    return spec
+
+def prowlarr_session_spec(ext_ip):
+    """Session spec for Prowlarr: external IP, IP-locked, no dynamic seedbox"""
+    return {
+        'cookie_type': 'Prowlarr',
+        'ip_address': ext_ip,
+        'use_asn': False,  # Select IP radio button
+        'allow_dynamic_seedbox': False,  # Select No for dynamic seedbox
+        'label': 'Prowlarr'
+    }
+
+# Checks whether the Create session form is present on the loaded page
+CREATE_SESSION_FORM_PRESENT_SCRIPT = """
+return document.querySelector('#iip') !== null && document.querySelector('#sLabel') !== null;
+"""
+
+@uses_global_driver
+def create_session_cookies_batch(specs):
+    """Create several MAM sessions in one security page visit
+
+    Each spec is a dict with cookie_type, ip_address, use_asn, allow_dynamic_seedbox and label.
+    Returns per-spec results (in spec order) plus all extracted cookies keyed by label.
+    Each result is timed ('started', 'seconds') from the previous result, so shared
+    work such as the browser login counts towards the first session that needed it.
+    """
+    settings = load_settings()
+    security_page_url = settings.get('security_page', 'https://www.myanonamouse.net/preferences/index.php?view=security')
+    debug_info = []
+    results = {}
+    cookies = {}
+    since = time.time()
+
+    def record_timing(index):
+        nonlocal since
+        now = time.time()
+        results[index].update(started=since, seconds=round(now - since, 1))
+        since = now
+
+    def record_success(index, spec, cookie_value, engine):
+        current_time = store_session_cookie(spec['cookie_type'], cookie_value, spec)
+        cookies[spec['label']] = cookie_value
+        results[index] = {
+            'cookie_type': spec['cookie_type'],
+            'label': spec['label'],
+            'success': True,
+            'message': f"Successfully created {spec['cookie_type']} session cookie",
+            'engine': engine
+        }
+        record_timing(index)
+        debug_info.append(f"Saved {spec['cookie_type']} cookie ({engine}) and timestamp ({current_time}) to settings")
+        log_info(f"✓ Successfully created {spec['cookie_type']} session cookie ({engine})")
+
+    def record_failure(index, spec, message):
+        results[index] = {'cookie_type': spec['cookie_type'], 'label': spec['label'], 'success': False, 'message': message}
+        record_timing(index)
+        debug_info.append(f"{spec['cookie_type']}: {message}")
+
+    # HTTP engine first; anything needing JavaScript goes to the browser batch
+    browser_specs = list(enumerate(specs))
+    if mam_engine_enabled(settings):
+        browser_specs = []
+        for index, spec in enumerate(specs):
+            try:
+                http_result = mam_http_create_session(settings, spec['ip_address'], spec['use_asn'], spec['allow_dynamic_seedbox'], spec['label'])
+            except requests.exceptions.RequestException as e:
+                http_result = {'success': False, 'needs_browser': True, 'message': f'HTTP engine request error: {e}'}
+            if http_result['success']:
+                record_success(index, spec, http_result['cookie'], 'http')
+            elif http_result.get('needs_browser'):
+                debug_info.append(f"{spec['cookie_type']}: HTTP engine needs browser ({http_result['message']})")
+                browser_specs.append((index, spec))
             else:
-                # Select No for dynamic seedbox
-                dyn_no_radio = form_table.find_element(By.CSS_SELECTOR, "input[name='dynSeed'][value='no']")
-                dyn_no_radio.click()
-                debug_info.append("Selected No for Dynamic Seedbox")
-        except NoSuchElementException:
-            debug_info.append("Could not find Dynamic Seedbox radio buttons")
-            return {'success': False, 'message': 'Dynamic Seedbox radio buttons not found', 'debug_info': debug_info}
-        
-        # Fill in the label
+                record_failure(index, spec, http_result['message'])
+
+    if browser_specs:
         try:
-            label_field = form_table.find_element(By.ID, "sLabel")
-            label_field.clear()
-            label_field.send_keys(label)
-            debug_info.append(f"Entered label: {label}")
-        except NoSuchElementException:
-            debug_info.append("Could not find label field")
-            return {'success': False, 'message': 'Label field not found', 'debug_info': debug_info}
-        
-        # Click submit button
+            driver = get_or_create_global_driver()
+            if not driver:
+                raise Exception('Could not create browser instance')
+
+            ensure_mam_login(driver, settings)
+            debug_info.append("Login ensured")
+
+            debug_info.append(f"Navigating to security page once for {len(browser_specs)} sessions")
+            driver.get(security_page_url)
+            time.sleep(3)
+
+            for position, (index, spec) in enumerate(browser_specs):
+                # The result page normally still carries the form; reload only if it does not
+                if position > 0 and not driver.execute_script(CREATE_SESSION_FORM_PRESENT_SCRIPT):
+                    debug_info.append("Create session form not on result page - reloading security page")
+                    driver.get(security_page_url)
+                    time.sleep(3)
+
+                debug_info.append(f"Creating {spec['cookie_type']} session cookie")
+                result = submit_create_session_form(driver, settings, spec['ip_address'], spec['use_asn'], spec['allow_dynamic_seedbox'], spec['label'], debug_info)
+                if result['success']:
+                    record_success(index, spec, result['cookie'], 'selenium')
+                else:
+                    record_failure(index, spec, result['message'])
+
+        except ImportError:
+            for index, spec in browser_specs:
+                if index not in results:
+                    record_failure(index, spec, 'Selenium not available.')
+        except Exception as e:
+            for index, spec in browser_specs:
+                if index not in results:
+                    record_failure(index, spec, f'Session creation error: {str(e)}')
+
+    ordered_results = [results[index] for index in range(len(specs))]
+    return {
+        'success': all(r['success'] for r in ordered_results),
+        'results': ordered_results,
+        'cookies': cookies,
+        'debug_info': debug_info
+    }
+
+def session_reconcile_enabled(settings, requested=None):
+    """Whether Fix All reconciles MAM sessions instead of deleting and recreating them
+
+    requested is a request's explicit choice, overriding the session_mode setting.
+    """
+    if requested is not None:
+        return bool(requested)
+    return settings.get('session_mode', 'recreate') == 'reconcile'
+
+def _session_key(session):
+    """Identify a session row across page loads"""
+    return (session['created_date_text'], session['label'], session['ip_address'])
+
+@uses_global_driver
+def get_mam_session_inventory(settings, debug_info):
+    """Read the current MAM sessions (created date, IP, ASN flag, label) via HTTP or the browser"""
+    security_page_url = settings.get('security_page', 'https://www.myanonamouse.net/preferences/index.php?view=security')
+
+    if mam_engine_enabled(settings):
         try:
-            submit_button = form_table.find_element(By.CSS_SELECTOR, "input[type='submit'][value='Submit changes!']")
-            submit_button.click()
-            debug_info.append("Clicked submit button")
-        except NoSuchElementException:
-            debug_info.append("Could not find submit button")
-            return {'success': False, 'message': 'Submit button not found', 'debug_info': debug_info}
-        
-        # Wait and handle confirmation dialog
-        confirmation_handled = False
-        max_wait_attempts = 5
-        
-        for wait_attempt in range(max_wait_attempts):
-            time.sleep(0.5)
-            
-            # Check for browser alert
-            try:
-                alert = driver.switch_to.alert
-                alert_text = alert.text
-                debug_info.append(f"Confirmation alert detected: '{alert_text}'")
-                log_info(f"Session creation confirmation alert: '{alert_text}'")
-                
-                # Click "OK" to confirm
-                alert.accept()
-                debug_info.append("Confirmed session creation")
-                log_info("Confirmed session creation by clicking OK on alert")
-                confirmation_handled = True
-                time.sleep(3)
-                break
-            except:
-                pass  # No browser alert
-            
-            # Check for modal dialogs
-            try:
-                modal_selectors = [
-                    ".modal", "[role=dialog]", ".dialog", ".popup", 
-                    "#confirm-dialog", ".confirm-popup", ".swal2-container"
-                ]
-                
-                for selector in modal_selectors:
-                    modals = driver.find_elements(By.CSS_SELECTOR, selector)
-                    for modal in modals:
-                        if modal.is_displayed():
-                            debug_info.append(f"Modal dialog detected with selector '{selector}'")
-                            
-                            # Look for OK/Confirm button in modal
-                            ok_buttons = modal.find_elements(By.CSS_SELECTOR, 
-                                "button, input[type='button'], input[type='submit']")
-                            
-                            # Filter buttons by text content
-                            confirm_buttons = []
-                            for btn in ok_buttons:
-                                btn_text = btn.text.upper() if btn.text else ''
-                                btn_value = (btn.get_attribute('value') or '').upper()
-                                if any(keyword in btn_text or keyword in btn_value for keyword in ['OK', 'CONFIRM', 'YES']):
-                                    confirm_buttons.append(btn)
-                            
-                            ok_buttons = confirm_buttons
-                            
-                            if ok_buttons:
-                                ok_buttons[0].click()
-                                debug_info.append("Clicked OK button in modal dialog")
-                                confirmation_handled = True
-                                time.sleep(3)
-                                break
-                    
-                    if confirmation_handled:
-                        break
-            except Exception as modal_error:
-                debug_info.append(f"Modal check error: {modal_error}")
-            
-            if confirmation_handled:
-                break
-        
-        if not confirmation_handled:
-            debug_info.append("WARNING: No confirmation dialog was handled")
-            log_info("WARNING: No confirmation dialog found for session creation")
-        
-        # Wait for page to load and extract cookie
+            listing = mam_http_list_sessions(settings)
+            if listing['success']:
+                debug_info.append(f"Inventory: {listing['message']} (HTTP engine)")
+                return {'success': True, 'sessions': listing['sessions'], 'engine': 'http'}
+            if not listing.get('needs_browser'):
+                return {'success': False, 'message': listing['message'], 'sessions': []}
+            debug_info.append(f"Inventory: HTTP engine needs browser ({listing['message']})")
+        except requests.exceptions.RequestException as e:
+            debug_info.append(f"Inventory: HTTP engine request error: {e} - falling back to Selenium")
+
+    try:
+        driver = get_or_create_global_driver()
+        if not driver:
+            return {'success': False, 'message': 'Could not create browser instance', 'sessions': []}
+        ensure_mam_login(driver, settings)
+        driver.get(security_page_url)
         time.sleep(3)
-        
+        sessions = parse_mam_sessions(BeautifulSoup(driver.page_source, 'html.parser'))
+        debug_info.append(f"Inventory: Found {len(sessions)} sessions (Selenium)")
+        return {'success': True, 'sessions': sessions, 'engine': 'selenium'}
+    except ImportError:
+        return {'success': False, 'message': 'Selenium not available.', 'sessions': []}
+    except Exception as e:
+        return {'success': False, 'message': f'Session inventory error: {str(e)}', 'sessions': []}
+
+@uses_global_driver
+def remove_mam_sessions(settings, session_keys, debug_info):
+    """Remove specific MAM sessions identified by _session_key, via HTTP or one browser script execution"""
+    security_page_url = settings.get('security_page', 'https://www.myanonamouse.net/preferences/index.php?view=security')
+    pending_keys = set(session_keys)
+    removed_count = 0
+
+    if mam_engine_enabled(settings):
         try:
-            # Look for the cookie textarea
-            cookie_textarea = driver.find_element(By.XPATH, "//textarea[@cols='100'][@rows='10']")
-            cookie_value = cookie_textarea.get_attribute('value')
-            debug_info.append(f"Extracted cookie (length: {len(cookie_value)})")
-            
-            if not cookie_value or len(cookie_value) < 50:
-                debug_info.append("Cookie appears to be empty or too short")
-                return {'success': False, 'message': 'Cookie extraction failed - empty or invalid cookie', 'debug_info': debug_info}
-            
-            # Store cookie in settings with timestamp
-            from datetime import datetime
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            settings = load_settings()
-            if cookie_type == 'qBittorrent':
-                settings['qbittorrent_session_cookie'] = cookie_value
-                settings['qbittorrent_cookie_obtained_time'] = current_time
-            elif cookie_type == 'Prowlarr':
-                settings['prowlarr_session_cookie'] = cookie_value
-                settings['prowlarr_cookie_obtained_time'] = current_time
-            
-            save_settings(settings)
-            debug_info.append(f"Saved {cookie_type} cookie and timestamp ({current_time}) to settings")
-            
-            # Refresh the page to show the new session
-            debug_info.append("Refreshing page to show new session")
+            listing = mam_http_list_sessions(settings)
+            if listing['success']:
+                page = listing['page']
+                for session in listing['sessions']:
+                    if _session_key(session) not in pending_keys or not session['remove_button']:
+                        continue
+                    result = mam_http_remove_session(settings, page, session)
+                    debug_info.append(f"HTTP: {result['message']}")
+                    if not result['success']:
+                        if not result['needs_browser']:
+                            return {'success': False, 'message': result['message'], 'removed_count': removed_count}
+                        break
+                    pending_keys.discard(_session_key(session))
+                    removed_count += 1
+                    page = result['listing']['page']
+        except requests.exceptions.RequestException as e:
+            debug_info.append(f"HTTP engine request error: {e} - falling back to Selenium")
+
+    if not pending_keys:
+        return {'success': True, 'message': f'Removed {removed_count} sessions', 'removed_count': removed_count}
+
+    try:
+        driver = get_or_create_global_driver()
+        if not driver:
+            return {'success': False, 'message': 'Could not create browser instance', 'removed_count': removed_count}
+        ensure_mam_login(driver, settings)
+        driver.get(security_page_url)
+        time.sleep(3)
+
+        sessions = parse_mam_sessions(BeautifulSoup(driver.page_source, 'html.parser'))
+        # parse_mam_sessions skips the header row; the removal script indexes all rows
+        rows = [s['row_index'] + 1 for s in sessions if _session_key(s) in pending_keys and s['remove_button']]
+        if rows:
+            remove_session_rows(driver, rows, debug_info)
             driver.get(security_page_url)
             time.sleep(2)
-            
-            log_info(f"✓ Successfully created {cookie_type} session cookie")
-            
-            return {
-                'success': True, 
-                'message': f'Successfully created {cookie_type} session cookie',
-                'cookie': cookie_value[:50] + '...' if len(cookie_value) > 50 else cookie_value,  # Truncated for display
-                'debug_info': debug_info
-            }
-            
-        except NoSuchElementException:
-            debug_info.append("Could not find cookie textarea")
-            return {'success': False, 'message': 'Cookie textarea not found', 'debug_info': debug_info}
-        
+            remaining = parse_mam_sessions(BeautifulSoup(driver.page_source, 'html.parser'))
+            still_present = [s for s in remaining if _session_key(s) in pending_keys]
+            removed_count += len(rows) - len(still_present)
+            if still_present:
+                return {'success': False, 'message': f'{len(still_present)} sessions still present after removal', 'removed_count': removed_count}
+        return {'success': True, 'message': f'Removed {removed_count} sessions', 'removed_count': removed_count}
     except ImportError:
-        return {'success': False, 'message': 'Selenium not available.', 'debug_info': debug_info}
+        return {'success': False, 'message': 'Selenium not available.', 'removed_count': removed_count}
     except Exception as e:
-        debug_info.append(f"Error: {str(e)}")
-        return {'success': False, 'message': f'Session creation error: {str(e)}', 'debug_info': debug_info}
+        return {'success': False, 'message': f'Session removal error: {str(e)}', 'removed_count': removed_count}
+
+def plan_session_reconciliation(sessions, specs, settings):
+    """Work out which desired sessions can be reused, which must be created and which rows to remove
+
+    A spec is reused when its stored cookie is still set, the stored spec matches the
+    desired one and a session with the same label (and IP, when shown) exists on MAM.
+    Managed sessions that are not reused are removed once their replacement exists;
+    of the unmanaged sessions only the newest (normally the login session) is kept.
+    """
+    managed_labels = {spec['label'] for spec in specs}
+    reuse = {}
+    create = []
+    for spec in specs:
+        prefix = spec.get('settings_prefix') or SESSION_SETTINGS_PREFIXES.get(spec['cookie_type'], spec['cookie_type'].lower())
+        cookie = settings.get(f'{prefix}_session_cookie', '')
+        stored_spec = settings.get(f'{prefix}_session_spec')
+        desired_spec = _session_spec_summary(spec['ip_address'], spec['use_asn'], spec['allow_dynamic_seedbox'], spec['label'])
+
+        def ip_matches(ip):
+            # ASN-locked sessions stay valid when the IP moves within the same ASN
+            return ip in (None, spec['ip_address']) or (spec['use_asn'] and same_asn(settings, ip, spec['ip_address']))
+
+        matching = sorted(
+            [s for s in sessions if s['label'] == spec['label'] and ip_matches(s['ip_address'])],
+            key=lambda x: x['created_date']
+        )
+        spec_matches = stored_spec is not None and all(
+            stored_spec.get(key) == value for key, value in desired_spec.items() if key != 'ip_address'
+        ) and ip_matches(stored_spec.get('ip_address'))
+        if cookie and cookie != '0' and spec_matches and matching:
+            reuse[spec['label']] = matching[-1]
+        else:
+            create.append(spec)
+
+    unmanaged = sorted([s for s in sessions if s['label'] not in managed_labels], key=lambda x: x['created_date'])
+    keep_keys = {_session_key(s) for s in reuse.values()}
+    if unmanaged:
+        keep_keys.add(_session_key(unmanaged[-1]))
+    remove = [s for s in sessions if _session_key(s) not in keep_keys and s['remove_button']]
+    return {'reuse': reuse, 'create': create, 'remove': remove}
+
+def reconcile_mam_sessions(specs):
+    """Bring MAM sessions to the desired specs, creating or removing only what differs
+
+    Returns per-spec results (in spec order, each with a 'reused' flag), the number of
+    removed sessions and whether the run was a read-only check.
+    """
+    settings = load_settings()
+    debug_info = []
+
+    inventory = get_mam_session_inventory(settings, debug_info)
+    if not inventory['success']:
+        return {'success': False, 'message': inventory['message'], 'results': [], 'removed_count': 0, 'read_only': False, 'debug_info': debug_info}
+    if not all(session['label_known'] for session in inventory['sessions']):
+        # Without labels every session would look unmanaged and all but one be removed
+        message = 'Could not read the session labels on the MAM security page - no sessions changed'
+        log_error(f"Session reconciliation aborted: {message}")
+        return {'success': False, 'message': message, 'results': [], 'removed_count': 0, 'read_only': False, 'debug_info': debug_info}
+
+    plan = plan_session_reconciliation(inventory['sessions'], specs, settings)
+    debug_info.append(f"Reconcile: reuse {len(plan['reuse'])}, create {len(plan['create'])}, remove {len(plan['remove'])}")
+    log_info(f"Session reconciliation: reuse {len(plan['reuse'])}, create {len(plan['create'])}, remove {len(plan['remove'])}")
+
+    created = {}
+    if plan['create']:
+        batch = create_session_cookies_batch(plan['create'])
+        debug_info.extend(batch['debug_info'])
+        created = {result['label']: result for result in batch['results']}
+
+    # Keep old sessions for a label whose replacement could not be created
+    failed_labels = {label for label, result in created.items() if not result['success']}
+    to_remove = [s for s in plan['remove'] if s['label'] not in failed_labels]
+    removal = {'success': True, 'message': 'No sessions to remove', 'removed_count': 0}
+    if to_remove:
+        removal = remove_mam_sessions(settings, [_session_key(s) for s in to_remove], debug_info)
+        debug_info.append(f"Reconcile: {removal['message']}")
+
+    results = []
+    for spec in specs:
+        if spec['label'] in plan['reuse']:
+            session = plan['reuse'][spec['label']]
+            results.append({
+                'cookie_type': spec['cookie_type'],
+                'label': spec['label'],
+                'success': True,
+                'reused': True,
+                'message': f"Reused existing {spec['cookie_type']} session (created {session['created_date_text']})"
+            })
+        else:
+            result = dict(created[spec['label']])
+            result['reused'] = False
+            results.append(result)
+
+    return {
+        'success': all(r['success'] for r in results) and removal['success'],
+        'message': removal['message'],
+        'results': results,
+        'removed_count': removal['removed_count'],
+        'removal_success': removal['success'],
+        'read_only': not plan['create'] and not to_remove,
+        'debug_info': debug_info
+    }
 
 @app.route('/api/logout_mam', methods=['POST'])
 def api_logout_mam():
@@ -1382,7 +2619,20 @@ def api_logout_mam():
     try:
         global global_driver
         
-        if global_driver:
+        with global_driver_lock:
+            if not global_driver:
+                return jsonify({
+                    'success': True,
+                    'message': 'No active browser session to close'
+                })
+
+            # Let work still using the browser finish first
+            if not global_driver_released.wait_for(lambda: not _other_global_driver_leases(), timeout=120):
+                return jsonify({
+                    'success': False,
+                    'message': 'Browser still in use by another operation - not closed'
+                })
+
             try:
                 # Close the browser
                 global_driver.quit()
@@ -1399,11 +2649,7 @@ def api_logout_mam():
                 })
             finally:
                 global_driver = None
-        else:
-            return jsonify({
-                'success': True,
-                'message': 'No active browser session to close'
-            })
+                _reset_global_driver_stats()
             
     except Exception as e:
         return jsonify({
@@ -1420,15 +2666,15 @@ def api_clear_cookies():
         from datetime import datetime
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        settings = load_settings()
-        
-        # Set both cookies to '0' and update timestamps
-        settings['qbittorrent_session_cookie'] = '0'
-        settings['qbittorrent_cookie_obtained_time'] = current_time
-        settings['prowlarr_session_cookie'] = '0'
-        settings['prowlarr_cookie_obtained_time'] = current_time
-        
-        save_settings(settings)
+        with settings_lock:
+            settings = load_settings()
+            
+            # Set every qBittorrent target's cookie and the Prowlarr cookie to '0' and update timestamps
+            for prefix in [t['settings_prefix'] for t in get_qbittorrent_targets(settings)] + ['prowlarr']:
+                settings[f'{prefix}_session_cookie'] = '0'
+                settings[f'{prefix}_cookie_obtained_time'] = current_time
+            
+            save_settings(settings)
         log_info(f"Cleared both session cookies and set timestamps to: {current_time}")
         
         return jsonify({
@@ -1466,13 +2712,7 @@ def api_create_qbittorrent_cookie():
         debug_info = [f"Using VPN IP from Get IPs: {vpn_ip}"]
         
         # Create qBittorrent session cookie
-        result = create_session_cookie(
-            cookie_type='qBittorrent',
-            ip_address=vpn_ip,
-            use_asn=True,  # Select ASN radio button
-            allow_dynamic_seedbox=True,  # Select Yes for dynamic seedbox
-            label='qBittorrent'
-        )
+        result = create_session_cookie(**qbittorrent_session_spec(vpn_ip))
         
         return jsonify(result)
         
@@ -1500,13 +2740,7 @@ def api_create_prowlarr_cookie():
             })
         
         # Create Prowlarr session cookie
-        result = create_session_cookie(
-            cookie_type='Prowlarr',
-            ip_address=ext_ip,
-            use_asn=False,  # Select IP radio button
-            allow_dynamic_seedbox=False,  # Select No for dynamic seedbox
-            label='Prowlarr'
-        )
+        result = create_session_cookie(**prowlarr_session_spec(ext_ip))
         
         return jsonify(result)
         
@@ -1517,76 +2751,599 @@ def api_create_prowlarr_cookie():
             'debug_info': [str(e)]
         })
 
-# Global variable to track qBittorrent container connection state
-qbittorrent_container_connected = False
+@app.route('/api/create_session_cookies', methods=['POST'])
+def api_create_session_cookies():
+    """Create qBittorrent and Prowlarr session cookies in one security page visit"""
+    log_info("Create Session Cookies (batched) request started")
 
-@app.route('/api/qbittorrent_login', methods=['POST'])
-def api_qbittorrent_login():
-    """Connect to qBittorrent container console"""
-    log_info("qBittorrent Login request started")
-    debug_info = []
-    
     try:
-        import subprocess
-        global qbittorrent_container_connected
-        
-        debug_info.append("Attempting to connect to binhex-qbittorrentvpn container")
+        # Get both IPs with one detection pass
+        from flask import current_app
+        with current_app.test_client() as client:
+            ip_response = client.get('/api/get_ips')
+            ip_data = ip_response.get_json() or {}
+
+        vpn_ip = ip_data.get('vpn_ip')
+        ext_ip = ip_data.get('external_ip')
+
+        if not vpn_ip or vpn_ip == 'Not Found':
+            return jsonify({
+                'success': False,
+                'message': 'VPN IP not found. Please click "Get IPs" first to detect the VPN IP address.',
+                'debug_info': ['VPN IP detection failed or not run yet']
+            })
+        if not ext_ip or ext_ip == 'Error':
+            return jsonify({
+                'success': False,
+                'message': 'External IP not found. Please check your internet connection.',
+                'debug_info': ['Failed to get external IP']
+            })
+
+        batch = create_session_cookies_batch([qbittorrent_session_spec(vpn_ip), prowlarr_session_spec(ext_ip)])
+        created = [r['cookie_type'] for r in batch['results'] if r['success']]
+
+        return jsonify({
+            'success': batch['success'],
+            'message': f"Created sessions: {', '.join(created) or 'none'}",
+            'results': batch['results'],
+            'debug_info': batch['debug_info']
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error creating session cookies: {str(e)}',
+            'debug_info': [str(e)]
+        })
+
+# Docker Engine API client
+#
+# Talks HTTP to the mounted Docker socket over reused keep-alive connections instead of
+# forking the docker CLI for every call.
+
+DOCKER_SOCKET_PATH = '/var/run/docker.sock'
+DOCKER_API_VERSION = 'v1.41'
+
+class DockerAPIError(Exception):
+    """Error response or connection failure from the Docker Engine API"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class DockerSocketConnection(http.client.HTTPConnection):
+    """HTTPConnection that connects to a unix socket instead of TCP"""
+
+    def __init__(self, socket_path=DOCKER_SOCKET_PATH, timeout=30):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+# Idle keep-alive connections to the daemon. Each request checks one out (or opens a
+# new one) and returns it afterwards, so parallel targets talk to Docker at the same
+# time; the lock only guards the idle list.
+DOCKER_MAX_IDLE_CONNECTIONS = 4
+docker_idle_connections = []
+docker_connection_lock = threading.Lock()
+docker_socket_path = os.environ.get('DOCKER_SOCKET', DOCKER_SOCKET_PATH)
+
+def _close_docker_connection(connection):
+    """Close a Docker connection that is not going back to the idle list"""
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+def _checkout_docker_connection(timeout):
+    """An idle connection or a new one: (connection, reused)"""
+    with docker_connection_lock:
+        connection = docker_idle_connections.pop() if docker_idle_connections else None
+    if connection is None:
+        return DockerSocketConnection(docker_socket_path, timeout=timeout), False
+    return connection, True
+
+def _checkin_docker_connection(connection):
+    """Keep a connection for reuse (or close it when enough are idle already)"""
+    with docker_connection_lock:
+        if len(docker_idle_connections) < DOCKER_MAX_IDLE_CONNECTIONS:
+            docker_idle_connections.append(connection)
+            return
+    _close_docker_connection(connection)
+
+def docker_api_request(method, path, params=None, body=None, timeout=30):
+    """Send one request to the Docker Engine API and return (status, content_type, raw_body)
+
+    A request that fails on a reused connection (the daemon closed it while idle) is
+    retried once on a fresh connection; anything else raises DockerAPIError.
+    """
+    url = f"/{DOCKER_API_VERSION}{path}"
+    if params:
+        url += '?' + urlencode(params)
+    headers = {'Host': 'docker'}
+    payload = None
+    if body is not None:
+        payload = json.dumps(body).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+
+    for attempt in range(2):
+        connection, reused = _checkout_docker_connection(timeout)
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        try:
+            connection.request(method, url, body=payload, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                BrokenPipeError, ConnectionResetError) as e:
+            _close_docker_connection(connection)
+            if attempt == 0 and reused:
+                continue
+            raise DockerAPIError(f'Docker connection error: {e}')
+        except socket.timeout:
+            _close_docker_connection(connection)
+            raise DockerAPIError(f'Docker API {method} {path} timed out after {timeout} seconds')
+        except (FileNotFoundError, ConnectionRefusedError, PermissionError) as e:
+            _close_docker_connection(connection)
+            raise DockerAPIError(f'Cannot connect to Docker socket {docker_socket_path}: {e}')
+        except Exception:
+            _close_docker_connection(connection)
+            raise
+        if response.will_close:
+            _close_docker_connection(connection)
+        else:
+            _checkin_docker_connection(connection)
+        return response.status, response.getheader('Content-Type', ''), data
+
+def _docker_error_message(status, data):
+    """Extract the daemon's error message from an error response"""
+    try:
+        return json.loads(data).get('message', f'HTTP {status}')
+    except (ValueError, AttributeError):
+        return f'HTTP {status}'
+
+def docker_api_json(method, path, params=None, body=None, timeout=30, ok_statuses=(200, 201, 204)):
+    """Docker API request that decodes a JSON response and raises on error statuses"""
+    status, _, data = docker_api_request(method, path, params=params, body=body, timeout=timeout)
+    if status not in ok_statuses:
+        raise DockerAPIError(_docker_error_message(status, data), status=status)
+    return json.loads(data) if data else None
+
+def docker_find_container(name, include_stopped=False):
+    """Find a container by name, preferring an exact match; returns a summary dict or None"""
+    params = {'filters': json.dumps({'name': [name]})}
+    if include_stopped:
+        params['all'] = '1'
+    containers = docker_api_json('GET', '/containers/json', params=params, timeout=10)
+    matches = []
+    for container in containers:
+        names = [n.lstrip('/') for n in container.get('Names', [])]
+        summary = {'id': container['Id'], 'name': names[0] if names else container['Id'][:12],
+                   'state': container.get('State'), 'status': container.get('Status')}
+        if name in names:
+            return summary
+        matches.append(summary)
+    return matches[0] if matches else None
+
+def docker_inspect_container(name):
+    """Return the full inspect document of a container"""
+    return docker_api_json('GET', f"/containers/{quote(name)}/json", timeout=10)
+
+def docker_container_action(name, action, timeout=30):
+    """Run restart, stop or start on a container (already stopped/started counts as success)"""
+    params = {'t': '10'} if action in ('restart', 'stop') else None
+    docker_api_json('POST', f"/containers/{quote(name)}/{action}", params=params, timeout=timeout, ok_statuses=(204, 304))
+
+def _demux_docker_stream(data):
+    """Split a multiplexed exec stream into stdout and stderr text"""
+    stdout, stderr = [], []
+    offset = 0
+    while offset + 8 <= len(data):
+        stream_type = data[offset]
+        size = int.from_bytes(data[offset + 4:offset + 8], 'big')
+        chunk = data[offset + 8:offset + 8 + size]
+        (stderr if stream_type == 2 else stdout).append(chunk)
+        offset += 8 + size
+    return b''.join(stdout).decode('utf-8', 'replace'), b''.join(stderr).decode('utf-8', 'replace')
+
+def docker_exec(name, cmd, timeout=30):
+    """Run a command in a container and return {'exit_code', 'stdout', 'stderr'}"""
+    created = docker_api_json('POST', f"/containers/{quote(name)}/exec", body={
+        'AttachStdout': True,
+        'AttachStderr': True,
+        'Tty': False,
+        'Cmd': cmd
+    }, timeout=10)
+    exec_id = created['Id']
+
+    status, content_type, data = docker_api_request('POST', f"/exec/{exec_id}/start", body={'Detach': False, 'Tty': False}, timeout=timeout)
+    if status != 200:
+        raise DockerAPIError(_docker_error_message(status, data), status=status)
+    if 'multiplexed-stream' in content_type or 'raw-stream' in content_type:
+        stdout, stderr = _demux_docker_stream(data)
+    else:
+        stdout, stderr = data.decode('utf-8', 'replace'), ''
+
+    exec_info = docker_api_json('GET', f"/exec/{exec_id}/json", timeout=10)
+    return {'exit_code': exec_info.get('ExitCode'), 'stdout': stdout, 'stderr': stderr}
+
+# qBittorrent Web API v2 client
+#
+# Each WebUI (scheme, host and port) has its own pooled session; the SID cookie from
+# auth/login stays on it, and a 403 triggers one re-login. Without configured credentials the WebUI must allow
+# unauthenticated access (e.g. "Bypass authentication for clients on localhost/whitelist").
+
+def get_qbittorrent_base_url(settings):
+    """qBittorrent WebUI base URL with scheme and without trailing slash"""
+    qbittorrent_url = settings.get('qbittorrent_url', '').strip()
+    if qbittorrent_url and not qbittorrent_url.startswith('http'):
+        qbittorrent_url = 'http://' + qbittorrent_url
+    return qbittorrent_url.rstrip('/')
+
+def qbittorrent_api_login(settings):
+    """Log into the qBittorrent Web API; the SID cookie is kept on the WebUI's pooled session"""
+    username = settings.get('qbittorrent_username', '')
+    password = settings.get('qbittorrent_password', '')
+    if not username:
+        return {'success': False, 'message': 'qBittorrent WebUI credentials not configured'}
+
+    base_url = get_qbittorrent_base_url(settings)
+    # qBittorrent's CSRF protection expects a matching Referer
+    response = get_qbittorrent_http_session(base_url).post(
+        f"{base_url}/api/v2/auth/login",
+        data={'username': username, 'password': password},
+        headers={'Referer': base_url},
+        timeout=10
+    )
+    if response.status_code == 200 and response.text.strip() == 'Ok.':
+        return {'success': True, 'message': 'Logged into qBittorrent Web API'}
+    if response.status_code == 403:
+        return {'success': False, 'message': 'qBittorrent banned this IP after too many failed logins'}
+    return {'success': False, 'message': f'qBittorrent login failed: {response.text.strip() or response.status_code}'}
+
+def qbittorrent_api_request(settings, method, path, timeout=10, **kwargs):
+    """Call the qBittorrent Web API, logging in again once if the session was rejected"""
+    base_url = get_qbittorrent_base_url(settings)
+    session = get_qbittorrent_http_session(base_url)
+    with qbittorrent_api_locks.setdefault(qbittorrent_session_key(base_url), threading.Lock()):
+        response = session.request(method, f"{base_url}{path}", headers={'Referer': base_url}, timeout=timeout, **kwargs)
+        if response.status_code == 403 and settings.get('qbittorrent_username'):
+            login = qbittorrent_api_login(settings)
+            if login['success']:
+                response = session.request(method, f"{base_url}{path}", headers={'Referer': base_url}, timeout=timeout, **kwargs)
+    return response
+
+def qbittorrent_api_version(settings, timeout=10):
+    """Get the qBittorrent application version
+
+    'serving' is True whenever the Web API answered (403 means it is up but we are
+    not authenticated), which is what readiness checks need.
+    """
+    response = qbittorrent_api_request(settings, 'GET', '/api/v2/app/version', timeout=timeout)
+    if response.status_code == 200:
+        return {'success': True, 'serving': True, 'version': response.text.strip(), 'message': f'qBittorrent {response.text.strip()}'}
+    if response.status_code == 403:
+        return {'success': False, 'serving': True, 'message': 'qBittorrent Web API is up but requires login'}
+    return {'success': False, 'serving': False, 'message': f'qBittorrent Web API returned HTTP {response.status_code}'}
+
+def qbittorrent_api_transfer_info(settings):
+    """Get global transfer state (speeds, totals, connection status) from the Web API"""
+    response = qbittorrent_api_request(settings, 'GET', '/api/v2/transfer/info')
+    if response.status_code != 200:
+        return {'success': False, 'message': f'Transfer info returned HTTP {response.status_code}'}
+    return {'success': True, 'message': 'Transfer info retrieved', 'transfer': response.json()}
+
+# Container readiness
+#
+# After a restart, Docker's event stream says when the container has started (and is
+# healthy, if it defines a healthcheck). A TCP connect to the WebUI port and a single
+# HTTP request on a pooled session then confirm qBittorrent is actually serving.
+
+# One pooled session (cookie jar and Web API login) per WebUI. Browsers and requests
+# scope cookies by host only, so two WebUIs on one host but different ports would
+# otherwise overwrite each other's SID and log in again on every call.
+qbittorrent_http_sessions = {}
+qbittorrent_api_locks = {}
+qbittorrent_http_sessions_lock = threading.Lock()
+
+def qbittorrent_session_key(base_url):
+    """scheme://host:port identifying a WebUI, with the default port filled in"""
+    parsed = urlparse(base_url)
+    try:
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    except ValueError:
+        return base_url.lower()
+    return f"{parsed.scheme}://{(parsed.hostname or '').lower()}:{port}"
+
+def get_qbittorrent_http_session(base_url=''):
+    """Get or create the pooled requests session used to reach a qBittorrent WebUI"""
+    key = qbittorrent_session_key(base_url)
+    with qbittorrent_http_sessions_lock:
+        session = qbittorrent_http_sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            qbittorrent_http_sessions[key] = session
+    return session
+
+def tcp_port_open(host, port, timeout=1.0):
+    """Cheap readiness probe: can a TCP connection be opened"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+def wait_for_container_events(container_name, since, deadline, status_updates):
+    """Follow Docker events from `since` until the container has started (and is healthy)
+
+    Returns True when confirmed and False when the deadline passes first. Raises
+    DockerAPIError when the event stream is unavailable.
+    """
+    state = docker_inspect_container(container_name).get('State', {})
+    has_healthcheck = bool(state.get('Health'))
+    params = {
+        'since': str(int(since)),
+        'until': str(int(deadline) + 1),
+        'filters': json.dumps({'type': ['container'], 'container': [container_name], 'event': ['start', 'health_status', 'die']})
+    }
+    connection = DockerSocketConnection(docker_socket_path, timeout=max(deadline - time.time(), 1))
+    try:
+        connection.request('GET', f"/{DOCKER_API_VERSION}/events?{urlencode(params)}", headers={'Host': 'docker'})
+        response = connection.getresponse()
+        if response.status != 200:
+            raise DockerAPIError(_docker_error_message(response.status, response.read()), status=response.status)
+
+        started = False
+        while time.time() < deadline:
+            line = response.readline()
+            if not line:
+                break  # Stream closed at 'until'
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            action = event.get('Action') or event.get('status', '')
+            if action == 'start':
+                started = True
+                status_updates.append("Docker event: container started")
+                if not has_healthcheck:
+                    return True
+            elif action.startswith('health_status'):
+                status_updates.append(f"Docker event: {action}")
+                if started and action.endswith('healthy') and not action.endswith('unhealthy'):
+                    return True
+            elif action == 'die':
+                status_updates.append("Docker event: container exited")
+        return False
+    except socket.timeout:
+        return False
+    except OSError as e:
+        raise DockerAPIError(f'Docker event stream unavailable: {e}')
+    finally:
+        connection.close()
+
+def wait_for_qbittorrent_ready(container_name, qbittorrent_url, since, timeout, status_updates):
+    """Wait until the restarted container is up: Docker events, then TCP probe, then one pooled HTTP check"""
+    start_time = time.time()
+    deadline = start_time + timeout
+    method = 'events'
+    try:
+        if not wait_for_container_events(container_name, since, deadline, status_updates):
+            return {'ready': False, 'method': method, 'elapsed': time.time() - start_time}
+    except DockerAPIError as e:
+        method = 'polling'
+        status_updates.append(f"Docker events unavailable ({e}) - probing WebUI directly")
+        log_warning(f"Docker events unavailable, probing WebUI directly: {e}")
+
+    parsed = urlparse(qbittorrent_url)
+    host = parsed.hostname
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    settings = dict(load_settings(), qbittorrent_url=qbittorrent_url)
+    while time.time() < deadline:
+        if tcp_port_open(host, port, timeout=1.0):
+            try:
+                # The Web API answering (even with 403) means qBittorrent itself is serving
+                version = qbittorrent_api_version(settings, timeout=5)
+                if version['serving']:
+                    status_updates.append(f"qBittorrent Web API: {version['message']}")
+                    return {'ready': True, 'method': method, 'elapsed': time.time() - start_time}
+            except requests.exceptions.RequestException:
+                pass  # Port open but WebUI not serving yet
+        time.sleep(0.5)
+    return {'ready': False, 'method': method, 'elapsed': time.time() - start_time}
+
+# qBittorrent targets
+#
+# The container, log path and WebUI on the Config page describe the primary target,
+# which keeps the original settings keys and the "qBittorrent" MAM session label.
+# Additional targets are listed one per line as
+#   name | container | log path | WebUI URL [| username | password]
+# and get their own MAM session ("qBittorrent <name>") and settings keys suffixed
+# with the target id. Per-target work runs on a bounded worker pool.
+
+def _target_id(name):
+    """Settings-key friendly id for a target name"""
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_') or 'target'
+
+def get_qbittorrent_targets(settings=None):
+    """All configured qBittorrent targets, primary first"""
+    settings = settings or load_settings()
+    container_name = settings.get('qbittorrentvpn_container') or 'binhex-qbittorrentvpn'
+    targets = [{
+        'id': 'primary',
+        'name': container_name,
+        'primary': True,
+        'container': container_name,
+        'logpath': settings.get('qbittorrentvpn_logpath', '/app/shared/qbittorrent-logs/qbittorrent.log'),
+        'url': settings.get('qbittorrent_url', ''),
+        'username': settings.get('qbittorrent_username', ''),
+        'password': settings.get('qbittorrent_password', ''),
+        'settings_prefix': 'qbittorrent',
+        'label': 'qBittorrent'
+    }]
+
+    seen_ids = {'primary'}
+    for line in str(settings.get('qbittorrent_extra_targets') or '').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        name, container_name, logpath, url, username, password = ([f.strip() for f in line.split('|')] + [''] * 6)[:6]
+        target_id = _target_id(name)
+        if not name or not container_name or target_id in seen_ids:
+            log_debug(f"Ignoring qBittorrent target '{name}': name and container are required and names must be unique")
+            continue
+        seen_ids.add(target_id)
+        targets.append({
+            'id': target_id,
+            'name': name,
+            'primary': False,
+            'container': container_name,
+            'logpath': logpath or '/app/shared/qbittorrent-logs/qbittorrent.log',
+            'url': url,
+            'username': username,
+            'password': password,
+            'settings_prefix': f'qbittorrent_{target_id}',
+            'label': f'qBittorrent {name}'
+        })
+    return targets
+
+def get_qbittorrent_target(name=None, settings=None):
+    """Target by name or id, the primary target when no name is given; None if unknown"""
+    targets = get_qbittorrent_targets(settings)
+    if not name:
+        return targets[0]
+    return next((t for t in targets if name in (t['name'], t['id'])), None)
+
+def request_target():
+    """Target named by 'target' in the request json, defaulting to the primary"""
+    request_data = request.get_json(silent=True) if has_request_context() else None
+    return get_qbittorrent_target((request_data or {}).get('target'))
+
+def target_settings(settings, target):
+    """Settings as seen by one target: its container, log path and WebUI replace the primary's"""
+    return dict(
+        settings,
+        qbittorrentvpn_container=target['container'],
+        qbittorrentvpn_logpath=target['logpath'],
+        qbittorrent_url=target['url'],
+        qbittorrent_username=target['username'],
+        qbittorrent_password=target['password']
+    )
+
+def target_setting_key(target, key):
+    """Settings key for per-target state; the primary target keeps the original key"""
+    return key if target['primary'] else f"{key}_{target['id']}"
+
+def target_step_name(name, target):
+    """Step name for a target; the primary target keeps the original step names"""
+    return name if target['primary'] else f"{name} ({target['name']})"
+
+def run_for_targets(targets, func):
+    """Run func(target) for every target on a bounded worker pool; results in target order"""
+    if len(targets) == 1:
+        return [func(targets[0])]
+
+    max_workers = max(1, min(len(targets), int(load_settings().get('qbittorrent_max_workers', 4))))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='qbt-target') as pool:
+        return list(pool.map(in_worker_context(func), targets))
+
+def in_worker_context(func):
+    """Wrap func to run in a pool thread with the caller's Timer/Manual mode, job and an app context"""
+    mode = getattr(execution_context, 'mode', None)
+    job_id = getattr(execution_context, 'job_id', None)
+
+    def worker(*args):
+        # Carry the Timer/Manual context into the worker thread for push status tracking
+        if mode:
+            execution_context.mode = mode
+        if job_id:
+            execution_context.job_id = job_id
+        try:
+            with app.app_context():
+                return func(*args)
+        finally:
+            for attr in ('mode', 'job_id'):
+                if hasattr(execution_context, attr):
+                    delattr(execution_context, attr)
+    return worker
+
+# Containers with an active console connection (one entry per target)
+qbittorrent_connected_containers = set()
+
+@app.route('/api/qbittorrent_transfer_info', methods=['GET'])
+def api_qbittorrent_transfer_info():
+    """Read qBittorrent transfer state through the Web API"""
+    settings = load_settings()
+    if not settings.get('qbittorrent_url'):
+        return jsonify({'success': False, 'message': 'qBittorrent URL not configured. Please set in Config page.'})
+    try:
+        version = qbittorrent_api_version(settings)
+        if not version['success']:
+            return jsonify({'success': False, 'message': version['message']})
+        result = qbittorrent_api_transfer_info(settings)
+        result['version'] = version['version']
+        return jsonify(result)
+    except requests.exceptions.RequestException as e:
+        return jsonify({'success': False, 'message': f'Could not reach qBittorrent: {str(e)}'})
+
+@app.route('/api/qbittorrent_login', methods=['POST'])
+def api_qbittorrent_login():
+    """Route handler - connects to the requested (default: primary) target"""
+    target = request_target()
+    if not target:
+        return jsonify({'success': False, 'message': 'Unknown qBittorrent target'})
+    return _qbittorrent_login_internal(target)
+
+def _qbittorrent_login_internal(target=None):
+    """Connect to a qBittorrent target's container console"""
+    target = target or get_qbittorrent_target()
+    container_name = target['container']
+    log_info(f"qBittorrent Login request started ({container_name})")
+    debug_info = []
+    
+    try:
+        debug_info.append(f"Attempting to connect to {container_name} container")
         
         # Test if container exists and is running
         try:
-            result = subprocess.run(
-                ['docker', 'ps', '--filter', 'name=binhex-qbittorrentvpn', '--format', '{{.Names}}']
-                , capture_output=True, text=True, timeout=10
-            )
-            
-            if result.returncode != 0:
-                debug_info.append(f"Docker ps command failed: {result.stderr}")
-                log_info(f"Docker ps command failed: {result.stderr}")
-                return jsonify({
-                    'success': False,
-                    'message': 'Failed to check Docker container status',
-                    'debug_info': debug_info
-                })
-            
-            container_list = result.stdout.strip().split('\n')
-            debug_info.append(f"Found containers: {container_list}")
+            container = docker_find_container(container_name)
+            debug_info.append(f"Found container: {container['name'] if container else None}")
             
-            if not any('binhex-qbittorrentvpn' in name for name in container_list if name):
-                debug_info.append("binhex-qbittorrentvpn container not found or not running")
-                log_info("binhex-qbittorrentvpn container not found or not running")
+            if not container:
+                debug_info.append(f"{container_name} container not found or not running")
+                log_info(f"{container_name} container not found or not running")
                 return jsonify({
                     'success': False,
-                    'message': 'binhex-qbittorrentvpn container not found or not running',
+                    'message': f'{container_name} container not found or not running',
                     'debug_info': debug_info
                 })
                 
-        except subprocess.TimeoutExpired:
-            debug_info.append("Docker command timed out")
+        except DockerAPIError as e:
+            debug_info.append(f"Docker API error: {str(e)}")
+            log_info(f"Docker container lookup failed: {e}")
             return jsonify({
                 'success': False,
-                'message': 'Docker command timed out',
-                'debug_info': debug_info
-            })
-        except Exception as e:
-            debug_info.append(f"Error checking container status: {str(e)}")
-            return jsonify({
-                'success': False,
-                'message': f'Error checking container status: {str(e)}',
+                'message': f'Failed to check Docker container status: {str(e)}',
                 'debug_info': debug_info
             })
         
         # Test basic command execution in container
         try:
-            test_result = subprocess.run(
-                ['docker', 'exec', 'binhex-qbittorrentvpn', 'echo', 'test-connection'],
-                capture_output=True, text=True, timeout=15
-            )
+            test_result = docker_exec(container['name'], ['echo', 'test-connection'], timeout=15)
             
-            if test_result.returncode == 0:
-                qbittorrent_container_connected = True
+            if test_result['exit_code'] == 0:
+                qbittorrent_connected_containers.add(container_name)
                 debug_info.append("Successfully connected to container")
-                debug_info.append(f"Test command output: {test_result.stdout.strip()}")
-                log_info("Successfully connected to binhex-qbittorrentvpn container")
+                debug_info.append(f"Test command output: {test_result['stdout'].strip()}")
+                log_info(f"Successfully connected to {container_name} container")
                 
                 return jsonify({
                     'success': True,
@@ -1594,19 +3351,19 @@ def api_qbittorrent_login():
                     'debug_info': debug_info
                 })
             else:
-                debug_info.append(f"Test command failed: {test_result.stderr}")
-                log_info(f"Container connection test failed: {test_result.stderr}")
+                debug_info.append(f"Test command failed: {test_result['stderr']}")
+                log_info(f"Container connection test failed: {test_result['stderr']}")
                 return jsonify({
                     'success': False,
-                    'message': f'Container connection test failed: {test_result.stderr}',
+                    'message': f"Container connection test failed: {test_result['stderr']}",
                     'debug_info': debug_info
                 })
                 
-        except subprocess.TimeoutExpired:
-            debug_info.append("Container connection test timed out")
+        except DockerAPIError as e:
+            debug_info.append(f"Container connection test failed: {str(e)}")
             return jsonify({
                 'success': False,
-                'message': 'Container connection test timed out',
+                'message': f'Container connection test failed: {str(e)}',
                 'debug_info': debug_info
             })
             
@@ -1619,9 +3376,17 @@ def api_qbittorrent_login():
             'debug_info': debug_info
         })
 
-def _qbittorrent_send_cookie_internal(mode='Advanced Mode'):
+def set_mam_push_status(settings, target, status, mode):
+    """Record the last MAM push result for a target (shown in the footer for the primary)"""
+    settings[target_setting_key(target, 'last_mam_push_status')] = status
+    settings[target_setting_key(target, 'last_mam_push_mode')] = mode
+    settings[target_setting_key(target, 'last_mam_push_time')] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def _qbittorrent_send_cookie_internal(mode='Advanced Mode', target=None):
     """Internal function to send qBittorrent cookie - can be called from anywhere"""
-    log_info("qBittorrent Send Cookie request started")
+    target = target or get_qbittorrent_target()
+    container_name = target['container']
+    log_info(f"qBittorrent Send Cookie request started ({container_name})")
     debug_info = []
     
     # Check if we're in timer context
@@ -1629,11 +3394,8 @@ def _qbittorrent_send_cookie_internal(mode='Advanced Mode'):
         mode = 'Timer'
     
     try:
-        import subprocess
-        global qbittorrent_container_connected
-        
         # Check if we have a connection
-        if not qbittorrent_container_connected:
+        if container_name not in qbittorrent_connected_containers:
             debug_info.append("No active container connection - please login first")
             return jsonify({
                 'success': False,
@@ -1643,50 +3405,59 @@ def _qbittorrent_send_cookie_internal(mode='Advanced Mode'):
         
         # Get qBittorrent cookie from settings
         settings = load_settings()
-        qb_cookie = settings.get('qbittorrent_session_cookie')
+        qb_cookie = settings.get(f"{target['settings_prefix']}_session_cookie")
         
         if not qb_cookie or qb_cookie == '0':
-            debug_info.append("No qBittorrent cookie found or cookie is cleared")
-            log_info("No qBittorrent cookie found - user needs to create one in Step 2")
+            debug_info.append(f"No {target['label']} cookie found or cookie is cleared")
+            log_info(f"No {target['label']} cookie found - user needs to create one in Step 2")
             return jsonify({
                 'success': False,
-                'message': 'No qBittorrent cookie found. Please create a qBittorrent session in Step 2 first.',
+                'message': f"No {target['label']} cookie found. Please create a qBittorrent session in Step 2 first.",
+                'debug_info': debug_info
+            })
+        
+        # Do not spend a push while MAM's change window is known to be closed
+        cooldown = get_mam_cooldown(settings, target)
+        if cooldown['active']:
+            run_at = cooldown['deferred_push_at'] or schedule_deferred_push(cooldown['until_ts'] + 30, target)
+            debug_info.append(f"MAM cooldown active until {cooldown['until']}")
+            log_info(f"Skipping MAM push - cooldown active until {cooldown['until']}, retry at {run_at}")
+            return jsonify({
+                'success': False,
+                'deferred': True,
+                'message': f"MAM cooldown active until {cooldown['until']} - push deferred to {run_at}",
                 'debug_info': debug_info
             })
         
         debug_info.append(f"Using qBittorrent cookie (length: {len(qb_cookie)} chars)")
         debug_info.append(f"Cookie preview: {qb_cookie[:50]}...")
-        log_debug(f"Executing curl command with cookie in binhex-qbittorrentvpn container")
+        log_debug(f"Executing curl command with cookie in {container_name} container")
         
-        # Build the curl command
+        # Build the curl command run inside the container
         curl_command = [
-            'docker', 'exec', 'binhex-qbittorrentvpn',
             'sudo', 'curl', '-c', '/path/docker/persists/mam.cookies',
             '-b', f'mam_id={qb_cookie}',
             'https://t.myanonamouse.net/json/dynamicSeedbox.php'
         ]
         
         debug_info.append("Executing curl command in container...")
-        debug_info.append(f"Command: {' '.join(curl_command[:8])}... [cookie hidden]")
-        log_info("Executing MAM dynamic seedbox curl command in qBittorrent container")
+        debug_info.append(f"Command: {' '.join(curl_command[:5])}... [cookie hidden]")
+        log_info(f"Executing MAM dynamic seedbox curl command in {container_name} container")
         
         try:
-            result = subprocess.run(
-                curl_command,
-                capture_output=True, text=True, timeout=30
-            )
+            result = docker_exec(container_name, curl_command, timeout=30)
             
-            debug_info.append(f"Command exit code: {result.returncode}")
-            debug_info.append(f"Command stdout: {result.stdout}")
-            if result.stderr:
-                debug_info.append(f"Command stderr: {result.stderr}")
+            debug_info.append(f"Command exit code: {result['exit_code']}")
+            debug_info.append(f"Command stdout: {result['stdout']}")
+            if result['stderr']:
+                debug_info.append(f"Command stderr: {result['stderr']}")
             
-            log_debug(f"Curl command completed with exit code: {result.returncode}")
-            log_debug(f"Curl response: {result.stdout}")
+            log_debug(f"Curl command completed with exit code: {result['exit_code']}")
+            log_debug(f"Curl response: {result['stdout']}")
             
-            if result.returncode == 0:
+            if result['exit_code'] == 0:
                 # Parse the response to check for success
-                response_text = result.stdout.strip()
+                response_text = result['stdout'].strip()
                 debug_info.append(f"Full response: {response_text}")
                 
                 # Extract JSON from response
@@ -1707,13 +3478,22 @@ def _qbittorrent_send_cookie_internal(mode='Advanced Mode'):
                 # Check for success
                 if '{"Success":true' in response_text or (json_data and json_data.get('Success') == True):
                     debug_info.append('SUCCESS: Found {"Success":true in response')
-                    log_info("✓ Successfully secured qBittorrent session with MAM")
+                    log_info(f"✓ Successfully secured {target['label']} session with MAM")
                     
                     # Save push status to settings for footer display
-                    settings['last_mam_push_status'] = 'success'
-                    settings['last_mam_push_mode'] = mode  # Use the mode parameter
-                    settings['last_mam_push_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    save_settings(settings)
+                    # MAM sees the container's current VPN IP, which may have moved within the
+                    # session's ASN since the session was created
+                    pushed_ip = detect_vpn_ip(target_settings(settings, target), [])
+                    if pushed_ip == 'Not Found':
+                        pushed_ip = (settings.get(f"{target['settings_prefix']}_session_spec") or {}).get('ip_address') or pushed_ip
+                    with settings_lock:
+                        settings = load_settings()
+                        set_mam_push_status(settings, target, 'success', mode)
+                        # Remember what was pushed so unchanged runs can be skipped
+                        settings[target_setting_key(target, 'last_pushed_vpn_ip')] = pushed_ip if pushed_ip != 'Not Found' else None
+                        settings[target_setting_key(target, 'last_pushed_cookie_fingerprint')] = cookie_fingerprint(qb_cookie)
+                        record_mam_change_accepted(settings, target)
+                        save_settings(settings)
                     
                     return jsonify({
                         'success': True,
@@ -1726,15 +3506,18 @@ def _qbittorrent_send_cookie_internal(mode='Advanced Mode'):
                     debug_info.append('RATE LIMIT: MAM reports last change too recent')
                     log_warning(f"MAM rate limit hit: {response_text}")
                     
-                    # Save failure status
-                    settings['last_mam_push_status'] = 'failed'
-                    settings['last_mam_push_mode'] = mode
-                    settings['last_mam_push_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    save_settings(settings)
+                    # Save failure status and schedule a retry for when the window opens
+                    with settings_lock:
+                        settings = load_settings()
+                        set_mam_push_status(settings, target, 'failed', mode)
+                        cooldown_until = record_mam_rate_limited(settings, target)
+                        save_settings(settings)
+                    run_at = schedule_deferred_push(cooldown_until + 30, target)
                     
                     return jsonify({
                         'success': False,
-                        'message': 'MAM rate limit: Last change too recent. Please wait before trying again.',
+                        'deferred': True,
+                        'message': f'MAM rate limit: Last change too recent. Retry scheduled for {run_at}.',
                         'response': response_text,
                         'debug_info': debug_info
                     })
@@ -1748,10 +3531,10 @@ def _qbittorrent_send_cookie_internal(mode='Advanced Mode'):
                         error_msg = f"MAM error: {json_data.get('msg')}"
                     
                     # Save failure status
-                    settings['last_mam_push_status'] = 'failed'
-                    settings['last_mam_push_mode'] = mode
-                    settings['last_mam_push_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    save_settings(settings)
+                    with settings_lock:
+                        settings = load_settings()
+                        set_mam_push_status(settings, target, 'failed', mode)
+                        save_settings(settings)
                     
                     return jsonify({
                         'success': False,
@@ -1760,34 +3543,34 @@ def _qbittorrent_send_cookie_internal(mode='Advanced Mode'):
                         'debug_info': debug_info
                     })
             else:
-                debug_info.append(f"Curl command failed with exit code: {result.returncode}")
-                log_error(f"Curl command failed: {result.stderr}")
+                debug_info.append(f"Curl command failed with exit code: {result['exit_code']}")
+                log_error(f"Curl command failed: {result['stderr']}")
                 
                 # Save failure status
-                settings['last_mam_push_status'] = 'failed'
-                settings['last_mam_push_mode'] = mode
-                settings['last_mam_push_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                save_settings(settings)
+                with settings_lock:
+                    settings = load_settings()
+                    set_mam_push_status(settings, target, 'failed', mode)
+                    save_settings(settings)
                 
                 return jsonify({
                     'success': False,
-                    'message': f'Curl command failed: {result.stderr}',
+                    'message': f"Curl command failed: {result['stderr']}",
                     'debug_info': debug_info
                 })
                 
-        except subprocess.TimeoutExpired:
-            debug_info.append("Curl command timed out after 30 seconds")
-            log_error("Curl command timed out")
+        except DockerAPIError as e:
+            debug_info.append(f"Curl command failed: {e}")
+            log_error(f"Curl command failed: {e}")
             
             # Save failure status
-            settings['last_mam_push_status'] = 'failed'
-            settings['last_mam_push_mode'] = mode
-            settings['last_mam_push_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            save_settings(settings)
+            with settings_lock:
+                settings = load_settings()
+                set_mam_push_status(settings, target, 'failed', mode)
+                save_settings(settings)
             
             return jsonify({
                 'success': False,
-                'message': 'Curl command timed out after 30 seconds',
+                'message': f'Curl command failed: {str(e)}',
                 'debug_info': debug_info
             })
             
@@ -1796,11 +3579,10 @@ def _qbittorrent_send_cookie_internal(mode='Advanced Mode'):
         log_info(f"qBittorrent send cookie error: {str(e)}")
         
         # Save failure status
-        settings = load_settings()
-        settings['last_mam_push_status'] = 'failed'
-        settings['last_mam_push_mode'] = mode
-        settings['last_mam_push_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        save_settings(settings)
+        with settings_lock:
+            settings = load_settings()
+            set_mam_push_status(settings, target, 'failed', mode)
+            save_settings(settings)
         
         return jsonify({
             'success': False,
@@ -1818,21 +3600,30 @@ def api_qbittorrent_send_cookie():
             mode = request.json.get('mode', mode)
     except:
         pass  # Use default mode if request extraction fails
-    return _qbittorrent_send_cookie_internal(mode)
+    target = request_target()
+    if not target:
+        return jsonify({'success': False, 'message': 'Unknown qBittorrent target'})
+    return _qbittorrent_send_cookie_internal(mode, target)
 
 @app.route('/api/qbittorrent_logout', methods=['POST'])
 def api_qbittorrent_logout():
-    """Disconnect from qBittorrent container console"""
-    log_info("qBittorrent Logout request started")
+    """Route handler - disconnects from the requested (default: primary) target"""
+    target = request_target()
+    if not target:
+        return jsonify({'success': False, 'message': 'Unknown qBittorrent target'})
+    return _qbittorrent_logout_internal(target)
+
+def _qbittorrent_logout_internal(target=None):
+    """Disconnect from a qBittorrent target's container console"""
+    target = target or get_qbittorrent_target()
+    log_info(f"qBittorrent Logout request started ({target['container']})")
     debug_info = []
     
     try:
-        global qbittorrent_container_connected
-        
-        if qbittorrent_container_connected:
-            qbittorrent_container_connected = False
+        if target['container'] in qbittorrent_connected_containers:
+            qbittorrent_connected_containers.discard(target['container'])
             debug_info.append("Disconnected from container console")
-            log_info("Disconnected from binhex-qbittorrentvpn container console")
+            log_info(f"Disconnected from {target['container']} container console")
             
             return jsonify({
                 'success': True,
@@ -1858,17 +3649,23 @@ def api_qbittorrent_logout():
 
 @app.route('/api/restart_qbittorrent_container', methods=['POST'])
 def api_restart_qbittorrent_container():
-    """Restart the binhex-qbittorrentvpn Docker container"""
-    log_info("Restart qBittorrent Container request started")
+    """Route handler - restarts the requested (default: primary) target"""
+    target = request_target()
+    if not target:
+        return jsonify({'success': False, 'message': 'Unknown qBittorrent target', 'status_updates': []})
+    return _restart_qbittorrent_internal(target)
+
+def _restart_qbittorrent_internal(target=None):
+    """Restart a qBittorrent target's Docker container and wait until it is serving"""
+    target = target or get_qbittorrent_target()
+    log_info(f"Restart qBittorrent Container request started ({target['container']})")
     status_updates = []
     
     try:
-        import subprocess
-        
         # Get settings
-        settings = load_settings()
-        container_name = settings.get('qbittorrentvpn_container', 'binhex-qbittorrentvpn')
-        qbittorrent_url = settings.get('qbittorrent_url', '')
+        settings = target_settings(load_settings(), target)
+        container_name = target['container']
+        qbittorrent_url = target['url']
         restart_delay = int(settings.get('qbittorrent_restart_delay', 120))
         
         log_debug(f"Container name: {container_name}")
@@ -1892,22 +3689,8 @@ def api_restart_qbittorrent_container():
         log_info("Checking if container exists")
         
         try:
-            result = subprocess.run(
-                ['docker', 'ps', '-a', '--filter', f'name={container_name}', '--format', '{{.Names}}'],
-                capture_output=True, text=True, timeout=10
-            )
-            
-            if result.returncode != 0:
-                status_updates.append(f"Docker command failed: {result.stderr}")
-                log_info(f"Docker ps command failed: {result.stderr}")
-                return jsonify({
-                    'success': False,
-                    'message': 'Failed to check Docker container status',
-                    'status_updates': status_updates
-                })
-            
-            container_list = result.stdout.strip().split('\n')
-            if not any(container_name in name for name in container_list if name):
+            container = docker_find_container(container_name, include_stopped=True)
+            if not container:
                 status_updates.append(f"Container '{container_name}' not found")
                 log_info(f"Container '{container_name}' not found")
                 return jsonify({
@@ -1916,14 +3699,16 @@ def api_restart_qbittorrent_container():
                     'status_updates': status_updates
                 })
             
+            container_name = container['name']
             status_updates.append(f"Found container: {container_name}")
             log_info(f"Found container: {container_name}")
             
-        except subprocess.TimeoutExpired:
-            status_updates.append("Docker command timed out")
+        except DockerAPIError as e:
+            status_updates.append(f"Docker API error: {e}")
+            log_info(f"Docker container lookup failed: {e}")
             return jsonify({
                 'success': False,
-                'message': 'Docker command timed out',
+                'message': f'Failed to check Docker container status: {str(e)}',
                 'status_updates': status_updates
             })
         
@@ -1932,55 +3717,36 @@ def api_restart_qbittorrent_container():
         log_info(f"Restarting container {container_name}")
         
         try:
-            result = subprocess.run(
-                ['docker', 'restart', container_name],
-                capture_output=True, text=True, timeout=30
-            )
-            
-            if result.returncode == 0:
-                status_updates.append("Container restart command sent")
-                log_info("Container restart command successful")
-            else:
-                status_updates.append(f"Restart command failed: {result.stderr}")
-                log_info(f"Restart command failed: {result.stderr}")
-                return jsonify({
-                    'success': False,
-                    'message': f'Restart command failed: {result.stderr}',
-                    'status_updates': status_updates
-                })
-        except subprocess.TimeoutExpired:
-            status_updates.append("Restart command timed out")
+            restart_time = time.time()
+            vpn_log_offset = get_vpn_log_size(settings)
+            docker_container_action(container_name, 'restart', timeout=30)
+            status_updates.append("Container restart command sent")
+            log_info("Container restart command successful")
+        except DockerAPIError as e:
+            status_updates.append(f"Restart command failed: {e}")
+            log_info(f"Restart command failed: {e}")
             return jsonify({
                 'success': False,
-                'message': 'Restart command timed out',
+                'message': f'Restart command failed: {str(e)}',
                 'status_updates': status_updates
             })
         
-        # Monitor URL to check if container is up
-        status_updates.append(f"Monitoring {qbittorrent_url} for up to {restart_delay} seconds...")
-        log_info(f"Monitoring {qbittorrent_url} for container availability")
-        
-        start_time = time.time()
-        container_up = False
+        # Wait for the container to come up
+        status_updates.append(f"Waiting up to {restart_delay} seconds for {qbittorrent_url}...")
+        log_info(f"Waiting for {container_name} readiness (Docker events, TCP, HTTP)")
         
-        while time.time() - start_time < restart_delay:
-            try:
-                response = requests.get(qbittorrent_url, timeout=5)
-                if response.status_code in [200, 401, 403]:  # Any of these means it's up
-                    container_up = True
-                    elapsed = int(time.time() - start_time)
-                    status_updates.append(f"Container is UP after {elapsed} seconds")
-                    log_info(f"Container became accessible after {elapsed} seconds")
-                    break
-            except requests.exceptions.RequestException:
-                pass  # Not up yet, continue waiting
-            
-            time.sleep(2)  # Wait 2 seconds between checks
+        readiness = wait_for_qbittorrent_ready(container_name, qbittorrent_url, restart_time, restart_delay, status_updates)
         
-        if container_up:
+        if readiness['ready']:
+            status_updates.append(f"Container is UP after {readiness['elapsed']:.1f} seconds ({readiness['method']})")
+            log_info(f"Container became accessible after {readiness['elapsed']:.1f} seconds ({readiness['method']})")
             return jsonify({
                 'success': True,
                 'message': f'Successfully restarted {container_name}',
+                'readiness_method': readiness['method'],
+                'ready_seconds': round(readiness['elapsed'], 1),
+                'restart_time': restart_time,
+                'vpn_log_offset': vpn_log_offset,
                 'status_updates': status_updates
             })
         else:
@@ -1994,27 +3760,15 @@ def api_restart_qbittorrent_container():
             log_info(f"Stopping container {container_name}")
             
             try:
-                result = subprocess.run(
-                    ['docker', 'stop', container_name],
-                    capture_output=True, text=True, timeout=60
-                )
-                
-                if result.returncode == 0:
-                    status_updates.append("Container stopped")
-                    log_info("Container stop command successful")
-                else:
-                    status_updates.append(f"Stop command failed: {result.stderr}")
-                    log_info(f"Stop command failed: {result.stderr}")
-                    return jsonify({
-                        'success': False,
-                        'message': f'Stop command failed: {result.stderr}',
-                        'status_updates': status_updates
-                    })
-            except subprocess.TimeoutExpired:
-                status_updates.append("Stop command timed out")
+                docker_container_action(container_name, 'stop', timeout=60)
+                status_updates.append("Container stopped")
+                log_info("Container stop command successful")
+            except DockerAPIError as e:
+                status_updates.append(f"Stop command failed: {e}")
+                log_info(f"Stop command failed: {e}")
                 return jsonify({
                     'success': False,
-                    'message': 'Stop command timed out',
+                    'message': f'Stop command failed: {str(e)}',
                     'status_updates': status_updates
                 })
             
@@ -2028,55 +3782,36 @@ def api_restart_qbittorrent_container():
             log_info(f"Starting container {container_name}")
             
             try:
-                result = subprocess.run(
-                    ['docker', 'start', container_name],
-                    capture_output=True, text=True, timeout=30
-                )
-                
-                if result.returncode == 0:
-                    status_updates.append("Container start command sent")
-                    log_info("Container start command successful")
-                else:
-                    status_updates.append(f"Start command failed: {result.stderr}")
-                    log_info(f"Start command failed: {result.stderr}")
-                    return jsonify({
-                        'success': False,
-                        'message': f'Start command failed: {result.stderr}',
-                        'status_updates': status_updates
-                    })
-            except subprocess.TimeoutExpired:
-                status_updates.append("Start command timed out")
+                restart_time = time.time()
+                vpn_log_offset = get_vpn_log_size(settings)
+                docker_container_action(container_name, 'start', timeout=30)
+                status_updates.append("Container start command sent")
+                log_info("Container start command successful")
+            except DockerAPIError as e:
+                status_updates.append(f"Start command failed: {e}")
+                log_info(f"Start command failed: {e}")
                 return jsonify({
                     'success': False,
-                    'message': 'Start command timed out',
+                    'message': f'Start command failed: {str(e)}',
                     'status_updates': status_updates
                 })
             
-            # Monitor again
-            status_updates.append(f"Monitoring {qbittorrent_url} for up to {restart_delay} seconds...")
-            log_info(f"Monitoring {qbittorrent_url} again after manual start")
-            
-            start_time = time.time()
-            container_up = False
+            # Wait again
+            status_updates.append(f"Waiting up to {restart_delay} seconds for {qbittorrent_url}...")
+            log_info(f"Waiting for {container_name} readiness again after manual start")
             
-            while time.time() - start_time < restart_delay:
-                try:
-                    response = requests.get(qbittorrent_url, timeout=5)
-                    if response.status_code in [200, 401, 403]:
-                        container_up = True
-                        elapsed = int(time.time() - start_time)
-                        status_updates.append(f"Container is UP after {elapsed} seconds")
-                        log_info(f"Container became accessible after {elapsed} seconds (fallback)")
-                        break
-                except requests.exceptions.RequestException:
-                    pass
-                
-                time.sleep(2)
+            readiness = wait_for_qbittorrent_ready(container_name, qbittorrent_url, restart_time, restart_delay, status_updates)
             
-            if container_up:
+            if readiness['ready']:
+                status_updates.append(f"Container is UP after {readiness['elapsed']:.1f} seconds ({readiness['method']})")
+                log_info(f"Container became accessible after {readiness['elapsed']:.1f} seconds (fallback, {readiness['method']})")
                 return jsonify({
                     'success': True,
                     'message': f'Successfully restarted {container_name} using fallback method',
+                    'readiness_method': readiness['method'],
+                    'ready_seconds': round(readiness['elapsed'], 1),
+                    'restart_time': restart_time,
+                    'vpn_log_offset': vpn_log_offset,
                     'status_updates': status_updates
                 })
             else:
@@ -2097,6 +3832,140 @@ def api_restart_qbittorrent_container():
             'status_updates': status_updates
         })
 
+# Prowlarr REST API client
+#
+# Used instead of the Selenium UI automation when a Prowlarr API key is configured
+# (Settings > General in Prowlarr). Requests share one pooled session per API key, so
+# additional Prowlarr instances (cookie consumers) can be updated concurrently.
+
+prowlarr_api_sessions = {}
+
+def prowlarr_api_enabled(settings):
+    """Check whether Prowlarr should be driven through its REST API"""
+    return bool(settings.get('prowlarr_api_key', '').strip())
+
+def get_prowlarr_base_url(settings):
+    """Prowlarr base URL with scheme and without trailing slash"""
+    prowlarr_url = settings.get('prowlarr_url', '').strip()
+    if prowlarr_url and not prowlarr_url.startswith('http'):
+        prowlarr_url = 'http://' + prowlarr_url
+    return prowlarr_url.rstrip('/')
+
+def get_prowlarr_api_session(settings):
+    """Get or create the pooled requests session for the Prowlarr API"""
+    api_key = settings.get('prowlarr_api_key', '').strip()
+    prowlarr_api_session = prowlarr_api_sessions.get(api_key)
+    if prowlarr_api_session is None:
+        prowlarr_api_session = requests.Session()
+        prowlarr_api_session.headers.update({
+            'X-Api-Key': api_key,
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        })
+        retry_strategy = Retry(
+            total=3,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=['GET'],
+            backoff_factor=1
+        )
+        adapter = HTTPAdapter(max_retries=retry_strategy)
+        prowlarr_api_session.mount("http://", adapter)
+        prowlarr_api_session.mount("https://", adapter)
+        prowlarr_api_sessions[api_key] = prowlarr_api_session
+    return prowlarr_api_session
+
+def prowlarr_api_status(settings):
+    """Check the Prowlarr API is reachable and the API key is accepted"""
+    response = get_prowlarr_api_session(settings).get(f"{get_prowlarr_base_url(settings)}/api/v1/system/status", timeout=10)
+    if response.status_code == 401:
+        return {'success': False, 'message': 'Prowlarr rejected the API key'}
+    if response.status_code != 200:
+        return {'success': False, 'message': f'Prowlarr API returned HTTP {response.status_code}'}
+    return {'success': True, 'message': 'Prowlarr API reachable', 'version': response.json().get('version', 'unknown')}
+
+def _is_mam_indexer(indexer):
+    """Check whether a Prowlarr indexer definition is MyAnonamouse"""
+    names = [indexer.get('definitionName', ''), indexer.get('implementation', ''), indexer.get('name', '')]
+    return any('myanonamouse' in (name or '').lower() for name in names)
+
+def _get_mam_id_field(indexer):
+    """Return the mamId field of a MyAnonamouse indexer definition"""
+    for field in indexer.get('fields', []):
+        if (field.get('name') or '').lower() == 'mamid' or (field.get('label') or '').lower() == 'mam id':
+            return field
+    return None
+
+def prowlarr_api_find_mam_indexer(settings, cache_key='prowlarr_mam_indexer_id'):
+    """Fetch the MyAnonamouse indexer definition from the Prowlarr API
+
+    Uses the indexer ID cached under cache_key when possible and only scans the
+    indexer list when there is no cached ID or it no longer points at MAM.
+    """
+    base_url = get_prowlarr_base_url(settings)
+    session = get_prowlarr_api_session(settings)
+
+    cached_id = settings.get(cache_key)
+    if cached_id:
+        response = session.get(f"{base_url}/api/v1/indexer/{cached_id}", timeout=15)
+        if response.status_code == 200 and _is_mam_indexer(response.json()):
+            indexer = response.json()
+            return {'success': True, 'message': f"Loaded cached indexer '{indexer.get('name')}' (id {cached_id})", 'indexer': indexer}
+        log_info(f"Cached Prowlarr indexer id {cached_id} is no longer MyAnonamouse - rescanning")
+
+    response = session.get(f"{base_url}/api/v1/indexer", timeout=15)
+    if response.status_code != 200:
+        return {'success': False, 'message': f'Indexer list returned HTTP {response.status_code}'}
+    for indexer in response.json():
+        if _is_mam_indexer(indexer):
+            if indexer.get('id') != cached_id:
+                with settings_lock:
+                    current_settings = load_settings()
+                    current_settings[cache_key] = indexer.get('id')
+                    save_settings(current_settings)
+            return {'success': True, 'message': f"Found indexer '{indexer.get('name')}' (id {indexer.get('id')})", 'indexer': indexer}
+    return {'success': False, 'message': 'MyAnonamouse indexer not found in Prowlarr'}
+
+def prowlarr_api_update_mam_cookie(settings, cookie_value, debug_info, cache_key='prowlarr_mam_indexer_id'):
+    """Set the MyAnonamouse indexer mamId field, test it and save it over the Prowlarr API"""
+    base_url = get_prowlarr_base_url(settings)
+    session = get_prowlarr_api_session(settings)
+
+    found = prowlarr_api_find_mam_indexer(settings, cache_key)
+    debug_info.append(f"API: {found['message']}")
+    if not found['success']:
+        return {'success': False, 'message': found['message'], 'test_result': 'not_run'}
+    indexer = found['indexer']
+
+    mam_id_field = _get_mam_id_field(indexer)
+    if not mam_id_field:
+        return {'success': False, 'message': 'Could not find Mam Id field in indexer definition', 'test_result': 'not_run'}
+    if mam_id_field.get('value') == cookie_value:
+        debug_info.append("API: Mam Id already holds the current cookie - skipping save and test")
+        log_info("Prowlarr already has the current cookie - no change")
+        return {'success': True, 'changed': False, 'message': 'Prowlarr already has the current cookie - no change', 'test_result': 'skipped'}
+    mam_id_field['value'] = cookie_value
+    debug_info.append("API: Updated Mam Id field")
+
+    # Test the updated definition; like the UI flow, a failed test does not block the save
+    test_response = session.post(f"{base_url}/api/v1/indexer/test", json=indexer, timeout=60)
+    if test_response.status_code == 200:
+        test_result = 'success'
+        debug_info.append("API: Test passed - cookie is valid")
+        log_info("✓ Prowlarr cookie test PASSED")
+    else:
+        test_result = 'failure'
+        debug_info.append(f"API: Test failed (HTTP {test_response.status_code}): {test_response.text[:200]} - saving anyway")
+        log_info("✗ Prowlarr cookie test FAILED")
+
+    save_response = session.put(f"{base_url}/api/v1/indexer/{indexer['id']}", params={'forceSave': 'true'}, json=indexer, timeout=30)
+    if save_response.status_code not in (200, 202):
+        debug_info.append(f"API: Save returned HTTP {save_response.status_code}: {save_response.text[:200]}")
+        return {'success': False, 'message': f'Failed to save: Prowlarr returned HTTP {save_response.status_code}', 'test_result': test_result}
+
+    debug_info.append("API: ✓ Indexer saved")
+    log_info("✓ Successfully updated Prowlarr MyAnonamouse indexer (API)")
+    return {'success': True, 'changed': True, 'message': f'Successfully updated Prowlarr cookie (Test: {test_result})', 'test_result': test_result}
+
 # Global variable to track Prowlarr browser state
 prowlarr_driver = None
 
@@ -2141,6 +4010,24 @@ def api_prowlarr_login():
         
         debug_info.append(f"Connecting to Prowlarr at: {prowlarr_url}")
         log_info(f"Connecting to Prowlarr at: {prowlarr_url}")
+
+        # With an API key no browser is needed
+        if prowlarr_api_enabled(settings):
+            status = prowlarr_api_status(settings)
+            debug_info.append(f"API: {status['message']}")
+            if not status['success']:
+                return jsonify({
+                    'success': False,
+                    'message': f"Failed to connect to Prowlarr API: {status['message']}",
+                    'debug_info': debug_info
+                })
+            log_info(f"Connected to Prowlarr API (version {status['version']})")
+            return jsonify({
+                'success': True,
+                'message': f"Successfully connected to Prowlarr API (version {status['version']})",
+                'mode': 'api',
+                'debug_info': debug_info
+            })
         
         # Create browser instance
         chrome_options = Options()
@@ -2226,6 +4113,29 @@ def api_prowlarr_send_cookie():
         from selenium.common.exceptions import TimeoutException, NoSuchElementException
         
         global prowlarr_driver
+
+        settings = load_settings()
+        if prowlarr_api_enabled(settings):
+            prowlarr_cookie = settings.get('prowlarr_session_cookie', '')
+            if not prowlarr_cookie or prowlarr_cookie == '0':
+                debug_info.append("No Prowlarr cookie found")
+                return jsonify({
+                    'success': False,
+                    'message': 'No Prowlarr cookie found. Please create one in Step 2 first.',
+                    'debug_info': debug_info
+                })
+            log_info("Updating Prowlarr cookie via API")
+            result = prowlarr_api_update_mam_cookie(settings, prowlarr_cookie, debug_info)
+            if result['success']:
+                record_prowlarr_push(settings)
+            return jsonify({
+                'success': result['success'],
+                'message': result['message'],
+                'test_result': result['test_result'],
+                'changed': result.get('changed', True),
+                'mode': 'api',
+                'debug_info': debug_info
+            })
         
         if not prowlarr_driver:
             debug_info.append("No active Prowlarr browser session")
@@ -2384,6 +4294,29 @@ def api_prowlarr_send_cookie():
             
             debug_info.append("Found Mam Id field")
             log_info("Mam Id field located")
+
+            # Nothing to do if Prowlarr already holds the current cookie
+            if (mam_id_field.get_attribute('value') or '') == prowlarr_cookie:
+                debug_info.append("Mam Id already holds the current cookie - skipping Test and Save")
+                log_info("Prowlarr already has the current cookie - no change")
+                close_button = None
+                for btn in prowlarr_driver.find_elements(By.CSS_SELECTOR, 'button'):
+                    if btn.text.strip().lower() in ('cancel', 'close'):
+                        close_button = btn
+                        break
+                if close_button:
+                    close_button.click()
+                else:
+                    from selenium.webdriver.common.keys import Keys
+                    mam_id_field.send_keys(Keys.ESCAPE)
+                record_prowlarr_push(settings)
+                return jsonify({
+                    'success': True,
+                    'changed': False,
+                    'message': 'Prowlarr already has the current cookie - no change',
+                    'test_result': 'skipped',
+                    'debug_info': debug_info
+                })
             
             # Clear and enter new cookie
             mam_id_field.clear()
@@ -2506,9 +4439,11 @@ def api_prowlarr_send_cookie():
             
             debug_info.append("✓ Prowlarr cookie update completed")
             log_info("✓ Successfully updated Prowlarr MyAnonamouse indexer")
+            record_prowlarr_push(settings)
             
             return jsonify({
                 'success': True,
+                'changed': True,
                 'message': f'Successfully updated Prowlarr cookie (Test: {test_result})',
                 'test_result': test_result,
                 'debug_info': debug_info
@@ -2560,6 +4495,13 @@ def api_prowlarr_logout():
                 })
             finally:
                 prowlarr_driver = None
+        elif prowlarr_api_enabled(load_settings()):
+            debug_info.append("API mode - no browser session to close")
+            return jsonify({
+                'success': True,
+                'message': 'Prowlarr API mode - nothing to log out',
+                'debug_info': debug_info
+            })
         else:
             debug_info.append("No active browser session")
             return jsonify({
@@ -2577,18 +4519,1716 @@ def api_prowlarr_logout():
             'debug_info': debug_info
         })
 
-# Basic Mode Orchestration Endpoints
+# Offline IP -> ASN index
+#
+# Optional. Loads a user-supplied IPv4 range database (iptoasn.com ip2asn-v4.tsv,
+# optionally gzipped, or "start,end,asn" CSV with dotted or integer addresses) into
+# three parallel unsigned-int arrays sorted by range start. A lookup is one bisect.
+# Rows go straight into the arrays, so loading never holds a Python object per range.
 
-@app.route('/api/fix_myanonamouse', methods=['POST'])
-def api_fix_myanonamouse():
-    """Orchestrate Fix MyAnonamouse workflow"""
-    log_info("Fix MyAnonamouse orchestration started")
-    steps = []
-    overall_success = True
-    
+asn_index = None
+asn_index_lock = threading.Lock()
+
+def _parse_ipv4(value):
+    """Dotted or integer IPv4 address -> int, or None for anything else (e.g. IPv6)"""
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return number if number <= 0xFFFFFFFF else None
+    if value.count('.') != 3:
+        return None
     try:
+        return int.from_bytes(socket.inet_aton(value), 'big')
+    except OSError:
+        return None
+
+def load_asn_index(path):
+    """Build the sorted array-backed range index from an ASN database file"""
+    start_time = time.time()
+    opener = gzip.open if path.endswith('.gz') else open
+    starts, ends, asns = array('I'), array('I'), array('I')
+    with opener(path, 'rt', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            parts = re.split(r'[\t,]', line.strip())
+            if len(parts) < 3:
+                continue
+            start, end = _parse_ipv4(parts[0]), _parse_ipv4(parts[1])
+            asn_text = parts[2].strip().upper().removeprefix('AS')
+            if start is None or end is None or not asn_text.isdigit():
+                continue
+            asn = int(asn_text)
+            if asn:  # ASN 0 marks unrouted space
+                starts.append(start)
+                ends.append(end)
+                asns.append(asn)
+
+    # Published databases come sorted; anything else is reordered by a sorted permutation
+    if any(starts[i] > starts[i + 1] for i in range(len(starts) - 1)):
+        order = array('I', sorted(range(len(starts)), key=starts.__getitem__))
+        starts, ends, asns = (array('I', (column[i] for i in order)) for column in (starts, ends, asns))
+
+    return {
+        'path': path,
+        'mtime': os.path.getmtime(path),
+        'starts': starts,
+        'ends': ends,
+        'asns': asns,
+        'load_seconds': time.time() - start_time
+    }
+
+def get_asn_index(settings):
+    """Return the loaded ASN index, (re)loading it when the configured file changes"""
+    global asn_index
+    path = settings.get('asn_database_path', '').strip()
+    if not path or not os.path.exists(path):
+        return None
+    with asn_index_lock:
+        if asn_index is None or asn_index['path'] != path or asn_index['mtime'] != os.path.getmtime(path):
+            try:
+                asn_index = load_asn_index(path)
+                log_info(f"Loaded ASN index from {path}: {len(asn_index['starts'])} ranges in {asn_index['load_seconds']:.2f}s")
+            except (OSError, ValueError) as e:
+                log_error(f"Could not load ASN database {path}: {e}")
+                asn_index = None
+        return asn_index
+
+def lookup_asn(index, ip_address):
+    """ASN announcing an IPv4 address, or None if unknown"""
+    ip = _parse_ipv4(ip_address or '')
+    if index is None or ip is None:
+        return None
+    i = bisect.bisect_right(index['starts'], ip) - 1
+    if i >= 0 and ip <= index['ends'][i]:
+        return index['asns'][i]
+    return None
+
+def same_asn(settings, ip_a, ip_b):
+    """True/False when both IPs resolve in the ASN index, None when it cannot tell"""
+    index = get_asn_index(settings)
+    asn_a, asn_b = lookup_asn(index, ip_a), lookup_asn(index, ip_b)
+    if asn_a is None or asn_b is None:
+        return None
+    return asn_a == asn_b
+
+def asn_index_memory_report(index):
+    """Bytes used by the index arrays versus an equivalent list of tuples"""
+    ranges = len(index['starts'])
+    array_bytes = sum(sys.getsizeof(index[key]) for key in ('starts', 'ends', 'asns'))
+    # A list of (start, end, asn) tuples: list slot + tuple + three ints per range
+    sample = (index['starts'][0], index['ends'][0], index['asns'][0]) if ranges else (0, 0, 0)
+    tuple_bytes = sys.getsizeof([None] * ranges) + ranges * (sys.getsizeof(sample) + sum(sys.getsizeof(v) for v in sample))
+    return {
+        'ranges': ranges,
+        'array_bytes': array_bytes,
+        'bytes_per_range': round(array_bytes / ranges, 1) if ranges else 0,
+        'tuple_list_bytes_estimate': tuple_bytes
+    }
+
+# MAM rate-limit cooldown
+#
+# dynamicSeedbox.php answers "Last change too recent" while MAM's change window is
+# closed. When that happens we remember until when, refuse further pushes until then
+# and schedule one automatic retry for when the window opens (persisted in settings so
+# it survives a container restart). Each qBittorrent target has its own MAM session and
+# therefore its own window and retry.
+
+deferred_push_timers = {}
+deferred_push_lock = threading.Lock()
+
+def get_mam_cooldown(settings=None, target=None):
+    """Current cooldown state: {'active', 'until', 'until_ts', 'remaining_seconds', 'deferred_push_at'}"""
+    settings = settings or load_settings()
+    target = target or get_qbittorrent_target(settings=settings)
+    until_ts = settings.get(target_setting_key(target, 'mam_cooldown_until')) or 0
+    remaining = until_ts - time.time()
+    return {
+        'active': remaining > 0,
+        'until': datetime.fromtimestamp(until_ts).strftime('%Y-%m-%d %H:%M:%S') if until_ts else None,
+        'until_ts': until_ts,
+        'remaining_seconds': max(int(remaining), 0),
+        'deferred_push_at': settings.get(target_setting_key(target, 'mam_deferred_push_at'))
+    }
+
+def record_mam_change_accepted(settings, target):
+    """Note an accepted change; the caller saves settings"""
+    settings[target_setting_key(target, 'mam_last_change_time')] = time.time()
+    settings.pop(target_setting_key(target, 'mam_cooldown_until'), None)
+
+def record_mam_rate_limited(settings, target):
+    """Work out when the change window opens again; the caller saves settings"""
+    window = int(settings.get('mam_cooldown_minutes', 60)) * 60
+    last_change = settings.get(target_setting_key(target, 'mam_last_change_time'))
+    now = time.time()
+    until_ts = last_change + window if last_change and last_change + window > now else now + window
+    settings[target_setting_key(target, 'mam_cooldown_until')] = until_ts
+    return until_ts
+
+def _run_deferred_push(target_id):
+    """Timer callback: log into the target's container, push its current cookie and log out"""
+    with deferred_push_lock:
+        deferred_push_timers.pop(target_id, None)
+    target = get_qbittorrent_target(target_id)
+    if not target:
+        log_warning(f"Deferred push: qBittorrent target '{target_id}' no longer configured")
+        return
+    with settings_lock:
+        settings = load_settings()
+        settings.pop(target_setting_key(target, 'mam_deferred_push_at'), None)
+        save_settings(settings)
+
+    # Queued like any renewal; a run already renewing this target makes the retry moot
+    job, attached = submit_job('Deferred Push', lambda: _deferred_push_internal(target), {f"renewal:{target['id']}"})
+    if attached:
+        log_info(f"Deferred push ({target['name']}): covered by in-flight job {job['id']} ({job['kind']})")
+
+def _deferred_push_internal(target):
+    """Log into the target's container, push its current cookie and log out"""
+    log_info(f"Running deferred MAM cookie push ({target['name']})")
+    try:
+        login = _qbittorrent_login_internal(target).get_json()
+        if not login['success']:
+            log_error(f"Deferred push: qBittorrent login failed: {login['message']}")
+            return {'success': False, 'message': login['message']}
+        result = _qbittorrent_send_cookie_internal(mode='Deferred Retry', target=target).get_json()
+        if result['success']:
+            log_info(f"✓ Deferred MAM cookie push succeeded ({target['name']})")
+        else:
+            log_warning(f"Deferred MAM cookie push failed ({target['name']}): {result['message']}")
+        return {'success': result['success'], 'message': result['message']}
+    except Exception as e:
+        log_error(f"Deferred push error: {e}")
+        return {'success': False, 'message': str(e)}
+    finally:
+        _qbittorrent_logout_internal(target)
+
+def schedule_deferred_push(run_at_ts, target=None):
+    """(Re)arm a target's deferred push timer and persist when it will run"""
+    target = target or get_qbittorrent_target()
+    with deferred_push_lock:
+        if target['id'] in deferred_push_timers:
+            deferred_push_timers[target['id']].cancel()
+        timer = threading.Timer(max(run_at_ts - time.time(), 0), _run_deferred_push, args=(target['id'],))
+        timer.daemon = True
+        timer.name = f"DeferredPush-{target['id']}"
+        timer.start()
+        deferred_push_timers[target['id']] = timer
+
+    run_at = datetime.fromtimestamp(run_at_ts).strftime('%Y-%m-%d %H:%M:%S')
+    with settings_lock:
+        settings = load_settings()
+        settings[target_setting_key(target, 'mam_deferred_push_at')] = run_at
+        save_settings(settings)
+    log_info(f"Deferred MAM cookie push for {target['name']} scheduled for {run_at}")
+    return run_at
+
+def restore_deferred_push():
+    """Re-arm deferred pushes that were pending when the app last stopped"""
+    settings = load_settings()
+    for target in get_qbittorrent_targets(settings):
+        pending = settings.get(target_setting_key(target, 'mam_deferred_push_at'))
+        if not pending:
+            continue
+        try:
+            run_at_ts = datetime.strptime(pending, '%Y-%m-%d %H:%M:%S').timestamp()
+        except ValueError:
+            continue
+        # Give the app a moment to finish starting if the retry is already due
+        schedule_deferred_push(max(run_at_ts, time.time() + 30), target)
+
+def mam_cooldown_message(cooldown, target):
+    """Describe an active cooldown of a target, making sure its deferred push is scheduled"""
+    run_at = cooldown['deferred_push_at'] or schedule_deferred_push(cooldown['until_ts'] + 30, target)
+    return f"MAM change window closed until {cooldown['until']} - cookie push deferred to {run_at}"
+
+def mam_cooldown_push_step(consumer):
+    """SKIPPED 'Send Cookie to MAM' step when the consumer's target is in cooldown, or None"""
+    cooldown = get_mam_cooldown(load_settings(), consumer['target'])
+    if not cooldown['active']:
+        return None
+    message = mam_cooldown_message(cooldown, consumer['target'])
+    log_info(f"- {consumer['step_name']}: {message}")
+    return {'name': consumer['step_name'], 'status': 'SKIPPED', 'message': message}
+
+def mam_cooldown_step(targets=None):
+    """Step describing an active cooldown on every target (making sure retries are scheduled), or None"""
+    settings = load_settings()
+    targets = targets or get_qbittorrent_targets(settings)
+    cooldowns = [(target, get_mam_cooldown(settings, target)) for target in targets]
+    if not all(cooldown['active'] for _, cooldown in cooldowns):
+        return None
+    messages = []
+    for target, cooldown in cooldowns:
+        prefix = '' if len(targets) == 1 else f"{target['name']}: "
+        messages.append(prefix + mam_cooldown_message(cooldown, target))
+    message = '; '.join(messages)
+    log_info(f"MAM cooldown: {message}")
+    return {'name': 'Check MAM Cooldown', 'status': 'SKIPPED', 'message': message}
+
+# Change detection
+#
+# A renewal only matters when the VPN IP (qBittorrent session) or the external IP
+# (Prowlarr session) moved, or the stored cookie is not the one that was last pushed.
+
+def cookie_fingerprint(cookie_value):
+    """Short, non-reversible fingerprint of a cookie for change detection"""
+    if not cookie_value or cookie_value == '0':
+        return None
+    return hashlib.sha256(cookie_value.encode('utf-8')).hexdigest()[:16]
+
+def record_prowlarr_push(settings, key='last_prowlarr_cookie_fingerprint'):
+    """Remember the Prowlarr cookie that Prowlarr (or another API consumer) now holds"""
+    with settings_lock:
+        current_settings = load_settings()
+        current_settings[key] = cookie_fingerprint(settings.get('prowlarr_session_cookie'))
+        save_settings(current_settings)
+
+def renewal_precheck(settings, include_prowlarr=True):
+    """Decide whether a renewal run would change anything
+
+    Returns {'changed': bool, 'reasons': [...], 'push_only': [targets], 'vpn_ip': ...,
+    'external_ip': ...}. push_only lists targets whose VPN IP moved within the same ASN:
+    their session stays valid but MAM still has to be told the new IP. Anything that
+    cannot be verified counts as changed.
+    """
+    reasons = []
+    push_only = []
+    vpn_ip = None
+    for target in get_qbittorrent_targets(settings):
+        prefix = '' if target['primary'] else f"{target['name']}: "
+        target_vpn_ip = detect_vpn_ip(target_settings(settings, target), [])
+        vpn_ip = vpn_ip or target_vpn_ip
+        last_vpn_ip = settings.get(target_setting_key(target, 'last_pushed_vpn_ip'))
+        qb_fingerprint = cookie_fingerprint(settings.get(f"{target['settings_prefix']}_session_cookie"))
+
+        if settings.get(target_setting_key(target, 'last_mam_push_status')) != 'success':
+            reasons.append(f'{prefix}last qBittorrent push did not succeed')
+        if target_vpn_ip == 'Not Found':
+            reasons.append(f'{prefix}current VPN IP unknown')
+        elif target_vpn_ip != last_vpn_ip:
+            # qBittorrent sessions are ASN-locked, so a move within the same ASN needs no new session
+            qb_use_asn = (settings.get(f"{target['settings_prefix']}_session_spec") or {}).get('use_asn', True)
+            if qb_use_asn and same_asn(settings, last_vpn_ip, target_vpn_ip):
+                log_info(f"Change check: {prefix}VPN IP {last_vpn_ip} -> {target_vpn_ip} stays in AS{lookup_asn(get_asn_index(settings), target_vpn_ip)}")
+                push_only.append(target)
+            else:
+                reasons.append(f'{prefix}VPN IP changed ({last_vpn_ip} -> {target_vpn_ip})')
+        if not qb_fingerprint or qb_fingerprint != settings.get(target_setting_key(target, 'last_pushed_cookie_fingerprint')):
+            reasons.append(f'{prefix}qBittorrent cookie differs from the last pushed cookie')
+
+    external_ip = None
+    if include_prowlarr:
+        try:
+            external_ip = requests.get('https://api.ipify.org', timeout=10).text.strip()
+        except requests.exceptions.RequestException:
+            reasons.append('current external IP unknown')
+        prowlarr_ip = (settings.get('prowlarr_session_spec') or {}).get('ip_address')
+        if external_ip and external_ip != prowlarr_ip:
+            reasons.append(f'external IP changed ({prowlarr_ip} -> {external_ip})')
+        prowlarr_fingerprint = cookie_fingerprint(settings.get('prowlarr_session_cookie'))
+        if not prowlarr_fingerprint or prowlarr_fingerprint != settings.get('last_prowlarr_cookie_fingerprint'):
+            reasons.append('Prowlarr cookie differs from the last pushed cookie')
+        for consumer in get_cookie_consumers(settings):
+            if consumer['kind'] == 'arr' and prowlarr_fingerprint != settings.get(consumer['fingerprint_key']):
+                reasons.append(f"{consumer['name']} does not hold the current Prowlarr cookie")
+
+    return {'changed': bool(reasons), 'reasons': reasons, 'push_only': push_only, 'vpn_ip': vpn_ip, 'external_ip': external_ip}
+
+def run_change_check(include_prowlarr=True, mode=None):
+    """Run the pre-check unless disabled or forced
+
+    Returns None when a full renewal is needed, otherwise the steps of the short run:
+    'Check For Changes' plus, for targets whose VPN IP moved within the same ASN, the
+    login / Send Cookie to MAM / logout push that tells MAM the new IP (no new sessions).
+    """
+    settings = load_settings()
+    request_data = request.get_json(silent=True) if has_request_context() else None
+    if (request_data or {}).get('force'):
+        log_info("Change check: forced full run")
+        return None
+    if not settings.get('skip_if_unchanged', False):
+        return None
+
+    precheck = renewal_precheck(settings, include_prowlarr)
+    if precheck['changed']:
+        log_info(f"Change check: {'; '.join(precheck['reasons'])} - running full workflow")
+        return None
+
+    push_targets = precheck['push_only']
+    if push_targets:
+        names = ', '.join(target['name'] for target in push_targets)
+        message = f"VPN IP of {names} moved within the same ASN - sessions kept, pushing the new IP to MAM"
+    else:
+        message = f"VPN IP {precheck['vpn_ip']} unchanged and current cookies already pushed - nothing to renew"
+    log_info(f"Change check: {message}")
+    steps = [{'name': 'Check For Changes', 'status': 'SKIPPED', 'message': message}]
+
+    target_ids = {target['id'] for target in push_targets}
+    consumers = [consumer for consumer in get_cookie_consumers(settings)
+                 if consumer['kind'] == 'qbittorrent' and consumer['target']['id'] in target_ids]
+    for push in push_cookie_to_consumers(consumers, mode):
+        steps.extend(push['steps'])
+    return steps
+
+# Per-target phases of Fix MyAnonamouse / Fix All
+#
+# Each phase handles one qBittorrent target and returns that target's steps; the
+# orchestrators run a phase for all targets with run_for_targets and merge the steps
+# in target order. The primary target keeps the original step names.
+
+def restart_target_phase(target, require_vpn):
+    """Restart one target, wait for its VPN tunnel and work out its VPN IP
+
+    With require_vpn a failed restart ends the phase without a VPN IP; otherwise the
+    VPN IP is read from the existing log when the container was not restarted.
+    """
+    steps = []
+    result = {'target': target, 'steps': steps, 'restarted': False, 'ready': False, 'vpn_ip': None}
+    restart_name = target_step_name('Restart qBittorrent', target)
+    wait_name = target_step_name('Wait for VPN', target)
+
+    restart_data = {}
+    clock = time.time()
+    try:
+        if not wait_for_overrun_resources([f"docker:{target['container']}"], OVERRUN_RESOURCE_WAIT, restart_name):
+            raise Exception('An earlier push to this container overran its timeout and is still running')
+        restart_data = _restart_qbittorrent_internal(target).get_json()
+        if restart_data['success']:
+            steps.append({'name': restart_name, 'status': 'SUCCESS', 'message': restart_data['message']})
+            log_info(f"✓ {restart_name}: Success")
+            result['restarted'] = True
+        else:
+            steps.append({'name': restart_name, 'status': 'FAILED', 'message': restart_data['message']})
+            log_error(f"✗ {restart_name}: {restart_data['message']}")
+    except Exception as e:
+        steps.append({'name': restart_name, 'status': 'ERROR', 'message': str(e)})
+        log_error(f"✗ {restart_name} error: {e}")
+    clock = stamp_steps(steps, clock)
+
+    if 'vpn_log_offset' not in restart_data:
+        if not require_vpn:
+            steps.append({'name': wait_name, 'status': 'SKIPPED', 'message': 'Container was not restarted'})
+            log_info(f"- {wait_name}: Skipped (no restart)")
+            result['vpn_ip'] = detect_vpn_ip(target_settings(load_settings(), target), [])
+            stamp_steps(steps, clock)
+        return result
+
+    # Only the post-restart IP seen by the VPN gate is trusted
+    vpn_gate = wait_for_vpn_ip(target_settings(load_settings(), target), restart_data['vpn_log_offset'], [])
+    if vpn_gate['ready']:
+        steps.append({'name': wait_name, 'status': 'SUCCESS', 'message': vpn_gate['message']})
+        log_info(f"✓ {wait_name}: {vpn_gate['message']}")
+        result['ready'] = True
+        result['vpn_ip'] = vpn_gate['vpn_ip']
+    else:
+        steps.append({'name': wait_name, 'status': 'FAILED', 'message': vpn_gate['message']})
+        log_error(f"✗ {wait_name}: {vpn_gate['message']}")
+        result['vpn_ip'] = 'Not Found'
+    stamp_steps(steps, clock)
+    return result
+
+def get_ips_step(target, ext_ip, vpn_ip):
+    """'Get IPs' step for one target (the primary's also reports the external IP)"""
+    name = target_step_name('Get IPs', target)
+    if vpn_ip and vpn_ip != 'Not Found' and (ext_ip != 'Error' or not target['primary']):
+        message = f"External: {ext_ip}, VPN: {vpn_ip}" if target['primary'] else f"VPN: {vpn_ip}"
+        log_info(f"✓ {name}: {message}")
+        return {'name': name, 'status': 'SUCCESS', 'message': message}
+    log_info(f"✗ {name}: Failed to retrieve")
+    return {'name': name, 'status': 'FAILED', 'message': 'Could not retrieve IPs'}
+
+def qbittorrent_send_step(target, mode):
+    """'Send Cookie to MAM' step for one target"""
+    send_name = target_step_name('Send Cookie to MAM', target)
+    try:
+        data = _qbittorrent_send_cookie_internal(mode=mode, target=target).get_json()
+        if data.get('deferred'):
+            log_info(f"- {send_name}: {data['message']}")
+            return {'name': send_name, 'status': 'DEFERRED', 'message': data['message']}
+        if data['success']:
+            log_info(f"✓ {send_name}: Success")
+            return {'name': send_name, 'status': 'SUCCESS', 'message': data['message']}
+        log_info(f"✗ {send_name}: {data['message']}")
+        return {'name': send_name, 'status': 'FAILED', 'message': data['message']}
+    except Exception as e:
+        log_info(f"✗ {send_name} error: {e}")
+        return {'name': send_name, 'status': 'ERROR', 'message': str(e)}
+
+def push_target_phase(target, mode, deadline=None):
+    """Log into one target's container, send its cookie to MAM and log out again
+
+    Login and logout are retried under the Docker retry policy. The cookie is sent
+    to MAM only once: a failed send may still have reached MAM, and its failures
+    say nothing about Docker, so they do not count against the Docker breaker.
+    """
+    login_name = target_step_name('Login qBittorrent', target)
+    logout_name = target_step_name('Logout qBittorrent', target)
+
+    def docker_step(name, route_func):
+        def error_step(message):
+            log_error(f"✗ {name}: {message}")
+            return {'name': name, 'status': 'ERROR', 'message': message}
+        return run_with_policy(lambda: [route_step(name, route_func)], 'docker', error_step, deadline)
+
+    steps = []
+    clock = time.time()
+    steps.extend(docker_step(login_name, lambda: _qbittorrent_login_internal(target)))
+    clock = stamp_steps(steps, clock)
+    steps.append(qbittorrent_send_step(target, mode))
+    clock = stamp_steps(steps, clock)
+    steps.extend(docker_step(logout_name, lambda: _qbittorrent_logout_internal(target)))
+    stamp_steps(steps, clock)
+
+    return {'target': target, 'steps': steps}
+
+def target_run_summary(target, target_steps, vpn_ip):
+    """Per-target outcome of a run for the history"""
+    failed = [step['name'] for step in target_steps if step['status'] in ('FAILED', 'ERROR')]
+    if failed:
+        status = 'Failed'
+    elif any(step['status'] == 'DEFERRED' for step in target_steps):
+        status = 'Deferred'
+    else:
+        status = 'Success'
+    return {'name': target['name'], 'status': status, 'vpn_ip': vpn_ip, 'failed_steps': failed}
+
+# Cookie consumers
+#
+# Everything that receives a freshly created MAM cookie: each qBittorrent target
+# (dynamic seedbox push from inside the container), Prowlarr, and any extra Prowlarr
+# instances reachable over the API, configured one per line as
+#   name | URL | API key [| timeout seconds]
+# Extra instances get the Prowlarr cookie (same external IP). All consumers are pushed
+# concurrently, each bounded by its own timeout, so a run waits for the slowest one
+# rather than for the sum of them. A new consumer kind only needs a push function
+# returning its steps and an entry in COOKIE_CONSUMER_PUSHERS.
+
+COOKIE_PUSH_TIMEOUT_DEFAULTS = {'qbittorrent': 120, 'prowlarr': 300, 'arr': 60}
+
+def get_cookie_consumers(settings=None):
+    """All cookie consumers in push order: qBittorrent targets, Prowlarr, extra API instances"""
+    settings = settings or load_settings()
+    timeouts = {kind: int(settings.get(f'{kind}_push_timeout', default)) for kind, default in COOKIE_PUSH_TIMEOUT_DEFAULTS.items()}
+
+    consumers = [{
+        'id': f"qbittorrent_{target['id']}",
+        'name': target['name'],
+        'kind': 'qbittorrent',
+        'target': target,
+        'step_name': target_step_name('Send Cookie to MAM', target),
+        'timeout': timeouts['qbittorrent']
+    } for target in get_qbittorrent_targets(settings)]
+    consumers.append({
+        'id': 'prowlarr',
+        'name': 'Prowlarr',
+        'kind': 'prowlarr',
+        'step_name': 'Send Cookie to Prowlarr',
+        'timeout': timeouts['prowlarr']
+    })
+
+    seen_ids = set()
+    for line in str(settings.get('arr_cookie_consumers') or '').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        name, url, api_key, timeout = ([f.strip() for f in line.split('|')] + [''] * 4)[:4]
+        consumer_id = _target_id(name)
+        if not name or not url or not api_key or consumer_id in seen_ids:
+            log_debug(f"Ignoring cookie consumer '{name}': name, URL and API key are required and names must be unique")
+            continue
+        seen_ids.add(consumer_id)
+        consumers.append({
+            'id': f'arr_{consumer_id}',
+            'name': name,
+            'kind': 'arr',
+            'url': url,
+            'api_key': api_key,
+            'step_name': f'Send Cookie to {name}',
+            'timeout': int(timeout) if timeout.isdigit() else timeouts['arr'],
+            'indexer_id_key': f'prowlarr_mam_indexer_id_{consumer_id}',
+            'fingerprint_key': f'last_prowlarr_cookie_fingerprint_{consumer_id}'
+        })
+    return consumers
+
+def consumer_resource(consumer):
+    """Workflow resource (see run_workflow) a consumer's push holds"""
+    if consumer['kind'] == 'qbittorrent':
+        return f"docker:{consumer['target']['container']}"
+    if consumer['kind'] == 'prowlarr':
+        return 'prowlarr_browser'
+    return f"arr:{consumer['id']}"
+
+def qbittorrent_consumer_push(consumer, mode, deadline=None):
+    """Login, Send Cookie to MAM and Logout for one qBittorrent target"""
+    return push_target_phase(consumer['target'], mode, deadline)['steps']
+
+def route_step(name, route_func):
+    """Step for an endpoint function that returns {'success', 'message'} JSON"""
+    try:
+        data = route_func().get_json()
+        if data['success']:
+            log_info(f"✓ {name}: Success")
+            return {'name': name, 'status': 'SUCCESS', 'message': data['message']}
+        log_info(f"✗ {name}: {data['message']}")
+        return {'name': name, 'status': 'FAILED', 'message': data['message']}
+    except Exception as e:
+        log_info(f"✗ {name} error: {e}")
+        return {'name': name, 'status': 'ERROR', 'message': str(e)}
+
+def prowlarr_login_step():
+    """'Login Prowlarr' step"""
+    return route_step('Login Prowlarr', api_prowlarr_login)
+
+def prowlarr_send_step():
+    """'Send Cookie to Prowlarr' step"""
+    try:
+        data = api_prowlarr_send_cookie().get_json()
+        if data['success'] and data.get('changed') is False:
+            log_info("- Send Cookie to Prowlarr: No change")
+            return {'name': 'Send Cookie to Prowlarr', 'status': 'SKIPPED', 'message': data['message']}
+        if data['success']:
+            log_info("✓ Send Cookie to Prowlarr: Success")
+            return {'name': 'Send Cookie to Prowlarr', 'status': 'SUCCESS', 'message': data['message']}
+        log_info(f"✗ Send Cookie to Prowlarr: {data['message']}")
+        return {'name': 'Send Cookie to Prowlarr', 'status': 'FAILED', 'message': data['message']}
+    except Exception as e:
+        log_info(f"✗ Send Cookie to Prowlarr error: {e}")
+        return {'name': 'Send Cookie to Prowlarr', 'status': 'ERROR', 'message': str(e)}
+
+def prowlarr_logout_step():
+    """'Logout Prowlarr' step"""
+    return route_step('Logout Prowlarr', api_prowlarr_logout)
+
+def prowlarr_consumer_push(consumer, mode):
+    """Login, Send Cookie to Prowlarr and Logout for the configured Prowlarr"""
+    steps = []
+    clock = time.time()
+    for step_func in (prowlarr_login_step, prowlarr_send_step, prowlarr_logout_step):
+        steps.append(step_func())
+        clock = stamp_steps(steps, clock)
+    return steps
+
+def arr_consumer_push(consumer, mode):
+    """Update the MyAnonamouse indexer of an extra Prowlarr instance over its API"""
+    name = consumer['step_name']
+    settings = load_settings()
+    cookie = settings.get('prowlarr_session_cookie')
+    if not cookie or cookie == '0':
+        log_info(f"✗ {name}: No Prowlarr cookie found")
+        return [{'name': name, 'status': 'FAILED', 'message': 'No Prowlarr cookie found. Please create a Prowlarr session first.'}]
+
+    consumer_settings = dict(settings, prowlarr_url=consumer['url'], prowlarr_api_key=consumer['api_key'])
+    try:
+        result = prowlarr_api_update_mam_cookie(consumer_settings, cookie, [], cache_key=consumer['indexer_id_key'])
+    except requests.exceptions.RequestException as e:
+        log_info(f"✗ {name} error: {e}")
+        return [{'name': name, 'status': 'ERROR', 'message': f"Could not reach {consumer['name']}: {str(e)}"}]
+
+    if result['success']:
+        record_prowlarr_push(settings, consumer['fingerprint_key'])
+        if result.get('changed') is False:
+            log_info(f"- {name}: No change")
+            return [{'name': name, 'status': 'SKIPPED', 'message': f"{consumer['name']} already has the current cookie - no change"}]
+        log_info(f"✓ {name}: Success")
+        return [{'name': name, 'status': 'SUCCESS', 'message': f"Successfully updated {consumer['name']} cookie (Test: {result['test_result']})"}]
+    log_info(f"✗ {name}: {result['message']}")
+    return [{'name': name, 'status': 'FAILED', 'message': result['message']}]
+
+COOKIE_CONSUMER_PUSHERS = {
+    'qbittorrent': qbittorrent_consumer_push,
+    'prowlarr': prowlarr_consumer_push,
+    'arr': arr_consumer_push
+}
+
+# Retry policy (see RETRY_POLICIES) of each consumer kind's push; a qBittorrent push
+# retries its Docker steps itself, as the cookie must not be sent to MAM twice
+COOKIE_CONSUMER_RETRY_POLICIES = {'qbittorrent': None, 'prowlarr': 'prowlarr', 'arr': 'arr'}
+
+def push_consumer_with_retries(consumer, mode, deadline=None):
+    """Push one consumer, retried under its kind's retry policy"""
+    def error_step(message):
+        log_error(f"✗ {consumer['step_name']}: {message}")
+        return {'name': consumer['step_name'], 'status': 'ERROR', 'message': message}
+    wait = max(deadline - time.time(), 0) if deadline else OVERRUN_RESOURCE_WAIT
+    if not wait_for_overrun_resources([consumer_resource(consumer)], wait, consumer['step_name']):
+        return [error_step(f"The previous push to {consumer['name']} overran its timeout and is still running")]
+    if COOKIE_CONSUMER_RETRY_POLICIES[consumer['kind']] is None:
+        try:
+            return COOKIE_CONSUMER_PUSHERS[consumer['kind']](consumer, mode, deadline)
+        except Exception as e:
+            return [error_step(str(e))]
+    return run_with_policy(lambda: COOKIE_CONSUMER_PUSHERS[consumer['kind']](consumer, mode),
+                           COOKIE_CONSUMER_RETRY_POLICIES[consumer['kind']], error_step, deadline)
+
+def push_cookie_to_consumers(consumers, mode):
+    """Push the current cookies to all consumers concurrently, each within its own timeout
+
+    Returns {'consumer', 'steps', 'elapsed'} per consumer, in consumer order. A consumer
+    that overruns its timeout is reported as an ERROR step; its thread is left to finish
+    in the background, and until it does no other push or restart starts on that
+    consumer (see hold_overrun_resources).
+    """
+    if not consumers:
+        return []
+    start_time = time.time()
+    pool = ThreadPoolExecutor(max_workers=len(consumers), thread_name_prefix='cookie-push')
+    futures = [
+        (consumer, pool.submit(in_worker_context(push_consumer_with_retries), consumer, mode,
+                               start_time + consumer['timeout'] if consumer['timeout'] else None))
+        for consumer in consumers
+    ]
+
+    results = []
+    for consumer, future in futures:
+        try:
+            steps = future.result(timeout=max(start_time + consumer['timeout'] - time.time(), 0) if consumer['timeout'] else None)
+        except FutureTimeoutError:
+            message = f"{consumer['name']} did not finish within {consumer['timeout']} seconds"
+            log_error(f"✗ {consumer['step_name']}: {message}")
+            hold_overrun_resources(future, [consumer_resource(consumer)], consumer['step_name'])
+            steps = [{'name': consumer['step_name'], 'status': 'ERROR', 'message': message}]
+        except Exception as e:
+            log_error(f"✗ {consumer['step_name']} error: {e}")
+            steps = [{'name': consumer['step_name'], 'status': 'ERROR', 'message': str(e)}]
+        stamp_steps(steps, start_time)
+        results.append({'consumer': consumer, 'steps': steps, 'elapsed': round(time.time() - start_time, 1)})
+
+    pool.shutdown(wait=False)
+    log_info(f"Cookie fan-out to {len(consumers)} consumer(s) finished in {time.time() - start_time:.1f}s")
+    return results
+
+# Retry policies and circuit breakers
+#
+# A step that fails with a transient error (timeouts, refused or reset connections, stale
+# page elements, 502/503/504) is run again under its RETRY_POLICIES entry: up to
+# 'attempts' tries, waiting 'backoff' seconds doubled per try (capped at 'max_backoff')
+# with jitter so parallel steps do not retry in lockstep. Whether a failure is transient
+# is decided by the message of the first failed step against 'retry_on'; anything else
+# (wrong password, MAM rate limit, VPN never came up) fails straight away.
+#
+# MAM, Docker and Prowlarr each have a circuit breaker. After circuit_breaker_threshold
+# transient failures in a row it opens and steps needing that dependency fail at once
+# for circuit_breaker_cooldown seconds instead of waiting out their timeouts. After the
+# cooldown steps are let through again: a success closes the breaker, a transient
+# failure opens it for another cooldown.
+
+# The browser session is gone: only a new login helps, not repeating the step
+BROWSER_SESSION_ERROR_PATTERNS = [r'chrome not reachable', r'invalid session id']
+
+TRANSIENT_ERROR_PATTERNS = [
+    r'timed? ?out', r'timeout', r'connection (refused|reset|aborted|error)', r'max retries exceeded',
+    r'remote end closed', r'stale element', r'temporar(y|ily) unavailable', r'\b50[234]\b',
+    r'could not reach'
+] + BROWSER_SESSION_ERROR_PATTERNS
+
+RETRY_POLICIES = {
+    'mam': {'attempts': 3, 'backoff': 5, 'max_backoff': 60, 'retry_on': TRANSIENT_ERROR_PATTERNS, 'dependency': 'mam'},
+    'docker': {'attempts': 3, 'backoff': 2, 'max_backoff': 30, 'retry_on': TRANSIENT_ERROR_PATTERNS, 'dependency': 'docker'},
+    'prowlarr': {'attempts': 3, 'backoff': 5, 'max_backoff': 60, 'retry_on': TRANSIENT_ERROR_PATTERNS, 'dependency': 'prowlarr'},
+    # Steps using the Prowlarr login of an earlier node, which a retry would not renew
+    'prowlarr_logged_in': {'attempts': 3, 'backoff': 5, 'max_backoff': 60, 'dependency': 'prowlarr',
+                           'retry_on': [p for p in TRANSIENT_ERROR_PATTERNS if p not in BROWSER_SESSION_ERROR_PATTERNS]},
+    'arr': {'attempts': 2, 'backoff': 2, 'max_backoff': 10, 'retry_on': TRANSIENT_ERROR_PATTERNS, 'dependency': None}
+}
+
+CIRCUIT_BREAKER_NAMES = {'mam': 'MyAnonamouse', 'docker': 'Docker', 'prowlarr': 'Prowlarr'}
+
+circuit_breakers = {dependency: {'failures': 0, 'opened_at': None} for dependency in CIRCUIT_BREAKER_NAMES}
+circuit_breakers_lock = threading.Lock()
+
+def circuit_breaker_settings():
+    """(threshold, cooldown seconds) - a threshold of 0 disables the breakers"""
+    settings = load_settings()
+    return int(settings.get('circuit_breaker_threshold', 3)), int(settings.get('circuit_breaker_cooldown', 300))
+
+def circuit_open_message(dependency):
+    """Why a step needing dependency must not run now, or None"""
+    if not dependency:
+        return None
+    threshold, cooldown = circuit_breaker_settings()
+    with circuit_breakers_lock:
+        breaker = circuit_breakers[dependency]
+        if not threshold or breaker['opened_at'] is None:
+            return None
+        remaining = breaker['opened_at'] + cooldown - time.time()
+        if remaining <= 0:
+            # Half-open: let steps through; the next transient failure reopens it
+            breaker['opened_at'] = None
+            log_info(f"{CIRCUIT_BREAKER_NAMES[dependency]} circuit breaker half-open - trying again")
+            return None
+    return (f"{CIRCUIT_BREAKER_NAMES[dependency]} is unavailable after {breaker['failures']} failures in a row "
+            f"- not trying again for {remaining:.0f} seconds")
+
+def record_dependency_result(dependency, transient_failure):
+    """Count a transient failure against dependency's breaker, or reset it"""
+    if not dependency:
+        return
+    threshold, _ = circuit_breaker_settings()
+    with circuit_breakers_lock:
+        breaker = circuit_breakers[dependency]
+        if not transient_failure:
+            if breaker['failures'] >= threshold > 0:
+                log_info(f"✓ {CIRCUIT_BREAKER_NAMES[dependency]} reachable again - circuit breaker closed")
+            breaker['failures'] = 0
+            breaker['opened_at'] = None
+            return
+        breaker['failures'] += 1
+        if threshold and breaker['failures'] >= threshold and breaker['opened_at'] is None:
+            breaker['opened_at'] = time.time()
+            log_warning(f"{CIRCUIT_BREAKER_NAMES[dependency]} circuit breaker open after {breaker['failures']} failures in a row")
+
+def is_transient_failure(steps, policy):
+    """Whether the first failed step failed with an error the policy retries"""
+    failed = [step for step in steps if step['status'] in ('FAILED', 'ERROR')]
+    return bool(failed) and any(re.search(pattern, failed[0]['message'], re.IGNORECASE) for pattern in policy['retry_on'])
+
+def retry_delay(policy, attempt):
+    """Exponential backoff with jitter before try attempt + 1"""
+    delay = min(policy['backoff'] * 2 ** (attempt - 1), policy['max_backoff'])
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def run_with_policy(func, policy_name, error_step, deadline=None):
+    """Run func() -> steps under a retry policy and its dependency's circuit breaker
+
+    error_step(message) builds the step reported for an exception or an open breaker.
+    No retry is started that would begin after deadline. The returned steps carry the
+    number of retries it took.
+    """
+    policy = RETRY_POLICIES[policy_name]
+    dependency = policy['dependency']
+    attempt = 0
+    while True:
+        attempt += 1
+        blocked = circuit_open_message(dependency)
+        if blocked:
+            steps = [error_step(blocked)]
+            break
+        try:
+            steps = func() or []
+        except Exception as e:
+            steps = [error_step(str(e))]
+        transient = is_transient_failure(steps, policy)
+        record_dependency_result(dependency, transient)
+        if not transient or attempt >= policy['attempts']:
+            break
+        delay = retry_delay(policy, attempt)
+        if deadline and time.time() + delay >= deadline:
+            break
+        failed = next(step for step in steps if step['status'] in ('FAILED', 'ERROR'))
+        log_warning(f"{failed['name']} failed ({failed['message'][:80]}) - retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1} of {policy['attempts']})")
+        time.sleep(delay)
+    for step in steps:
+        step['retries'] = attempt - 1
+    return steps
+
+def with_retry_policy(runner, policy_name):
+    """Workflow node runner that runs runner under a retry policy"""
+    def run(context, node):
+        deadline = time.time() + node['timeout'] if node.get('timeout') else None
+        return run_with_policy(lambda: runner(context, node), policy_name,
+                               lambda message: workflow_error_step(node, message), deadline)
+    return run
+
+@app.route('/api/circuit_breakers', methods=['GET'])
+def api_circuit_breakers():
+    """State of the MAM, Docker and Prowlarr circuit breakers"""
+    threshold, cooldown = circuit_breaker_settings()
+    breakers = []
+    with circuit_breakers_lock:
+        for dependency, breaker in circuit_breakers.items():
+            if breaker['opened_at'] is not None:
+                state, retry_in = 'open', max(0, round(breaker['opened_at'] + cooldown - time.time()))
+            elif threshold and breaker['failures'] >= threshold:
+                state, retry_in = 'half-open', 0
+            else:
+                state, retry_in = 'closed', 0
+            breakers.append({'dependency': dependency, 'name': CIRCUIT_BREAKER_NAMES[dependency], 'state': state,
+                             'failures': breaker['failures'], 'retry_in': retry_in})
+    return jsonify({'success': True, 'threshold': threshold, 'cooldown': cooldown, 'breakers': breakers})
+
+@app.route('/api/circuit_breakers/reset', methods=['POST'])
+def api_reset_circuit_breakers():
+    """Close all circuit breakers (e.g. after fixing MAM credentials or Docker)"""
+    with circuit_breakers_lock:
+        for breaker in circuit_breakers.values():
+            breaker['failures'] = 0
+            breaker['opened_at'] = None
+    log_info("Circuit breakers reset")
+    return jsonify({'success': True, 'message': 'Circuit breakers reset'})
+
+# Workflow engine
+#
+# A workflow is a list of nodes: dicts with an 'id', the ids it depends on ('deps'), the
+# shared resources it holds while running ('resources') and run(context, node) returning
+# its steps. A node starts on the pool as soon as its dependencies have finished and no
+# running node holds one of its resources: 'mam_browser' is the single MAM Selenium
+# session, 'docker:<container>' one qBittorrent container, 'prowlarr_browser' the
+# Prowlarr UI session. Nodes also run after a failed dependency and look at the shared
+# context to decide what to do, as the linear orchestrators did. Steps come back in
+# node order, whatever order the nodes finished in.
+
+def workflow_error_step(node, message):
+    """ERROR step for a node that raised or overran its timeout"""
+    name = node.get('step_name', node['id'])
+    log_error(f"✗ {name}: {message}")
+    return {'name': name, 'status': 'ERROR', 'message': message}
+
+# Work that overran its timeout is reported as failed but its thread cannot be stopped.
+# The resources it used stay taken until it really finishes, also for later runs, so
+# nothing else drives the same container or browser at the same time.
+OVERRUN_RESOURCE_WAIT = 600  # seconds work without a timeout waits for such a resource
+
+overrun_resources = {}  # resource -> future of the overrunning work holding it
+overrun_resources_lock = threading.Lock()
+
+def hold_overrun_resources(future, resources, description):
+    """Keep resources taken until the overrunning future finishes"""
+    resources = list(resources)
+    if not resources:
+        return
+    with overrun_resources_lock:
+        for resource in resources:
+            overrun_resources[resource] = future
+
+    def release(_):
+        with overrun_resources_lock:
+            for resource in resources:
+                if overrun_resources.get(resource) is future:
+                    del overrun_resources[resource]
+        log_info(f"{description} finished after overrunning its timeout - released {', '.join(resources)}")
+    future.add_done_callback(release)
+
+def overrun_futures(resources):
+    """Futures of overrunning work still holding any of resources"""
+    with overrun_resources_lock:
+        futures = {overrun_resources[resource] for resource in resources if resource in overrun_resources}
+    return {future for future in futures if not future.done()}
+
+def wait_for_overrun_resources(resources, timeout, name):
+    """Wait up to timeout seconds for overrunning work holding resources; whether they are free"""
+    held = overrun_futures(resources)
+    if held:
+        log_info(f"{name}: waiting for an earlier step that overran its timeout to finish")
+        wait_futures(held, timeout=timeout)
+    return not overrun_futures(resources)
+
+def run_workflow(nodes, context, max_workers=4, completed=None, on_node_done=None):
+    """Run workflow nodes concurrently as their dependencies and resources allow
+
+    completed maps ids of nodes finished earlier (e.g. restored from a checkpoint) to
+    their steps; they are not run again. on_node_done(node, steps) is called as each
+    node finishes. Returns {'steps', 'node_steps', 'timings', 'elapsed'}. A node with
+    a 'timeout' that overruns it is reported as an ERROR step; its thread is left to
+    finish in the background and keeps its resources until it does.
+    """
+    start_time = time.time()
+    max_workers = max(1, int(max_workers))
+    completed = completed or {}
+    pending = [node for node in nodes if node['id'] not in completed]
+    node_steps = dict(completed)
+    timings = {node_id: 0 for node_id in completed}
+    running = {}  # future -> (node, started)
+    busy_resources = set()
+    waiting_since = {}  # node id -> when it started waiting for overrunning work
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='workflow')
+
+    completed_steps = [step for node in nodes for step in completed.get(node['id'], [])]
+
+    def finish(node, steps, started):
+        stamp_steps(steps, started)
+        node_steps[node['id']] = steps
+        timings[node['id']] = round(time.time() - started, 2)
+        busy_resources.difference_update(node.get('resources', ()))
+        completed_steps.extend(steps)
+        for step in steps:
+            publish_job_event('step-end', dict(step, node=node['id'], seconds=timings[node['id']]))
+        if on_node_done:
+            on_node_done(node, steps)
+        report_job_progress(f"Finished {node.get('step_name', node['id'])}", len(node_steps), len(nodes), completed_steps)
+
+    def overrun_wait_deadline(node):
+        return waiting_since[node['id']] + (node.get('timeout') or OVERRUN_RESOURCE_WAIT)
+
+    try:
+        while pending or running:
+            started_any = False
+            blocking = set()  # overrunning futures that ready nodes wait for
+            for node in list(pending):
+                if len(running) >= max_workers:
+                    break
+                if any(dep not in node_steps for dep in node.get('deps', ())):
+                    continue
+                if busy_resources.intersection(node.get('resources', ())):
+                    continue
+                held = overrun_futures(node.get('resources', ()))
+                if held:
+                    waiting_since.setdefault(node['id'], time.time())
+                    if time.time() < overrun_wait_deadline(node):
+                        blocking.update(held)
+                        continue
+                    pending.remove(node)
+                    finish(node, [workflow_error_step(node, "Still in use by an earlier step that overran its timeout")], waiting_since[node['id']])
+                    continue
+                pending.remove(node)
+                busy_resources.update(node.get('resources', ()))
+                log_debug(f"Workflow: starting {node['id']}")
+                running[pool.submit(in_worker_context(node['run']), context, node)] = (node, time.time())
+                publish_job_event('step-start', {'node': node['id'], 'name': node.get('step_name', node['id'])})
+                started_any = True
+            if started_any:
+                report_job_progress(f"Running {', '.join(n.get('step_name', n['id']) for n, _ in running.values())}")
+
+            if not running and not blocking:
+                # Unknown or circular dependencies - nothing left that can start
+                for node in pending:
+                    node_steps[node['id']] = [workflow_error_step(node, f"Dependencies never completed: {', '.join(node.get('deps', ()))}")]
+                    timings[node['id']] = 0
+                break
+
+            deadlines = [started + node['timeout'] for node, started in running.values() if node.get('timeout')]
+            deadlines += [overrun_wait_deadline(node) for node in pending if node['id'] in waiting_since]
+            wait_timeout = max(min(deadlines) - time.time(), 0) if deadlines else None
+            done, _ = wait_futures(list(running) + list(blocking), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future not in running:
+                    continue  # Overrunning work finished; its resources are free again
+                node, started = running.pop(future)
+                try:
+                    steps = future.result() or []
+                except Exception as e:
+                    steps = [workflow_error_step(node, str(e))]
+                finish(node, steps, started)
+
+            now = time.time()
+            for future, (node, started) in list(running.items()):
+                if node.get('timeout') and now >= started + node['timeout']:
+                    del running[future]
+                    hold_overrun_resources(future, node.get('resources', ()), node.get('step_name', node['id']))
+                    finish(node, [workflow_error_step(node, f"Did not finish within {node['timeout']} seconds")], started)
+    finally:
+        pool.shutdown(wait=False)
+
+    elapsed = time.time() - start_time
+    log_info(f"Workflow of {len(nodes)} nodes finished in {elapsed:.1f}s")
+    return {
+        'steps': [step for node in nodes for step in node_steps.get(node['id'], [])],
+        'node_steps': node_steps,
+        'timings': timings,
+        'elapsed': elapsed
+    }
+
+# Fix All workflow
+#
+# Fix All as a dependency graph. Clearing cookies, the external IP lookup, deleting old
+# MAM sessions, creating the Prowlarr session and the Prowlarr login all happen while
+# the qBittorrent containers restart; each qBittorrent push waits only for its own
+# container and the qBittorrent sessions, the Prowlarr pushes only for the Prowlarr
+# session. Creating the qBittorrent sessions still needs every VPN IP (one batched
+# security page visit). Step names and statuses are the same as the linear workflow's.
+
+FIX_ALL_TARGET_STEP_NAMES = [
+    'Restart qBittorrent', 'Wait for VPN', 'Get IPs', 'Create qBittorrent Session',
+    'Login qBittorrent', 'Send Cookie to MAM', 'Logout qBittorrent'
+]
+
+def build_fix_all_workflow(targets, consumers, reconcile, runners):
+    """Fix All nodes for the given targets and cookie consumers, in step order
+
+    runners maps a node kind to its run(context, node) function, so the same graph
+    can run against stub backends (see scripts/benchmark_workflow.py).
+    """
+    nodes = []
+
+    def add(node_id, kind, step_name, deps=(), resources=(), timeout=None, **extra):
+        nodes.append(dict(extra, id=node_id, kind=kind, step_name=step_name, deps=list(deps),
+                          resources=list(resources), timeout=timeout, run=runners[kind]))
+
+    add('clear_cookies', 'clear_cookies', 'Clear Cookies')
+    for target in targets:
+        add(f"restart:{target['id']}", 'restart', target_step_name('Restart qBittorrent', target),
+            resources=[f"docker:{target['container']}"], target=target)
+    add('external_ip', 'external_ip', 'Get External IP')
+    for target in targets:
+        add(f"get_ips:{target['id']}", 'get_ips', target_step_name('Get IPs', target),
+            deps=[f"restart:{target['id']}", 'external_ip'], target=target)
+    get_ips_nodes = [f"get_ips:{target['id']}" for target in targets]
+
+    if reconcile:
+        # Reconciliation compares all desired sessions at once, so it needs every IP
+        add('reconcile_sessions', 'reconcile_sessions', 'Delete Old Sessions',
+            deps=['clear_cookies'] + get_ips_nodes, resources=['mam_browser'])
+        qbittorrent_sessions = prowlarr_session = 'reconcile_sessions'
+    else:
+        add('delete_old_sessions', 'delete_old_sessions', 'Delete Old Sessions',
+            deps=['clear_cookies'], resources=['mam_browser'])
+        add('create_qbittorrent_sessions', 'create_qbittorrent_sessions', 'Create qBittorrent Session',
+            deps=['delete_old_sessions'] + get_ips_nodes, resources=['mam_browser'])
+        add('create_prowlarr_session', 'create_prowlarr_session', 'Create Prowlarr Session',
+            deps=['delete_old_sessions', 'external_ip'], resources=['mam_browser'])
+        qbittorrent_sessions, prowlarr_session = 'create_qbittorrent_sessions', 'create_prowlarr_session'
+    add('logout_mam', 'logout_mam', 'Logout MAM',
+        deps=sorted({qbittorrent_sessions, prowlarr_session}), resources=['mam_browser'])
+
+    for consumer in consumers:
+        if consumer['kind'] == 'qbittorrent':
+            target = consumer['target']
+            add(f"push:{consumer['id']}", 'qbittorrent_push', consumer['step_name'],
+                deps=[qbittorrent_sessions, f"restart:{target['id']}"],
+                resources=[f"docker:{target['container']}"], timeout=consumer['timeout'],
+                target=target, consumer=consumer)
+        elif consumer['kind'] == 'prowlarr':
+            # The Prowlarr login lives in the browser, so it cannot be resumed on its own
+            add('prowlarr_login', 'prowlarr_login', 'Login Prowlarr',
+                resources=['prowlarr_browser'], timeout=consumer['timeout'], ephemeral=True)
+            add('prowlarr_send', 'prowlarr_send', 'Send Cookie to Prowlarr',
+                deps=['prowlarr_login', prowlarr_session], resources=['prowlarr_browser'], timeout=consumer['timeout'])
+            add('prowlarr_logout', 'prowlarr_logout', 'Logout Prowlarr',
+                deps=['prowlarr_send'], resources=['prowlarr_browser'], timeout=consumer['timeout'])
+        else:
+            add(f"push:{consumer['id']}", 'arr_push', consumer['step_name'],
+                deps=[prowlarr_session], resources=[consumer_resource(consumer)], timeout=consumer['timeout'],
+                consumer=consumer)
+    return nodes
+
+def fix_all_session_plan(context, qbittorrent=True, prowlarr=True):
+    """Desired MAM sessions: (specs, [(label, target)] in step order, {label: FAILED step})"""
+    specs, labels, failed = [], [], {}
+    if qbittorrent:
+        for target in context['targets']:
+            vpn_ip = context['restarts'].get(target['id'], {}).get('vpn_ip')
+            spec = qbittorrent_session_spec(vpn_ip, target)
+            labels.append((spec['label'], target))
+            if vpn_ip and vpn_ip != 'Not Found':
+                specs.append(spec)
+            else:
+                failed[spec['label']] = {'name': target_step_name('Create qBittorrent Session', target), 'status': 'FAILED', 'message': 'VPN IP not found. Please click "Get IPs" first to detect the VPN IP address.'}
+    if prowlarr:
+        labels.append(('Prowlarr', None))
+        ext_ip = context.get('ext_ip')
+        if ext_ip and ext_ip != 'Error':
+            specs.append(prowlarr_session_spec(ext_ip))
+        else:
+            failed['Prowlarr'] = {'name': 'Create Prowlarr Session', 'status': 'FAILED', 'message': 'External IP not found. Please check your internet connection.'}
+    return specs, labels, failed
+
+def fix_all_create_steps(labels, failed, results):
+    """Create Session steps in plan order from batch or reconciliation results
+
+    Steps take the timing of their result; a session that was not created (no IP,
+    reused) took no time of its own.
+    """
+    results_by_label = {result['label']: result for result in results}
+    steps = []
+    for label, target in labels:
+        step = failed.get(label)
+        if step is None and label in results_by_label:
+            result = results_by_label[label]
+            name = f"Create {result['cookie_type']} Session"
+            step = {
+                'name': target_step_name(name, target) if target else name,
+                'status': 'SUCCESS' if result['success'] else 'FAILED',
+                'message': result['message']
+            }
+            if 'seconds' in result:
+                step['started'] = datetime.fromtimestamp(result['started']).strftime('%Y-%m-%d %H:%M:%S')
+                step['seconds'] = result['seconds']
+        if step is None:
+            continue
+        stamp_steps([step], time.time())
+        if step['status'] == 'SUCCESS':
+            log_info(f"✓ {step['name']}: Success")
+        else:
+            log_info(f"✗ {step['name']}: {step['message']}")
+        steps.append(step)
+    return steps
+
+def fix_all_clear_cookies(context, node):
+    if context['reconcile']:
+        log_info("- Clear Cookies: Skipped (reconcile mode)")
+        return [{'name': 'Clear Cookies', 'status': 'SKIPPED', 'message': 'Reconcile mode - keeping cookies of matching sessions'}]
+    return [route_step('Clear Cookies', api_clear_cookies)]
+
+def fix_all_restart(context, node):
+    restart = restart_target_phase(node['target'], require_vpn=False)
+    context['restarts'][node['target']['id']] = restart
+    return restart['steps']
+
+def fix_all_external_ip(context, node):
+    context['ext_ip'] = get_external_ip([])
+    return []
+
+def fix_all_get_ips(context, node):
+    vpn_ip = context['restarts'].get(node['target']['id'], {}).get('vpn_ip')
+    return [get_ips_step(node['target'], context.get('ext_ip') or 'Error', vpn_ip)]
+
+def fix_all_delete_old_sessions(context, node):
+    return [route_step('Delete Old Sessions', _delete_old_sessions_internal)]
+
+def remove_sessions_left_by_failed_create(labels):
+    """Remove listed MAM sessions carrying one of labels before Create is tried again
+
+    Delete Old Sessions ran before, so such a session was left by a failed attempt:
+    MAM may have created it without its cookie ever being read.
+    """
+    settings = load_settings()
+    debug_info = []
+    inventory = get_mam_session_inventory(settings, debug_info)
+    if not inventory['success']:
+        return {'success': False, 'message': inventory['message']}
+    keys = [_session_key(session) for session in inventory['sessions'] if session['label'] in labels]
+    if not keys:
+        return {'success': True, 'message': 'No sessions left by the failed attempt'}
+    log_info(f"Removing {len(keys)} session(s) left by a failed Create attempt before retrying")
+    return remove_mam_sessions(settings, keys, debug_info)
+
+def fix_all_create_sessions(context, node, qbittorrent, prowlarr):
+    specs, labels, failed = fix_all_session_plan(context, qbittorrent=qbittorrent, prowlarr=prowlarr)
+    # A retry only creates the sessions the previous attempts did not, after removing
+    # any session a failed attempt left behind, so no label ends up with two sessions
+    created = node.setdefault('created', {})
+    specs = [spec for spec in specs if spec['label'] not in created]
+    if specs and node.get('attempted'):
+        cleanup = remove_sessions_left_by_failed_create({spec['label'] for spec in specs})
+        if not cleanup['success']:
+            message = f"Not retried - could not remove the session left by the failed attempt: {cleanup['message']}"
+            results = [{'cookie_type': spec['cookie_type'], 'label': spec['label'], 'success': False, 'message': message} for spec in specs]
+            return fix_all_create_steps(labels, failed, list(created.values()) + results)
+    node['attempted'] = True
+    results = create_session_cookies_batch(specs)['results'] if specs else []
+    created.update({result['label']: result for result in results if result['success']})
+    return fix_all_create_steps(labels, failed, list(created.values()) + [result for result in results if not result['success']])
+
+def fix_all_create_qbittorrent_sessions(context, node):
+    return fix_all_create_sessions(context, node, qbittorrent=True, prowlarr=False)
+
+def fix_all_create_prowlarr_session(context, node):
+    return fix_all_create_sessions(context, node, qbittorrent=False, prowlarr=True)
+
+def fix_all_reconcile_sessions(context, node):
+    """Delete Old Sessions and the Create steps in reconcile mode (only differing sessions change)"""
+    clock = time.time()
+    specs, labels, failed = fix_all_session_plan(context)
+    reconciliation = reconcile_mam_sessions(specs) if specs else None
+    if reconciliation and (not reconciliation['results'] or not reconciliation['removal_success']):
+        delete_step = {'name': 'Delete Old Sessions', 'status': 'FAILED', 'message': reconciliation['message']}
+        log_info(f"✗ Delete Old Sessions: {reconciliation['message']}")
+    elif reconciliation and reconciliation['removed_count']:
+        delete_step = {'name': 'Delete Old Sessions', 'status': 'SUCCESS', 'message': f"Removed {reconciliation['removed_count']} outdated sessions"}
+        log_info("✓ Delete Old Sessions: Success")
+    else:
+        delete_step = {'name': 'Delete Old Sessions', 'status': 'SKIPPED', 'message': 'No outdated sessions to remove'}
+        log_info("- Delete Old Sessions: Nothing to remove")
+
+    results = reconciliation['results'] if reconciliation else []
+    if reconciliation and not results:
+        results = [{'cookie_type': spec['cookie_type'], 'label': spec['label'], 'success': False, 'message': reconciliation['message']} for spec in specs]
+    if reconciliation and reconciliation['read_only']:
+        log_info("Session reconciliation: all sessions already match - no MAM changes made")
+    create_steps = fix_all_create_steps(labels, failed, results)
+    # Everything but creating the sessions (inventory, removal) is Delete Old Sessions' time
+    delete_step['started'] = datetime.fromtimestamp(clock).strftime('%Y-%m-%d %H:%M:%S')
+    delete_step['seconds'] = round(max(time.time() - clock - sum(step['seconds'] for step in create_steps), 0), 1)
+    return [delete_step] + create_steps
+
+def fix_all_logout_mam(context, node):
+    return [route_step('Logout MAM', api_logout_mam)]
+
+def fix_all_qbittorrent_push(context, node):
+    """Push a target's cookie to MAM, unless MAM's change window is closed for it"""
+    cooldown_step = mam_cooldown_push_step(node['consumer'])
+    if cooldown_step:
+        return [cooldown_step]
+    deadline = time.time() + node['timeout'] if node.get('timeout') else None
+    return qbittorrent_consumer_push(node['consumer'], context['mode'], deadline)
+
+FIX_ALL_NODE_RUNNERS = {
+    'clear_cookies': fix_all_clear_cookies,
+    'restart': with_retry_policy(fix_all_restart, 'docker'),
+    'external_ip': fix_all_external_ip,
+    'get_ips': fix_all_get_ips,
+    'delete_old_sessions': with_retry_policy(fix_all_delete_old_sessions, 'mam'),
+    'create_qbittorrent_sessions': with_retry_policy(fix_all_create_qbittorrent_sessions, 'mam'),
+    'create_prowlarr_session': with_retry_policy(fix_all_create_prowlarr_session, 'mam'),
+    'reconcile_sessions': with_retry_policy(fix_all_reconcile_sessions, 'mam'),
+    'logout_mam': with_retry_policy(fix_all_logout_mam, 'mam'),
+    'qbittorrent_push': fix_all_qbittorrent_push,
+    'prowlarr_login': with_retry_policy(lambda context, node: [prowlarr_login_step()], 'prowlarr'),
+    'prowlarr_send': with_retry_policy(lambda context, node: [prowlarr_send_step()], 'prowlarr_logged_in'),
+    'prowlarr_logout': with_retry_policy(lambda context, node: [prowlarr_logout_step()], 'prowlarr_logged_in'),
+    'arr_push': with_retry_policy(lambda context, node: arr_consumer_push(node['consumer'], context['mode']), 'arr')
+}
+
+def fix_all_target_steps(steps, target):
+    """The steps of a run that belong to one qBittorrent target"""
+    names = {target_step_name(name, target) for name in FIX_ALL_TARGET_STEP_NAMES}
+    return [step for step in steps if step['name'] in names]
+
+# Fix All checkpoints
+#
+# While Fix All runs, every node that succeeds is written to CHECKPOINT_FILE with the
+# IPs detected so far and fingerprints of the session cookies in settings. If the run
+# ends with failures, or never ends (container restart, Chrome crash), the next Fix All
+# resumes: nodes that succeeded - and whose dependencies all succeeded - are not run
+# again. A checkpoint is only used when it is younger than workflow_resume_max_age
+# minutes, was written for the same graph, the VPN and external IPs it relied on are
+# unchanged and the cookies have not been touched since. A run in which every node
+# succeeded deletes it.
+
+def load_fix_all_checkpoint():
+    """The saved Fix All checkpoint, or None"""
+    try:
+        if os.path.exists(CHECKPOINT_FILE):
+            with open(CHECKPOINT_FILE, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        log_error(f"Error loading checkpoint file: {e}")
+    return None
+
+def save_fix_all_checkpoint(checkpoint):
+    """Write the checkpoint atomically so a crash mid-write cannot corrupt it"""
+    try:
+        temp_file = CHECKPOINT_FILE + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(temp_file, CHECKPOINT_FILE)
+    except Exception as e:
+        log_error(f"Error saving checkpoint file: {e}")
+
+def clear_fix_all_checkpoint():
+    try:
+        if os.path.exists(CHECKPOINT_FILE):
+            os.remove(CHECKPOINT_FILE)
+            log_debug("Fix All checkpoint removed")
+    except Exception as e:
+        log_error(f"Error removing checkpoint file: {e}")
+
+def checkpoint_cookie_fingerprints(settings, targets):
+    """Fingerprint of every session cookie a Fix All run creates"""
+    prefixes = [target['settings_prefix'] for target in targets] + ['prowlarr']
+    return {prefix: cookie_fingerprint(settings.get(f'{prefix}_session_cookie')) for prefix in prefixes}
+
+def steps_succeeded(steps):
+    return not any(step['status'] in ('FAILED', 'ERROR') for step in steps)
+
+def find_fix_all_resume_point(nodes, targets, reconcile):
+    """Nodes of a valid checkpoint that need not run again: ({node id: steps}, IP state)"""
+    checkpoint = load_fix_all_checkpoint()
+    if not checkpoint:
+        return {}, None
+    settings = load_settings()
+    max_age = int(settings.get('workflow_resume_max_age', 30)) * 60
+    age = time.time() - checkpoint.get('updated', 0)
+    if age > max_age:
+        log_info(f"Fix All checkpoint is {age / 60:.0f} minutes old - starting fresh")
+        return {}, None
+    if checkpoint.get('graph') != [node['id'] for node in nodes] or checkpoint.get('reconcile') != reconcile:
+        log_info("Fix All checkpoint was made for different targets or settings - starting fresh")
+        return {}, None
+    if checkpoint.get('cookies') != checkpoint_cookie_fingerprints(settings, targets):
+        log_info("Session cookies changed since the Fix All checkpoint - starting fresh")
+        return {}, None
+
+    # Only nodes whose dependencies were also completed can be skipped (graph order is
+    # topological, so one pass suffices)
+    saved = checkpoint.get('nodes', {})
+    completed = {}
+    for node in nodes:
+        if node['id'] in saved and all(dep in completed for dep in node['deps']):
+            completed[node['id']] = saved[node['id']]
+    # An ephemeral node (browser login) is redone unless everything that needs it is done
+    for node in nodes:
+        if node.get('ephemeral') and node['id'] in completed:
+            if any(node['id'] in other['deps'] and other['id'] not in completed for other in nodes):
+                del completed[node['id']]
+
+    state = checkpoint.get('state', {})
+    for target in targets:
+        if f"restart:{target['id']}" in completed:
+            vpn_ip = detect_vpn_ip(target_settings(settings, target), [])
+            if vpn_ip != state.get('vpn_ips', {}).get(target['id']):
+                log_info(f"VPN IP of {target['name']} changed since the Fix All checkpoint - starting fresh")
+                return {}, None
+    if 'external_ip' in completed and get_external_ip([]) != state.get('ext_ip'):
+        log_info("External IP changed since the Fix All checkpoint - starting fresh")
+        return {}, None
+
+    if completed:
+        log_info(f"Resuming Fix All from checkpoint: {len(completed)} of {len(nodes)} nodes already done")
+    return completed, state
+
+def fix_all_checkpointer(nodes, targets, reconcile, context, completed):
+    """on_node_done callback that keeps CHECKPOINT_FILE up to date during a run"""
+    checkpoint = {
+        'started': time.time(),
+        'graph': [node['id'] for node in nodes],
+        'reconcile': reconcile,
+        'nodes': dict(completed),
+        'state': {},
+        'cookies': {}
+    }
+
+    def save(node=None, steps=None):
+        if node is not None and steps_succeeded(steps):
+            checkpoint['nodes'][node['id']] = steps
+        checkpoint['updated'] = time.time()
+        checkpoint['state'] = {
+            'ext_ip': context.get('ext_ip'),
+            'vpn_ips': {target_id: restart.get('vpn_ip') for target_id, restart in context['restarts'].items()}
+        }
+        checkpoint['cookies'] = checkpoint_cookie_fingerprints(load_settings(), targets)
+        save_fix_all_checkpoint(checkpoint)
+
+    save()
+    return save
+
+@app.route('/api/fix_all_checkpoint', methods=['GET'])
+def api_fix_all_checkpoint():
+    """What the next Fix All would resume from, if anything"""
+    checkpoint = load_fix_all_checkpoint()
+    if not checkpoint:
+        return jsonify({'exists': False})
+    return jsonify({
+        'exists': True,
+        'age_minutes': round((time.time() - checkpoint.get('updated', 0)) / 60, 1),
+        'completed_nodes': list(checkpoint.get('nodes', {})),
+        'graph': checkpoint.get('graph', []),
+        'state': checkpoint.get('state', {})
+    })
+
+# Background jobs
+#
+# Fix All, Fix MyAnonamouse and Delete Old Sessions take minutes (container restart,
+# VPN wait, browser work). Their endpoints queue a job and return its id straight away
+# instead of holding one of waitress's few request threads; GET /api/jobs/<id> reports
+# progress and, once done, the endpoint's usual result JSON. The jobs all drive the one
+# MAM browser, so a single worker runs them in submission order. Sending {"wait": true}
+# keeps the old blocking behaviour for scripts.
+#
+# Each job also keeps an event log (status, step-start, step-end with timing, progress,
+# done) that GET /api/jobs/<id>/events streams as Server-Sent Events to any number of
+# watchers. A stream holds a waitress thread for the length of the run, so only
+# sse_max_streams are served at once; further clients get 503 and fall back to polling.
+#
+# Renewals are single-flight. A job claims the qBittorrent targets it renews (Fix All
+# also Prowlarr); a request whose claims an in-flight job already covers - a second
+# click, the timer firing during a manual run, Fix MyAnonamouse during Fix All -
+# attaches to that job and gets its result. The timer and deferred pushes use the same
+# queue, so two renewals never drive the browser or a container at once. An
+# Idempotency-Key header makes a client retry return the job of the first attempt.
+
+import uuid
+
+JOB_HISTORY_LIMIT = 20
+IDEMPOTENCY_KEY_TTL = 24 * 3600
+SSE_KEEPALIVE_SECONDS = 15
+jobs = {}
+jobs_lock = threading.Lock()
+jobs_changed = threading.Condition(jobs_lock)
+job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='job')
+open_job_streams = 0
+idempotency_keys = {}  # (kind, key) -> (job id, time first seen)
+
+def job_summary(job, include_steps=True):
+    """JSON view of a job"""
+    summary = {key: value for key, value in job.items() if key not in ('steps', 'events', 'published_steps')}
+    summary['progress'] = dict(job['progress'])
+    summary['claims'] = sorted(job['claims'])
+    if include_steps:
+        summary['steps'] = list(job['steps'])
+    return summary
+
+def _prune_jobs():
+    """Forget expired idempotency keys and the oldest finished jobs beyond JOB_HISTORY_LIMIT
+
+    Jobs still referenced by an idempotency key are kept so a retry can fetch the
+    result. Call with jobs_lock held.
+    """
+    now = time.time()
+    for key, (job_id, created) in list(idempotency_keys.items()):
+        if now - created > IDEMPOTENCY_KEY_TTL:
+            del idempotency_keys[key]
+    referenced = {job_id for job_id, _ in idempotency_keys.values()}
+    finished = sorted((job for job in jobs.values() if job['status'] in ('finished', 'failed') and job['id'] not in referenced),
+                      key=lambda job: job['created'])
+    for job in finished[:max(len(finished) - JOB_HISTORY_LIMIT, 0)]:
+        del jobs[job['id']]
+
+def _add_job_event(job, event, data):
+    """Append an event to a job's log and wake its watchers (call with jobs_lock held)"""
+    if event == 'step-end':
+        job['published_steps'].add(data['name'])
+    job['events'].append({'id': len(job['events']) + 1, 'event': event, 'time': time.time(), 'data': data})
+    jobs_changed.notify_all()
+
+def publish_job_event(event, data):
+    """Publish an event on the job the current thread works for (no-op outside a job)"""
+    job_id = getattr(execution_context, 'job_id', None)
+    if not job_id:
+        return
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if job:
+            _add_job_event(job, event, data)
+
+def _run_job(job_id, func):
+    execution_context.job_id = job_id
+    with jobs_lock:
+        job = jobs[job_id]
+        if job['mode']:
+            execution_context.mode = job['mode']
+        job['status'] = 'running'
+        job['started'] = time.time()
+        job['progress']['message'] = 'Running'
+        _add_job_event(job, 'status', {'status': 'running'})
+    log_info(f"Job {job_id} ({job['kind']}) started")
+    try:
+        with app.app_context():
+            result = func()
+        status = 'finished'
+    except Exception as e:
+        log_error(f"Job {job_id} ({job['kind']}) error: {e}")
+        result = {'success': False, 'message': f'Job error: {str(e)}'}
+        status = 'failed'
+    finally:
+        for attr in ('job_id', 'mode'):
+            if hasattr(execution_context, attr):
+                delattr(execution_context, attr)
+    with jobs_lock:
+        job['status'] = status
+        job['finished'] = time.time()
+        job['result'] = result
+        job['progress']['message'] = result.get('message', '') if isinstance(result, dict) else ''
+        if result and isinstance(result, dict) and result.get('steps'):
+            job['steps'] = list(result['steps'])
+        _add_job_event(job, 'done', {'status': status, 'seconds': round(job['finished'] - job['started'], 2), 'result': result})
+        _prune_jobs()
+    log_info(f"Job {job_id} ({job['kind']}) {status} in {job['finished'] - job['started']:.1f}s")
+
+def submit_job(kind, func, claims=(), idempotency_key=None):
+    """Queue func (returning the result dict) as a background job, single-flight
+
+    claims names what the job renews (see renewal_claims). When a queued or running
+    job already claims all of it, or idempotency_key was used before for this kind, that
+    job is returned instead of queueing another. Returns (job, attached).
+    """
+    claims = frozenset(claims)
+    with jobs_lock:
+        _prune_jobs()
+        if idempotency_key:
+            known = idempotency_keys.get((kind, idempotency_key))
+            if known and known[0] in jobs:
+                log_info(f"Job {known[0]} ({kind}) returned again for idempotency key {idempotency_key}")
+                return jobs[known[0]], True
+        if claims:
+            for job in sorted(jobs.values(), key=lambda job: job['created']):
+                if job['status'] in ('queued', 'running') and claims <= job['claims']:
+                    log_info(f"{kind} request attached to in-flight job {job['id']} ({job['kind']})")
+                    if idempotency_key:
+                        idempotency_keys[(kind, idempotency_key)] = (job['id'], time.time())
+                    return job, True
+
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'claims': claims,
+            'mode': getattr(execution_context, 'mode', None),
+            'status': 'queued',
+            'created': time.time(),
+            'started': None,
+            'finished': None,
+            'progress': {'completed': 0, 'total': None, 'message': 'Queued'},
+            'steps': [],
+            'result': None,
+            'events': [],
+            'published_steps': set()
+        }
+        jobs[job_id] = job
+        if idempotency_key:
+            idempotency_keys[(kind, idempotency_key)] = (job_id, time.time())
+        _add_job_event(job, 'status', {'status': 'queued'})
+    job_executor.submit(_run_job, job_id, func)
+    log_info(f"Job {job_id} ({kind}) queued")
+    return job, False
+
+def wait_for_job(job, timeout=None):
+    """Block until a job has finished; returns its result (None on timeout)"""
+    with jobs_changed:
+        jobs_changed.wait_for(lambda: job['status'] in ('finished', 'failed'), timeout)
+    return job['result']
+
+def renewal_claims(kind, settings=None):
+    """What a workflow renews: one claim per qBittorrent target, plus Prowlarr for Fix All"""
+    if kind == 'Delete Old Sessions':
+        return {'mam_sessions'}
+    if kind == 'Fix Prowlarr':
+        return {'renewal:prowlarr'}
+    claims = {f"renewal:{target['id']}" for target in get_qbittorrent_targets(settings)}
+    if kind == 'Fix All':
+        claims.add('renewal:prowlarr')
+    return claims
+
+def start_job(kind, func):
+    """Endpoint helper: run func (a route body returning JSON) as a background job
+
+    The request context is carried into the job so request options (force, delete
+    mode) still apply. A request for work already in flight attaches to that job, and
+    an Idempotency-Key header makes retries return the job of the first attempt.
+    Returns 202 with the job id, or the job's result when the client asked to wait.
+    """
+    request_data = request.get_json(silent=True) or {}
+    idempotency_key = request.headers.get('Idempotency-Key', '').strip()[:128] or None
+    job, attached = submit_job(kind, copy_current_request_context(lambda: func().get_json()),
+                               renewal_claims(kind), idempotency_key)
+    if request_data.get('wait'):
+        return jsonify(wait_for_job(job))
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'attached': attached,
+        'message': f"{job['kind']} already in progress - following job {job['id']}" if attached else f'{kind} queued',
+        'status_url': url_for('api_get_job', job_id=job['id']),
+        'events_url': url_for('api_job_events', job_id=job['id'])
+    }), 202
+
+def report_job_progress(message=None, completed=None, total=None, steps=None):
+    """Record progress of the job the current thread works for (no-op outside a job)
+
+    steps is the list of steps finished so far; ones not yet announced are published
+    as step-end events.
+    """
+    job_id = getattr(execution_context, 'job_id', None)
+    if not job_id:
+        return
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if not job:
+            return
+        if message is not None:
+            job['progress']['message'] = message
+        if completed is not None:
+            job['progress']['completed'] = completed
+        if total is not None:
+            job['progress']['total'] = total
+        if steps is not None:
+            job['steps'] = list(steps)
+            for step in steps:
+                if step['name'] not in job['published_steps']:
+                    _add_job_event(job, 'step-end', dict(step))
+        _add_job_event(job, 'progress', dict(job['progress']))
+
+@app.route('/api/jobs', methods=['GET'])
+def api_list_jobs():
+    """Recent jobs, newest first (?active=1 for queued and running only)"""
+    active_only = request.args.get('active') in ('1', 'true')
+    with jobs_lock:
+        listed = [job_summary(job, include_steps=False) for job in sorted(jobs.values(), key=lambda job: job['created'], reverse=True)
+                  if not active_only or job['status'] in ('queued', 'running')]
+    return jsonify({'success': True, 'jobs': listed})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_get_job(job_id):
+    """Status, progress, steps so far and (when finished) the result of one job"""
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if not job:
+            return jsonify({'success': False, 'message': 'Unknown job'}), 404
+        return jsonify(dict(job_summary(job), success=True))
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def api_job_events(job_id):
+    """Server-Sent Events stream of one job: status, step-start, step-end, progress, done
+
+    Replays the job's events so far (after Last-Event-ID when reconnecting) and ends
+    after the done event.
+    """
+    global open_job_streams
+    max_streams = int(load_settings().get('sse_max_streams', 4))
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if not job:
+            return jsonify({'success': False, 'message': 'Unknown job'}), 404
+        if open_job_streams >= max_streams:
+            return jsonify({'success': False, 'message': f'Too many open progress streams - poll /api/jobs/{job_id} instead'}), 503
+        open_job_streams += 1
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    sent = int(last_event_id) if last_event_id.isdigit() else 0
+
+    def stream():
+        nonlocal sent
+        yield 'retry: 3000\n\n'
+        while True:
+            with jobs_changed:
+                if len(job['events']) <= sent and job['status'] not in ('finished', 'failed'):
+                    jobs_changed.wait(timeout=SSE_KEEPALIVE_SECONDS)
+                pending = job['events'][sent:]
+                done = job['status'] in ('finished', 'failed')
+            if not pending:
+                yield ': keepalive\n\n'
+            for event in pending:
+                sent = event['id']
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(dict(event['data'], time=event['time']))}\n\n"
+            if done and len(job['events']) <= sent:
+                break
+
+    def release_stream():
+        global open_job_streams
+        with jobs_lock:
+            open_job_streams -= 1
+
+    response = Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # The server closes every response, also one whose body is never read (HEAD, a
+    # client gone before the first chunk); a generator's finally would not run then
+    response.call_on_close(release_stream)
+    return response
+
+# Basic Mode Orchestration Endpoints
+
+@app.route('/api/fix_myanonamouse', methods=['POST'])
+def api_fix_myanonamouse():
+    """Orchestrate Fix MyAnonamouse workflow (queued as a background job)"""
+    return start_job('Fix MyAnonamouse', _fix_myanonamouse_internal)
+
+def _fix_myanonamouse_internal():
+    """Orchestrate Fix MyAnonamouse workflow"""
+    log_info("Fix MyAnonamouse orchestration started")
+    steps = []
+    overall_success = True
+    
+    try:
+        # Nothing can be pushed while MAM's change window is closed
+        cooldown_step = mam_cooldown_step()
+        if cooldown_step:
+            steps.append(cooldown_step)
+            return jsonify({
+                'success': True,
+                'skipped': True,
+                'message': 'Fix MyAnonamouse skipped - MAM cooldown active',
+                'steps': steps
+            })
+
+        # Nothing to do if the VPN IP and pushed cookie are unchanged
+        unchanged_steps = run_change_check(include_prowlarr=False, mode='Basic Mode - Fix MyAnonamouse')
+        if unchanged_steps:
+            steps.extend(unchanged_steps)
+            success = not any(step['status'] in ('FAILED', 'ERROR') for step in steps)
+            pushed = len(unchanged_steps) > 1
+            save_run_to_history(success, steps)
+            return jsonify({
+                'success': success,
+                'skipped': True,
+                'message': ('Fix MyAnonamouse: sessions unchanged - new VPN IP pushed to MAM' if success else 'Fix MyAnonamouse: sessions unchanged - pushing the new VPN IP to MAM failed') if pushed else 'Fix MyAnonamouse skipped - nothing changed',
+                'steps': steps
+            })
+        
+        clock = time.time()
         # Step 1: Clear Cookies
         log_info("Step 1: Clear Cookies")
+        report_job_progress('Clear Cookies', 0, 6, steps)
         try:
             response = api_clear_cookies()
             data = response.get_json()
@@ -2603,75 +6243,68 @@ def api_fix_myanonamouse():
             steps.append({'name': 'Clear Cookies', 'status': 'ERROR', 'message': str(e)})
             log_error(f"✗ Clear Cookies error: {e}")
             overall_success = False
-        
-        # Step 2: Restart qBittorrent Container
-        log_info("Step 2: Restart qBittorrent Container")
-        try:
-            response = api_restart_qbittorrent_container()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Restart qBittorrent', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Restart qBittorrent: Success")
-            else:
-                steps.append({'name': 'Restart qBittorrent', 'status': 'FAILED', 'message': data['message']})
-                log_error(f"✗ Restart qBittorrent: {data['message']}")
-                overall_success = False
-                # Critical failure - stop here
-                return jsonify({
-                    'success': False,
-                    'message': 'Fix MyAnonamouse failed: Could not restart qBittorrent container',
-                    'steps': steps
-                })
-        except Exception as e:
-            steps.append({'name': 'Restart qBittorrent', 'status': 'ERROR', 'message': str(e)})
-            log_error(f"✗ Restart qBittorrent error: {e}")
+        stamp_steps(steps, clock)
+        
+        targets = get_qbittorrent_targets()
+        target_steps = {t['id']: [] for t in targets}
+        
+        # Steps 2-3: Restart each qBittorrent container and wait for its VPN tunnel to
+        # report a post-restart IP (targets run concurrently)
+        log_info(f"Steps 2-3: Restart qBittorrent and Wait for VPN ({len(targets)} target(s))")
+        report_job_progress('Restart qBittorrent and Wait for VPN', 1, 6, steps)
+        restarts = run_for_targets(targets, lambda target: restart_target_phase(target, require_vpn=True))
+        for restart in restarts:
+            steps.extend(restart['steps'])
+            target_steps[restart['target']['id']].extend(restart['steps'])
+        ready = [r for r in restarts if r['ready']]
+        if len(ready) < len(restarts):
+            overall_success = False
+        if not ready:
+            # Critical failure - a stale VPN IP would create a useless session
+            reason = 'VPN did not come up after restart' if restarts[0]['restarted'] else 'Could not restart qBittorrent container'
             return jsonify({
                 'success': False,
-                'message': f'Fix MyAnonamouse failed: {str(e)}',
+                'message': f'Fix MyAnonamouse failed: {reason}',
                 'steps': steps
             })
         
-        # Step 3: Wait 30 seconds
-        log_info("Step 3: Waiting 30 seconds...")
-        steps.append({'name': 'Wait 30 seconds', 'status': 'SUCCESS', 'message': 'Waiting for container to stabilize'})
-        time.sleep(30)
-        
+        clock = time.time()
         # Step 4: Get IPs
         log_info("Step 4: Get IPs")
-        try:
-            response = api_get_ips()
-            data = response.get_json()
-            if data.get('external_ip') and data.get('vpn_ip'):
-                steps.append({'name': 'Get IPs', 'status': 'SUCCESS', 'message': f"External: {data['external_ip']}, VPN: {data['vpn_ip']}"})
-                log_info(f"✓ Get IPs: External={data['external_ip']}, VPN={data['vpn_ip']}")
-            else:
-                steps.append({'name': 'Get IPs', 'status': 'FAILED', 'message': 'Could not retrieve IPs'})
-                log_info("✗ Get IPs: Failed to retrieve")
+        report_job_progress('Get IPs', 2, 6, steps)
+        ext_ip = get_external_ip([])
+        for restart in ready:
+            step = get_ips_step(restart['target'], ext_ip, restart['vpn_ip'])
+            steps.append(step)
+            target_steps[restart['target']['id']].append(step)
+            if step['status'] != 'SUCCESS':
                 overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Get IPs', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Get IPs error: {e}")
-            overall_success = False
+        clock = stamp_steps(steps, clock)
         
-        # Step 5: Create qBittorrent Session
+        # Step 5: Create qBittorrent Sessions (all targets in one security page visit)
         log_info("Step 5: Create qBittorrent Session")
+        report_job_progress('Create qBittorrent Session', 3, 6, steps)
         try:
-            response = api_create_qbittorrent_cookie()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Create qBittorrent Session', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Create qBittorrent Session: Success")
-            else:
-                steps.append({'name': 'Create qBittorrent Session', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Create qBittorrent Session: {data['message']}")
-                overall_success = False
+            batch = create_session_cookies_batch([qbittorrent_session_spec(r['vpn_ip'], r['target']) for r in ready])
+            for restart, result in zip(ready, batch['results']):
+                name = target_step_name('Create qBittorrent Session', restart['target'])
+                step = {'name': name, 'status': 'SUCCESS' if result['success'] else 'FAILED', 'message': result['message']}
+                steps.append(step)
+                target_steps[restart['target']['id']].append(step)
+                if result['success']:
+                    log_info(f"✓ {name}: Success")
+                else:
+                    log_info(f"✗ {name}: {result['message']}")
+                    overall_success = False
         except Exception as e:
             steps.append({'name': 'Create qBittorrent Session', 'status': 'ERROR', 'message': str(e)})
             log_info(f"✗ Create qBittorrent Session error: {e}")
             overall_success = False
+        clock = stamp_steps(steps, clock)
         
         # Step 6: Logout MAM
         log_info("Step 6: Logout MAM")
+        report_job_progress('Logout MAM', 4, 6, steps)
         try:
             response = api_logout_mam()
             data = response.get_json()
@@ -2686,60 +6319,24 @@ def api_fix_myanonamouse():
             steps.append({'name': 'Logout MAM', 'status': 'ERROR', 'message': str(e)})
             log_info(f"✗ Logout MAM error: {e}")
             overall_success = False
-        
-        # Step 7: Log into qBittorrent
-        log_info("Step 7: Log into qBittorrent")
-        try:
-            response = api_qbittorrent_login()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Login qBittorrent', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Login qBittorrent: Success")
-            else:
-                steps.append({'name': 'Login qBittorrent', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Login qBittorrent: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Login qBittorrent', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Login qBittorrent error: {e}")
-            overall_success = False
-        
-        # Step 8: Send Cookie to MAM
-        log_info("Step 8: Send Cookie to MAM")
-        try:
-            response = _qbittorrent_send_cookie_internal(mode='Basic Mode - Fix MyAnonamouse')
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Send Cookie to MAM', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Send Cookie to MAM: Success")
-            else:
-                steps.append({'name': 'Send Cookie to MAM', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Send Cookie to MAM: {data['message']}")
+        stamp_steps(steps, clock)
+        
+        # Steps 7-9: Log into each qBittorrent container, send its cookie to MAM and log out
+        log_info("Steps 7-9: Login qBittorrent, Send Cookie to MAM, Logout qBittorrent")
+        report_job_progress('Send Cookie to MAM', 5, 6, steps)
+        ready_ids = {r['target']['id'] for r in ready}
+        consumers = [c for c in get_cookie_consumers() if c['kind'] == 'qbittorrent' and c['target']['id'] in ready_ids]
+        for push in push_cookie_to_consumers(consumers, 'Basic Mode - Fix MyAnonamouse'):
+            steps.extend(push['steps'])
+            target_steps[push['consumer']['target']['id']].extend(push['steps'])
+            if any(step['status'] in ('FAILED', 'ERROR') for step in push['steps']):
                 overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Send Cookie to MAM', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Send Cookie to MAM error: {e}")
-            overall_success = False
         
-        # Step 9: Logout qBittorrent
-        log_info("Step 9: Logout qBittorrent")
-        try:
-            response = api_qbittorrent_logout()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Logout qBittorrent', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Logout qBittorrent: Success")
-            else:
-                steps.append({'name': 'Logout qBittorrent', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Logout qBittorrent: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Logout qBittorrent', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Logout qBittorrent error: {e}")
-            overall_success = False
+        vpn_ips = {r['target']['id']: r['vpn_ip'] for r in restarts}
+        target_results = [target_run_summary(t, target_steps[t['id']], vpn_ips.get(t['id'])) for t in targets]
         
         # Save to history
-        save_run_to_history(overall_success, steps)
+        save_run_to_history(overall_success, steps, target_results)
         
         # Final result
         if overall_success:
@@ -2747,14 +6344,16 @@ def api_fix_myanonamouse():
             return jsonify({
                 'success': True,
                 'message': 'Fix MyAnonamouse completed successfully',
-                'steps': steps
+                'steps': steps,
+                'targets': target_results
             })
         else:
             log_info("Fix MyAnonamouse completed with some failures")
             return jsonify({
                 'success': False,
                 'message': 'Fix MyAnonamouse completed with some failures',
-                'steps': steps
+                'steps': steps,
+                'targets': target_results
             })
             
     except Exception as e:
@@ -2767,14 +6366,20 @@ def api_fix_myanonamouse():
 
 @app.route('/api/fix_prowlarr', methods=['POST'])
 def api_fix_prowlarr():
+    """Orchestrate Fix Prowlarr workflow (queued as a background job)"""
+    return start_job('Fix Prowlarr', _fix_prowlarr_internal)
+
+def _fix_prowlarr_internal():
     """Orchestrate Fix Prowlarr workflow"""
     log_info("Fix Prowlarr orchestration started")
     steps = []
     overall_success = True
     
     try:
+        clock = time.time()
         # Step 1: Clear Cookies
         log_info("Step 1: Clear Cookies")
+        report_job_progress('Clear Cookies', 0, 6, steps)
         try:
             response = api_clear_cookies()
             data = response.get_json()
@@ -2789,9 +6394,11 @@ def api_fix_prowlarr():
             steps.append({'name': 'Clear Cookies', 'status': 'ERROR', 'message': str(e)})
             log_info(f"✗ Clear Cookies error: {e}")
             overall_success = False
+        clock = stamp_steps(steps, clock)
         
         # Step 2: Get IPs
         log_info("Step 2: Get IPs")
+        report_job_progress('Get IPs', 1, 6, steps)
         try:
             response = api_get_ips()
             data = response.get_json()
@@ -2806,9 +6413,11 @@ def api_fix_prowlarr():
             steps.append({'name': 'Get IPs', 'status': 'ERROR', 'message': str(e)})
             log_info(f"✗ Get IPs error: {e}")
             overall_success = False
+        clock = stamp_steps(steps, clock)
         
         # Step 3: Create Prowlarr Session
         log_info("Step 3: Create Prowlarr Session")
+        report_job_progress('Create Prowlarr Session', 2, 6, steps)
         try:
             response = api_create_prowlarr_cookie()
             data = response.get_json()
@@ -2823,9 +6432,11 @@ def api_fix_prowlarr():
             steps.append({'name': 'Create Prowlarr Session', 'status': 'ERROR', 'message': str(e)})
             log_info(f"✗ Create Prowlarr Session error: {e}")
             overall_success = False
+        clock = stamp_steps(steps, clock)
         
         # Step 4: Logout MAM
         log_info("Step 4: Logout MAM")
+        report_job_progress('Logout MAM', 3, 6, steps)
         try:
             response = api_logout_mam()
             data = response.get_json()
@@ -2840,9 +6451,11 @@ def api_fix_prowlarr():
             steps.append({'name': 'Logout MAM', 'status': 'ERROR', 'message': str(e)})
             log_info(f"✗ Logout MAM error: {e}")
             overall_success = False
+        clock = stamp_steps(steps, clock)
         
         # Step 5: Log into Prowlarr
         log_info("Step 5: Log into Prowlarr")
+        report_job_progress('Login Prowlarr', 4, 6, steps)
         try:
             response = api_prowlarr_login()
             data = response.get_json()
@@ -2857,13 +6470,18 @@ def api_fix_prowlarr():
             steps.append({'name': 'Login Prowlarr', 'status': 'ERROR', 'message': str(e)})
             log_info(f"✗ Login Prowlarr error: {e}")
             overall_success = False
+        clock = stamp_steps(steps, clock)
         
         # Step 6: Send Cookie to Prowlarr
         log_info("Step 6: Send Cookie to Prowlarr")
+        report_job_progress('Send Cookie to Prowlarr', 5, 6, steps)
         try:
             response = api_prowlarr_send_cookie()
             data = response.get_json()
-            if data['success']:
+            if data['success'] and data.get('changed') is False:
+                steps.append({'name': 'Send Cookie to Prowlarr', 'status': 'SKIPPED', 'message': data['message']})
+                log_info("- Send Cookie to Prowlarr: No change")
+            elif data['success']:
                 steps.append({'name': 'Send Cookie to Prowlarr', 'status': 'SUCCESS', 'message': data['message']})
                 log_info("✓ Send Cookie to Prowlarr: Success")
             else:
@@ -2874,6 +6492,14 @@ def api_fix_prowlarr():
             steps.append({'name': 'Logout Prowlarr', 'status': 'ERROR', 'message': str(e)})
             log_info(f"✗ Logout Prowlarr error: {e}")
             overall_success = False
+        stamp_steps(steps, clock)
+        
+        # Extra Prowlarr instances get the same cookie (concurrently)
+        arr_consumers = [c for c in get_cookie_consumers() if c['kind'] == 'arr']
+        for push in push_cookie_to_consumers(arr_consumers, 'Basic Mode - Fix Prowlarr'):
+            steps.extend(push['steps'])
+            if any(step['status'] in ('FAILED', 'ERROR') for step in push['steps']):
+                overall_success = False
         
         # Save to history
         save_run_to_history(overall_success, steps)
@@ -2904,240 +6530,87 @@ def api_fix_prowlarr():
 
 @app.route('/api/fix_all', methods=['POST'])
 def api_fix_all():
-    """Orchestrate Fix All workflow"""
+    """Orchestrate Fix All workflow (queued as a background job)"""
+    request_data = request.get_json(silent=True) or {}
+    reconcile = request_data.get('reconcile')
+    return start_job('Fix All', lambda: _fix_all_internal(reconcile))
+
+def _fix_all_internal(reconcile=None):
+    """Orchestrate Fix All workflow (reconcile overrides the session_mode setting)"""
     log_info("Fix All orchestration started")
     steps = []
     overall_success = True
+    reconcile = session_reconcile_enabled(load_settings(), reconcile)
+    if reconcile:
+        log_info("Session reconcile mode: existing matching MAM sessions will be reused")
     
     try:
-        # Step 1: Clear Cookies
-        log_info("Step 1: Clear Cookies")
-        try:
-            response = api_clear_cookies()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Clear Cookies', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Clear Cookies: Success")
-            else:
-                steps.append({'name': 'Clear Cookies', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Clear Cookies: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Clear Cookies', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Clear Cookies error: {e}")
-            overall_success = False
-        
-        # Step 2: Restart qBittorrent Container
-        log_info("Step 2: Restart qBittorrent Container")
-        try:
-            response = api_restart_qbittorrent_container()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Restart qBittorrent', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Restart qBittorrent: Success")
-            else:
-                steps.append({'name': 'Restart qBittorrent', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Restart qBittorrent: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Restart qBittorrent', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Restart qBittorrent error: {e}")
-            overall_success = False
-        
-        # Step 3: Wait 30 seconds
-        log_info("Step 3: Waiting 30 seconds...")
-        steps.append({'name': 'Wait 30 seconds', 'status': 'SUCCESS', 'message': 'Waiting for container to stabilize'})
-        time.sleep(30)
-        
-        # Step 4: Get IPs
-        log_info("Step 4: Get IPs")
-        try:
-            response = api_get_ips()
-            data = response.get_json()
-            if data.get('external_ip') and data.get('vpn_ip'):
-                steps.append({'name': 'Get IPs', 'status': 'SUCCESS', 'message': f"External: {data['external_ip']}, VPN: {data['vpn_ip']}"})
-                log_info(f"✓ Get IPs: External={data['external_ip']}, VPN={data['vpn_ip']}")
-            else:
-                steps.append({'name': 'Get IPs', 'status': 'FAILED', 'message': 'Could not retrieve IPs'})
-                log_info("✗ Get IPs: Failed to retrieve")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Get IPs', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Get IPs error: {e}")
-            overall_success = False
-        
-        # Step 5: Delete old sessions
-        log_info("Step 5: Delete old sessions")
-        try:
-            response = api_delete_old_sessions()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Delete Old Sessions', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Delete Old Sessions: Success")
-            else:
-                steps.append({'name': 'Delete Old Sessions', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Delete Old Sessions: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Delete Old Sessions', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Delete Old Sessions error: {e}")
-            overall_success = False
-        
-        # Step 6: Create qBittorrent Session
-        log_info("Step 6: Create qBittorrent Session")
-        try:
-            response = api_create_qbittorrent_cookie()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Create qBittorrent Session', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Create qBittorrent Session: Success")
-            else:
-                steps.append({'name': 'Create qBittorrent Session', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Create qBittorrent Session: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Create qBittorrent Session', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Create qBittorrent Session error: {e}")
-            overall_success = False
-        
-        # Step 7: Create Prowlarr Session
-        log_info("Step 7: Create Prowlarr Session")
-        try:
-            response = api_create_prowlarr_cookie()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Create Prowlarr Session', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Create Prowlarr Session: Success")
-            else:
-                steps.append({'name': 'Create Prowlarr Session', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Create Prowlarr Session: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Create Prowlarr Session', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Create Prowlarr Session error: {e}")
-            overall_success = False
-        
-        # Step 8: Logout MAM
-        log_info("Step 8: Logout MAM")
-        try:
-            response = api_logout_mam()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Logout MAM', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Logout MAM: Success")
-            else:
-                steps.append({'name': 'Logout MAM', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Logout MAM: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Logout MAM', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Logout MAM error: {e}")
-            overall_success = False
-        
-        # Step 9: Log into qBittorrent
-        log_info("Step 9: Log into qBittorrent")
-        try:
-            response = api_qbittorrent_login()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Login qBittorrent', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Login qBittorrent: Success")
-            else:
-                steps.append({'name': 'Login qBittorrent', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Login qBittorrent: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Login qBittorrent', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Login qBittorrent error: {e}")
-            overall_success = False
-        
-        # Step 10: Send Cookie to MAM
-        log_info("Step 10: Send Cookie to MAM")
-        try:
-            response = _qbittorrent_send_cookie_internal(mode='Basic Mode - Fix All')
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Send Cookie to MAM', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Send Cookie to MAM: Success")
-            else:
-                steps.append({'name': 'Send Cookie to MAM', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Send Cookie to MAM: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Send Cookie to MAM', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Send Cookie to MAM error: {e}")
-            overall_success = False
-        
-        # Step 11: Logout qBittorrent
-        log_info("Step 11: Logout qBittorrent")
-        try:
-            response = api_qbittorrent_logout()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Logout qBittorrent', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Logout qBittorrent: Success")
-            else:
-                steps.append({'name': 'Logout qBittorrent', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Logout qBittorrent: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Logout qBittorrent', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Logout qBittorrent error: {e}")
-            overall_success = False
-        
-        # Step 12: Log into Prowlarr
-        log_info("Step 12: Log into Prowlarr")
-        try:
-            response = api_prowlarr_login()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Login Prowlarr', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Login Prowlarr: Success")
-            else:
-                steps.append({'name': 'Login Prowlarr', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Login Prowlarr: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Login Prowlarr', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Login Prowlarr error: {e}")
-            overall_success = False
-        
-        # Step 13: Send Cookie to Prowlarr
-        log_info("Step 13: Send Cookie to Prowlarr")
-        try:
-            response = api_prowlarr_send_cookie()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Send Cookie to Prowlarr', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Send Cookie to Prowlarr: Success")
-            else:
-                steps.append({'name': 'Send Cookie to Prowlarr', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Send Cookie to Prowlarr: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Send Cookie to Prowlarr', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Send Cookie to Prowlarr error: {e}")
-            overall_success = False
+        # Steps 1-14 as a dependency graph: independent steps (Prowlarr login and session,
+        # deleting old sessions, other targets) run while the containers restart. A target
+        # in MAM cooldown only has its Send Cookie to MAM push skipped (see
+        # fix_all_qbittorrent_push)
+        settings = load_settings()
+        targets = get_qbittorrent_targets(settings)
+        context = {
+            'mode': 'Basic Mode - Fix All',
+            'reconcile': reconcile,
+            'targets': targets,
+            'restarts': {},
+            'ext_ip': None
+        }
+        nodes = build_fix_all_workflow(targets, get_cookie_consumers(settings), reconcile, FIX_ALL_NODE_RUNNERS)
+
+        # Resume an interrupted or partly failed run from its checkpoint ({"resume": false}
+        # or the workflow_resume setting turn this off)
+        request_data = request.get_json(silent=True) if has_request_context() else None
+        resume = (request_data or {}).get('resume', settings.get('workflow_resume', True))
+        completed, resume_state = find_fix_all_resume_point(nodes, targets, reconcile) if resume else ({}, None)
+        if completed:
+            context['ext_ip'] = resume_state.get('ext_ip')
+            for target_id, vpn_ip in resume_state.get('vpn_ips', {}).items():
+                context['restarts'][target_id] = {'vpn_ip': vpn_ip}
+        else:
+            # Nothing to do if the VPN IP, external IP and pushed cookies are unchanged
+            unchanged_steps = run_change_check(include_prowlarr=True, mode=context['mode'])
+            if unchanged_steps:
+                steps.extend(unchanged_steps)
+                success = not any(step['status'] in ('FAILED', 'ERROR') for step in steps)
+                pushed = len(unchanged_steps) > 1
+                save_run_to_history(success, steps)
+                return jsonify({
+                    'success': success,
+                    'skipped': True,
+                    'message': ('Fix All: sessions unchanged - new VPN IP pushed to MAM' if success else 'Fix All: sessions unchanged - pushing the new VPN IP to MAM failed') if pushed else 'Fix All skipped - nothing changed',
+                    'steps': steps
+                })
+
+        log_info(f"Steps 1-14: running {len(nodes) - len(completed)} of {len(nodes)} workflow nodes for {len(targets)} target(s)")
+        checkpointer = fix_all_checkpointer(nodes, targets, reconcile, context, completed)
+        # Resumed steps took no time in this run, so they carry no timing
+        resumed = {
+            node_id: [
+                {key: value for key, value in dict(step, message=f"{step['message']} (from checkpoint)").items()
+                 if key not in ('started', 'seconds', 'retries')}
+                for step in node_steps
+            ]
+            for node_id, node_steps in completed.items()
+        }
+        workflow = run_workflow(nodes, context, max_workers=settings.get('workflow_max_workers', 8),
+                                completed=resumed, on_node_done=checkpointer)
+        steps.extend(workflow['steps'])
+        overall_success = not any(step['status'] in ('FAILED', 'ERROR') for step in steps)
+        if overall_success:
+            clear_fix_all_checkpoint()
+        else:
+            log_info("Fix All checkpoint kept - the next run resumes from the first incomplete step")
         
-        # Step 14: Logout Prowlarr
-        log_info("Step 14: Logout Prowlarr")
-        try:
-            response = api_prowlarr_logout()
-            data = response.get_json()
-            if data['success']:
-                steps.append({'name': 'Logout Prowlarr', 'status': 'SUCCESS', 'message': data['message']})
-                log_info("✓ Logout Prowlarr: Success")
-            else:
-                steps.append({'name': 'Logout Prowlarr', 'status': 'FAILED', 'message': data['message']})
-                log_info(f"✗ Logout Prowlarr: {data['message']}")
-                overall_success = False
-        except Exception as e:
-            steps.append({'name': 'Logout Prowlarr', 'status': 'ERROR', 'message': str(e)})
-            log_info(f"✗ Logout Prowlarr error: {e}")
-            overall_success = False
+        target_results = [
+            target_run_summary(t, fix_all_target_steps(steps, t), context['restarts'].get(t['id'], {}).get('vpn_ip'))
+            for t in targets
+        ]
         
         # Save to history
-        save_run_to_history(overall_success, steps)
+        save_run_to_history(overall_success, steps, target_results)
         
         # Final result
         if overall_success:
@@ -3145,14 +6618,16 @@ def api_fix_all():
             return jsonify({
                 'success': True,
                 'message': 'Fix All completed successfully',
-                'steps': steps
+                'steps': steps,
+                'targets': target_results
             })
         else:
             log_info("Fix All completed with some failures")
             return jsonify({
                 'success': False,
                 'message': 'Fix All completed with some failures',
-                'steps': steps
+                'steps': steps,
+                'targets': target_results
             })
             
     except Exception as e:
@@ -3165,8 +6640,75 @@ def api_fix_all():
 
 # Timer state management functions are defined earlier in the file
 
-def save_run_to_history(success, steps):
-    """Save run result to history and persist to settings"""
+# Step timing
+#
+# Every step records when it started ('started'), how long it took ('seconds') and how
+# often it was retried ('retries'). Sequential code stamps its steps as it goes with
+# stamp_steps; the workflow engine and the cookie fan-out stamp whatever is left with
+# the duration of the node or push. The timings of the last STEP_TIMINGS_KEEP runs are
+# kept in the history file and /api/timer_status reports p50/p95 per step over the
+# last step_stats_window runs.
+
+STEP_TIMINGS_KEEP = 100
+
+def stamp_steps(steps, since):
+    """Time the steps that have no timing yet as running from since until now
+
+    Returns now, the start of whatever runs next.
+    """
+    now = time.time()
+    for step in steps:
+        if 'seconds' not in step:
+            step['started'] = datetime.fromtimestamp(since).strftime('%Y-%m-%d %H:%M:%S')
+            step['seconds'] = round(now - since, 1)
+            step.setdefault('retries', 0)
+    return now
+
+def step_timing_summary(steps):
+    """Timing fields of the timed steps of a run, for the history"""
+    return [
+        {'name': step['name'], 'status': step['status'], 'started': step['started'],
+         'seconds': step['seconds'], 'retries': step.get('retries', 0)}
+        for step in steps if 'seconds' in step
+    ]
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    import math
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def step_duration_stats(step_timings, window):
+    """p50/p95 duration, retries and failures per step name over the last window runs"""
+    runs = step_timings[:window]
+    durations, retries, failures, order = {}, {}, {}, []
+    for run in runs:
+        for step in run['steps']:
+            name = step['name']
+            if name not in durations:
+                durations[name], retries[name], failures[name] = [], 0, 0
+                order.append(name)
+            durations[name].append(step['seconds'])
+            retries[name] += step.get('retries', 0)
+            if step['status'] in ('FAILED', 'ERROR'):
+                failures[name] += 1
+    return {
+        'window': window,
+        'runs': len(runs),
+        'steps': [
+            {'name': name, 'count': len(durations[name]),
+             'p50': percentile(durations[name], 0.5), 'p95': percentile(durations[name], 0.95),
+             'max': max(durations[name]), 'retries': retries[name], 'failures': failures[name]}
+            for name in order
+        ]
+    }
+
+def save_run_to_history(success, steps, target_results=None):
+    """Save run result to history and persist to settings
+
+    target_results (see target_run_summary) is kept on the entry when more than one
+    qBittorrent target took part in the run.
+    """
     from datetime import datetime
     
     with timer_lock:
@@ -3174,6 +6716,9 @@ def save_run_to_history(success, steps):
         if success:
             status = 'Success'
             details = f"All {len(steps)} steps completed successfully"
+            skipped_count = len([s for s in steps if s['status'] == 'SKIPPED'])
+            if skipped_count:
+                details += f" ({skipped_count} skipped, unchanged)"
         else:
             failed_steps = [s for s in steps if s['status'] in ['FAILED', 'ERROR']]
             success_count = len([s for s in steps if s['status'] == 'SUCCESS'])
@@ -3193,6 +6738,13 @@ def save_run_to_history(success, steps):
             'status': status,
             'details': details
         }
+        if target_results and len(target_results) > 1:
+            entry['targets'] = target_results
+        timed_steps = step_timing_summary(steps)
+        if timed_steps:
+            entry['steps'] = timed_steps
+            timer_state['step_timings'].insert(0, {'timestamp': entry['timestamp'], 'steps': timed_steps})
+            del timer_state['step_timings'][STEP_TIMINGS_KEEP:]
         
         # Add to history (keep last 10)
         timer_state['history'].insert(0, entry)
@@ -3205,7 +6757,7 @@ def save_run_to_history(success, steps):
         log_info(f"Run saved to history: {status} - {entry['details']}")
         
         # Persist history to dedicated file
-        save_history(timer_state['history'], timer_state['last_run'])
+        save_history(timer_state['history'], timer_state['last_run'], timer_state['step_timings'])
 
 def calculate_next_run_time(add_interval_days=False):
     """Calculate next run time with jitter
@@ -3257,10 +6809,12 @@ def run_fix_all_as_timer():
         # Set execution context to Timer mode
         execution_context.mode = 'Timer'
         
-        # Run Fix All - it will detect Timer context and use 'Timer' as mode
-        response = api_fix_all()
-        
-        return response
+        # Queue Fix All (it will detect Timer context and use 'Timer' as mode), or follow
+        # a run that is already in progress, and wait for its result
+        job, attached = submit_job('Fix All', lambda: _fix_all_internal().get_json(), renewal_claims('Fix All'))
+        if attached:
+            log_info(f"Timer: Fix All already in progress - waiting for job {job['id']}")
+        return wait_for_job(job)
         
     except Exception as e:
         log_error(f"Timer Fix All error: {e}")
@@ -3330,15 +6884,22 @@ def timer_worker():
 
 @app.route('/api/timer_status', methods=['GET'])
 def api_timer_status():
-    """Get timer status"""
+    """Get timer status (?window=N for step durations over the last N runs)"""
     with timer_lock:
         settings = load_settings()
+        window = request.args.get('window', settings.get('step_stats_window', 20))
+        try:
+            window = max(1, min(int(window), STEP_TIMINGS_KEEP))
+        except (TypeError, ValueError):
+            window = 20
         return jsonify({
             'active': timer_state['active'],
             'next_run': timer_state.get('next_run'),
             'last_run': timer_state.get('last_run'),
             'history': timer_state.get('history', []),
-            'auto_start': settings.get('timer_auto_start', False)
+            'auto_start': settings.get('timer_auto_start', False),
+            'mam_cooldown': get_mam_cooldown(settings),
+            'step_stats': step_duration_stats(timer_state['step_timings'], window)
         })
 
 @app.route('/api/timer_auto_start', methods=['POST'])
@@ -3350,9 +6911,10 @@ def api_timer_auto_start():
     log_info(f"Timer auto-start toggle requested: {auto_start}")
     
     try:
-        settings = load_settings()
-        settings['timer_auto_start'] = auto_start
-        save_settings(settings)
+        with settings_lock:
+            settings = load_settings()
+            settings['timer_auto_start'] = auto_start
+            save_settings(settings)
         
         # Also save current timer state if enabling auto-start
         if auto_start:
@@ -3477,6 +7039,26 @@ def api_status():
             'next_scheduled_run': None
         })
 
+@app.route('/api/asn_index', methods=['GET'])
+def api_asn_index():
+    """ASN index status, memory footprint and optional lookup (?ip=)"""
+    settings = load_settings()
+    path = settings.get('asn_database_path', '')
+    index = get_asn_index(settings)
+    if index is None:
+        return jsonify({'loaded': False, 'path': path, 'message': 'ASN database not configured or not readable'})
+
+    result = {
+        'loaded': True,
+        'path': index['path'],
+        'load_seconds': round(index['load_seconds'], 3),
+        'memory': asn_index_memory_report(index)
+    }
+    if request.args.get('ip'):
+        asn = lookup_asn(index, request.args['ip'])
+        result['lookup'] = {'ip': request.args['ip'], 'asn': asn}
+    return jsonify(result)
+
 @app.route('/api/health')
 def api_health():
     """Health check endpoint for Docker and monitoring tools"""
@@ -3501,6 +7083,17 @@ def api_health():
         # Check if timer is active
         health_status['timer_active'] = timer_state.get('active', False)
         health_status['timer_next_run'] = timer_state.get('next_run')
+
+        # Global browser uptime and memory (chromedriver + Chrome process tree)
+        health_status['browser'] = get_global_driver_status()
+
+        # qBittorrent Web API state, only on request (?qbittorrent=1) to keep the probe cheap
+        if request.args.get('qbittorrent') and health_status['settings_ok'] and settings.get('qbittorrent_url'):
+            try:
+                version = qbittorrent_api_version(settings, timeout=3)
+                health_status['qbittorrent'] = {'serving': version['serving'], 'version': version.get('version'), 'message': version['message']}
+            except requests.exceptions.RequestException as e:
+                health_status['qbittorrent'] = {'serving': False, 'message': str(e)}
         
         # Check if log file is writable
         try:
@@ -3640,6 +7233,9 @@ if timer_state['active']:
     timer_thread.start()
     log_info(f"Timer auto-started on app initialization - next run: {timer_state.get('next_run')}")
 
+# Re-arm a deferred MAM push left pending by the previous run
+restore_deferred_push()
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,52 @@
+"""Benchmark lookups against the offline IP -> ASN index
+
+Loads an ASN database with app.load_asn_index and times random IPv4 lookups,
+printing the load time, the index's memory report and the lookup rate.
+
+Usage: python scripts/benchmark_asn_index.py PATH [--lookups N]
+"""
+import argparse
+import ipaddress
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+def benchmark_asn_index(index, lookups=100000):
+    """Time random lookups against the index"""
+    rng = random.Random(42)
+    addresses = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(lookups)]
+    hits = 0
+    start_time = time.perf_counter()
+    for address in addresses:
+        if app.lookup_asn(index, address) is not None:
+            hits += 1
+    elapsed = time.perf_counter() - start_time
+    return {
+        'lookups': lookups,
+        'hits': hits,
+        'seconds': round(elapsed, 4),
+        'lookups_per_second': int(lookups / elapsed) if elapsed else None,
+        'microseconds_per_lookup': round(elapsed / lookups * 1e6, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark lookups against the offline IP -> ASN index')
+    parser.add_argument('path', help='ASN database (ip2asn-v4.tsv[.gz] or start,end,asn CSV)')
+    parser.add_argument('--lookups', type=int, default=100000, help='number of random lookups (default 100000)')
+    args = parser.parse_args()
+
+    index = app.load_asn_index(args.path)
+    print(json.dumps({
+        'load_seconds': round(index['load_seconds'], 3),
+        'memory': app.asn_index_memory_report(index),
+        'benchmark': benchmark_asn_index(index, max(1, args.lookups))
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
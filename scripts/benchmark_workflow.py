@@ -0,0 +1,67 @@
+"""Benchmark Fix All's dependency graph against stub backends
+
+Runs the graph built by app.build_fix_all_workflow once node by node and once on
+app.run_workflow. Every stub sleeps FIX_ALL_BENCHMARK_DELAYS[kind] * scale seconds
+and succeeds, so nothing touches MAM, Docker or Prowlarr.
+
+Usage: python scripts/benchmark_workflow.py [--targets N] [--scale S] [--reconcile]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+# Rough real-world durations (seconds) of each Fix All node
+FIX_ALL_BENCHMARK_DELAYS = {
+    'clear_cookies': 0.1, 'restart': 60, 'external_ip': 1, 'get_ips': 0.1,
+    'delete_old_sessions': 12, 'create_qbittorrent_sessions': 10, 'create_prowlarr_session': 10,
+    'reconcile_sessions': 20, 'logout_mam': 2, 'qbittorrent_push': 5,
+    'prowlarr_login': 15, 'prowlarr_send': 20, 'prowlarr_logout': 2, 'arr_push': 2
+}
+
+def benchmark_fix_all_workflow(target_count=1, scale=0.02, reconcile=False):
+    """Run Fix All's graph on stub backends, one node at a time and on the engine"""
+    def stub(context, node):
+        time.sleep(FIX_ALL_BENCHMARK_DELAYS[node['kind']] * scale)
+        return [{'name': node['step_name'], 'status': 'SUCCESS', 'message': 'Stub backend'}]
+
+    targets = [{'id': 'primary' if i == 0 else f'target{i}', 'name': f'qbittorrent{i}', 'primary': i == 0,
+                'container': f'qbittorrent{i}'} for i in range(target_count)]
+    consumers = [{'id': f"qbittorrent_{t['id']}", 'kind': 'qbittorrent', 'target': t,
+                  'step_name': app.target_step_name('Send Cookie to MAM', t), 'timeout': None} for t in targets]
+    consumers.append({'id': 'prowlarr', 'kind': 'prowlarr', 'step_name': 'Send Cookie to Prowlarr', 'timeout': None})
+    nodes = app.build_fix_all_workflow(targets, consumers, reconcile, {kind: stub for kind in FIX_ALL_BENCHMARK_DELAYS})
+
+    start_time = time.time()
+    for node in nodes:
+        node['run']({}, node)
+    sequential = time.time() - start_time
+    with app.app.app_context():
+        workflow = app.run_workflow(nodes, {}, max_workers=8)
+
+    return {
+        'targets': target_count,
+        'nodes': len(nodes),
+        'scale': scale,
+        'reconcile': reconcile,
+        'sequential_seconds': round(sequential, 2),
+        'workflow_seconds': round(workflow['elapsed'], 2),
+        'speedup': round(sequential / workflow['elapsed'], 2) if workflow['elapsed'] else None,
+        'steps': len(workflow['steps'])
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Fix All's workflow engine against stub backends")
+    parser.add_argument('--targets', type=int, default=1, help='number of qBittorrent targets (default 1)')
+    parser.add_argument('--scale', type=float, default=0.02, help='fraction of the real-world step durations to sleep (default 0.02)')
+    parser.add_argument('--reconcile', action='store_true', help='build the reconcile-mode graph')
+    args = parser.parse_args()
+    print(json.dumps(benchmark_fix_all_workflow(max(1, args.targets), args.scale, args.reconcile), indent=2))
+
+if __name__ == '__main__':
+    main()
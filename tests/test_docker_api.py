@@ -0,0 +1,195 @@
+"""Docker Engine API client against a fake daemon on a temporary unix socket"""
+import json
+import os
+import shutil
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+API = f'/{app.DOCKER_API_VERSION}'
+
+def stream_frame(stream_type, data):
+    """One frame of Docker's multiplexed exec stream"""
+    return bytes([stream_type, 0, 0, 0]) + struct.pack('>I', len(data)) + data
+
+class FakeDockerDaemon:
+    """Serves canned responses per (method, path without query) and records the requests"""
+
+    def __init__(self, socket_path):
+        self.routes = {}
+        self.requests = []
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def handle_request(self, method):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length)) if length else None
+                path, _, query = self.path.partition('?')
+                daemon.requests.append({'method': method, 'path': path, 'query': query, 'body': body,
+                                        'connection': id(self.connection)})
+                route = daemon.routes.get((method, path))
+                if route is None:
+                    status, content_type, data, close = 404, 'application/json', json.dumps({'message': f'page not found: {path}'}).encode(), False
+                else:
+                    status, content_type, data, close = route()
+                self.send_response(status)
+                if status != 204:
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                if status != 204:
+                    self.wfile.write(data)
+                # Drop the connection without announcing it, like an idle timeout in the daemon
+                self.close_connection = close
+
+            def do_GET(self):
+                self.handle_request('GET')
+
+            def do_POST(self):
+                self.handle_request('POST')
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        self.server = Server(socket_path, Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def json_route(self, method, path, status, obj, close=False):
+        self.routes[(method, API + path)] = lambda: (status, 'application/json', json.dumps(obj).encode(), close)
+
+    def raw_route(self, method, path, status, content_type, data):
+        self.routes[(method, API + path)] = lambda: (status, content_type, data, False)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def daemon(monkeypatch):
+    # Unix socket paths are limited to ~100 characters, so keep the directory short
+    directory = tempfile.mkdtemp(prefix='fakedocker')
+    socket_path = os.path.join(directory, 'docker.sock')
+    fake = FakeDockerDaemon(socket_path)
+    monkeypatch.setattr(app, 'docker_socket_path', socket_path)
+    monkeypatch.setattr(app, 'docker_idle_connections', [])
+    yield fake
+    for connection in app.docker_idle_connections:
+        connection.close()
+    fake.stop()
+    shutil.rmtree(directory, ignore_errors=True)
+
+def test_find_container_prefers_exact_name(daemon):
+    daemon.json_route('GET', '/containers/json', 200, [
+        {'Id': 'aaa', 'Names': ['/qbittorrentvpn-old'], 'State': 'exited', 'Status': 'Exited (0)'},
+        {'Id': 'bbb', 'Names': ['/qbittorrentvpn'], 'State': 'running', 'Status': 'Up 2 hours'}
+    ])
+
+    container = app.docker_find_container('qbittorrentvpn', include_stopped=True)
+
+    assert container == {'id': 'bbb', 'name': 'qbittorrentvpn', 'state': 'running', 'status': 'Up 2 hours'}
+    assert 'all=1' in daemon.requests[0]['query']
+
+def test_find_container_without_match_returns_none(daemon):
+    daemon.json_route('GET', '/containers/json', 200, [])
+
+    assert app.docker_find_container('missing') is None
+
+def test_exec_demultiplexes_output_and_reads_exit_code(daemon):
+    daemon.json_route('POST', '/containers/qbittorrentvpn/exec', 201, {'Id': 'exec1'})
+    daemon.raw_route('POST', '/exec/exec1/start', 200, 'application/vnd.docker.raw-stream',
+                     stream_frame(1, b'{"Success":true}') + stream_frame(2, b'curl: warning') + stream_frame(1, b'\n'))
+    daemon.json_route('GET', '/exec/exec1/json', 200, {'ExitCode': 3})
+
+    result = app.docker_exec('qbittorrentvpn', ['curl', '-s', 'https://example.invalid'])
+
+    assert result == {'exit_code': 3, 'stdout': '{"Success":true}\n', 'stderr': 'curl: warning'}
+    assert daemon.requests[0]['body']['Cmd'] == ['curl', '-s', 'https://example.invalid']
+
+def test_exec_start_error_raises_daemon_message(daemon):
+    daemon.json_route('POST', '/containers/qbittorrentvpn/exec', 201, {'Id': 'exec1'})
+    daemon.json_route('POST', '/exec/exec1/start', 409, {'message': 'container is not running'})
+
+    with pytest.raises(app.DockerAPIError, match='container is not running') as error:
+        app.docker_exec('qbittorrentvpn', ['true'])
+    assert error.value.status == 409
+
+def test_exec_in_unknown_container_raises_404(daemon):
+    daemon.json_route('POST', '/containers/missing/exec', 404, {'message': 'No such container: missing'})
+
+    with pytest.raises(app.DockerAPIError, match='No such container') as error:
+        app.docker_exec('missing', ['true'])
+    assert error.value.status == 404
+
+def test_restart_passes_stop_timeout(daemon):
+    daemon.raw_route('POST', '/containers/qbittorrentvpn/restart', 204, '', b'')
+
+    app.docker_container_action('qbittorrentvpn', 'restart')
+
+    assert daemon.requests[0]['path'] == API + '/containers/qbittorrentvpn/restart'
+    assert daemon.requests[0]['query'] == 't=10'
+
+def test_start_of_running_container_counts_as_success(daemon):
+    daemon.raw_route('POST', '/containers/qbittorrentvpn/start', 304, 'application/json', b'')
+
+    app.docker_container_action('qbittorrentvpn', 'start')
+
+def test_restart_error_raises_with_status(daemon):
+    daemon.json_route('POST', '/containers/qbittorrentvpn/restart', 500, {'message': 'cannot restart container'})
+
+    with pytest.raises(app.DockerAPIError, match='cannot restart container') as error:
+        app.docker_container_action('qbittorrentvpn', 'restart')
+    assert error.value.status == 500
+
+def test_error_without_json_body_reports_status(daemon):
+    daemon.raw_route('GET', '/containers/qbittorrentvpn/json', 502, 'text/plain', b'Bad Gateway')
+
+    with pytest.raises(app.DockerAPIError, match='HTTP 502'):
+        app.docker_inspect_container('qbittorrentvpn')
+
+def test_requests_reuse_one_connection(daemon):
+    daemon.json_route('GET', '/containers/json', 200, [])
+
+    for _ in range(3):
+        app.docker_find_container('qbittorrentvpn')
+
+    assert len({request['connection'] for request in daemon.requests}) == 1
+
+def test_connection_closed_by_daemon_is_retried_on_a_new_one(daemon):
+    daemon.json_route('GET', '/containers/json', 200, [], close=True)
+
+    app.docker_find_container('qbittorrentvpn')
+    assert app.docker_find_container('qbittorrentvpn') is None
+
+    assert len(daemon.requests) == 2
+    assert daemon.requests[0]['connection'] != daemon.requests[1]['connection']
+
+def test_missing_socket_raises(monkeypatch):
+    monkeypatch.setattr(app, 'docker_socket_path', os.path.join(tempfile.gettempdir(), 'no-such-docker.sock'))
+    monkeypatch.setattr(app, 'docker_idle_connections', [])
+
+    with pytest.raises(app.DockerAPIError, match='Cannot connect to Docker socket'):
+        app.docker_find_container('qbittorrentvpn')
+
+def test_slow_daemon_times_out(daemon):
+    def slow():
+        time.sleep(1)
+        return 200, 'application/json', b'{}', False
+    daemon.routes[('GET', API + '/containers/qbittorrentvpn/json')] = slow
+
+    with pytest.raises(app.DockerAPIError, match='timed out'):
+        app.docker_api_json('GET', '/containers/qbittorrentvpn/json', timeout=0.2)